@@ -1,36 +1,252 @@
-from django.contrib import admin
-from .models import Speaker, Session, ScheduleItem, Registration
+from django import forms
+from django.contrib import admin, messages
+from django.db.models import Case, Count, Q, When
+from django.forms.models import BaseInlineFormSet
+import logging
+
+from . import announcements, rollups, search
+from .conflicts import Slot, check_slots
+from .exports import export_response
+from .images import generate_derivatives, has_derivatives
+from .models import (
+    Speaker, Session, ScheduleItem, Registration, OutgoingEmail, Announcement, AnnouncementDelivery,
+    RegistrationRollup,
+)
+from .prerender import schedule_prerender
+
+logger = logging.getLogger(__name__)
+
+class PrerenderOnSaveMixin:
+    """Refresh the pre-rendered public pages after changes in the admin"""
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        schedule_prerender(request)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        schedule_prerender(request)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        schedule_prerender(request)
+
+class IndexedAutocompleteMixin:
+    """Answer autocomplete lookups from the search index, best match first"""
+    search_document_type = None
+    # Autocomplete pages through these; typing more narrows them down
+    autocomplete_limit = 100
+
+    def get_search_results(self, request, queryset, search_term):
+        match = request.resolver_match
+        if not search_term or match is None or match.url_name != 'autocomplete':
+            return super().get_search_results(request, queryset, search_term)
+        ids = search.index.search_ids(search_term, self.search_document_type)[:self.autocomplete_limit]
+        ranking = Case(*[When(pk=pk, then=rank) for rank, pk in enumerate(ids)], default=len(ids))
+        return queryset.filter(pk__in=ids).order_by(ranking), False
+
+def form_slot(form, session):
+    """The item as entered in ``form``, in ``session``"""
+    data = form.cleaned_data
+    return Slot(
+        form.instance.pk, data.get('title') or '', session.pk, session.name, session.date,
+        data['start_time'], data['end_time'], tuple(speaker.id for speaker in data.get('speakers') or ()),
+    )
+
+def has_times(form):
+    return bool(form.cleaned_data.get('start_time') and form.cleaned_data.get('end_time'))
+
+class ScheduleItemAdminForm(forms.ModelForm):
+    """Rejects an item that overlaps its session or double-books a speaker"""
+
+    class Meta:
+        model = ScheduleItem
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        session = cleaned_data.get('session')
+        if session and has_times(self):
+            problems = check_slots([form_slot(self, session)], cleaned_data.get('speakers') or ())
+            if problems:
+                raise forms.ValidationError(problems)
+        return cleaned_data
+
+class ScheduleItemInlineFormSet(BaseInlineFormSet):
+    """Checks a session's items against each other and other sessions together"""
+
+    def clean(self):
+        super().clean()
+        session = self.instance
+        if any(self.errors) or not session.date:
+            return
+        kept, deleted = [], []
+        for form in self.forms:
+            if not form.cleaned_data:
+                continue
+            if self.can_delete and form.cleaned_data.get('DELETE'):
+                deleted.append(form.instance.pk)
+            elif has_times(form):
+                kept.append(form)
+        speakers = [speaker for form in kept for speaker in form.cleaned_data.get('speakers') or ()]
+        problems = check_slots([form_slot(form, session) for form in kept], speakers, deleted)
+        if problems:
+            raise forms.ValidationError(problems)
 
 class ScheduleItemInline(admin.TabularInline):
     model = ScheduleItem
+    formset = ScheduleItemInlineFormSet
     extra = 1
     autocomplete_fields = ['speakers']
 
 @admin.register(Speaker)
-class SpeakerAdmin(admin.ModelAdmin):
+class SpeakerAdmin(IndexedAutocompleteMixin, PrerenderOnSaveMixin, admin.ModelAdmin):
+    search_document_type = search.SPEAKER
     list_display = ('name', 'title', 'institution', 'order', 'is_visible')
     search_fields = ('name', 'institution')
     list_filter = ('institution', 'is_visible')
     ordering = ('order', 'name')
     list_editable = ('is_visible', 'order')
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if 'photo' not in form.changed_data:
+            return
+        # The previous photo and its resized copies are deleted by
+        # django-cleanup once no speaker uses them (see conference.media).
+        # A photo another speaker already has comes with its copies.
+        if obj.photo and not has_derivatives(obj.photo.name):
+            try:
+                generate_derivatives(obj.photo.name)
+            except OSError:
+                logger.exception("Could not create derivatives for %s", obj.photo.name)
+                self.message_user(
+                    request,
+                    "The photo was saved but its resized versions could not be created.",
+                    level=messages.WARNING,
+                )
+
 @admin.register(Session)
-class SessionAdmin(admin.ModelAdmin):
+class SessionAdmin(PrerenderOnSaveMixin, admin.ModelAdmin):
     list_display = ('name', 'date', 'start_time', 'end_time')
     list_filter = ('date',)
     search_fields = ('name',)
     inlines = [ScheduleItemInline]
 
 @admin.register(ScheduleItem)
-class ScheduleItemAdmin(admin.ModelAdmin):
+class ScheduleItemAdmin(IndexedAutocompleteMixin, PrerenderOnSaveMixin, admin.ModelAdmin):
+    search_document_type = search.ITEM
+    form = ScheduleItemAdminForm
     list_display = ('title', 'session', 'start_time', 'end_time', 'is_break')
     list_filter = ('session', 'is_break')
     search_fields = ('title',)
     autocomplete_fields = ['speakers']
     
+class RegistrationAdminForm(forms.ModelForm):
+    def clean_email(self):
+        email = self.cleaned_data['email']
+        # Rows that keep their address, legacy duplicates included, pass
+        if 'email' in self.changed_data and Registration.objects.filter(
+            email_normalized=Registration.normalize_email(email)
+        ).exclude(pk=self.instance.pk).exists():
+            raise forms.ValidationError("This email address is already registered")
+        return email
+
 @admin.register(Registration)
 class RegistrationAdmin(admin.ModelAdmin):
+    form = RegistrationAdminForm
     list_display = ('full_name', 'email', 'institution', 'attendee_type', 'created_at')
     list_filter = ('attendee_type', 'created_at')
     search_fields = ('full_name', 'email', 'institution')
     readonly_fields = ('created_at',)
+    actions = ['export_csv', 'export_xlsx']
+
+    @admin.action(description="Export selected registrations as CSV")
+    def export_csv(self, request, queryset):
+        # Use "Select all" to export everything matching the current filters
+        return export_response(queryset, 'csv')
+
+    @admin.action(description="Export selected registrations as Excel (XLSX)")
+    def export_xlsx(self, request, queryset):
+        return export_response(queryset, 'xlsx')
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipients', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'recipients')
+    readonly_fields = ('created_at', 'sent_at', 'attempts', 'last_error')
+
+@admin.register(Announcement)
+class AnnouncementAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'attendee_type', 'status', 'sent', 'failed', 'pending', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
+    readonly_fields = ('status', 'created_at', 'queued_at', 'finished_at')
+    actions = ['queue_for_sending']
+
+    def get_queryset(self, request):
+        # Delivery counts for the changelist in the same query
+        return super().get_queryset(request).annotate(**{
+            f'{status}_count': Count('deliveries', filter=Q(deliveries__status=status))
+            for status, label in AnnouncementDelivery.STATUSES
+        })
+
+    @admin.display(ordering='sent_count')
+    def sent(self, obj):
+        return obj.sent_count
+
+    @admin.display(ordering='failed_count')
+    def failed(self, obj):
+        return obj.failed_count
+
+    @admin.display(ordering='pending_count')
+    def pending(self, obj):
+        return obj.pending_count
+
+    @admin.action(description="Queue selected announcements for sending to registrants")
+    def queue_for_sending(self, request, queryset):
+        added = sum(announcements.queue(announcement) for announcement in queryset)
+        self.message_user(
+            request,
+            f"Queued {added} deliveries. They are sent by the send_announcements command.",
+            messages.SUCCESS,
+        )
+
+@admin.register(AnnouncementDelivery)
+class AnnouncementDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('email', 'full_name', 'announcement', 'status', 'attempts', 'sent_at')
+    list_filter = ('status', 'announcement')
+    search_fields = ('email', 'full_name')
+    list_select_related = ('announcement',)
+    readonly_fields = ('announcement', 'email', 'full_name', 'status', 'attempts', 'last_error', 'sent_at')
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(RegistrationRollup)
+class RegistrationRollupAdmin(admin.ModelAdmin):
+    """Registrations dashboard, read from the rollup rows instead of the registrations"""
+    list_display = ('day', 'country', 'attendee_type', 'institution', 'count')
+    list_filter = ('attendee_type', 'day', 'country')
+    search_fields = ('country', 'institution')
+    date_hierarchy = 'day'
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        # Not a TemplateResponse when the filters were invalid
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            response.context_data['summary'] = rollups.summary(changelist.queryset)
+        return response
+
@@ -0,0 +1,178 @@
+"""Announcements emailed to every registrant.
+
+An organizer writes an ``Announcement`` in the admin and queues it. Queueing
+creates one ``AnnouncementDelivery`` per recipient: the registrations are
+read in chunks with ``iterator()`` and inserted with ``bulk_create``,
+skipping addresses that already have a delivery. Queueing again after new
+sign-ups only adds the newcomers.
+
+``send_announcement`` (run by the ``send_announcements`` command, since a
+large send outlasts any request) works through the pending deliveries in
+id order, a batch at a time:
+
+* the HTML and text templates are compiled once and rendered per
+  recipient;
+* every message goes over one SMTP connection, held open for the whole
+  run and only reopened after an error may have broken it. While the
+  server can't be reached, each message fails on its own and the run goes
+  on;
+* sends are paced to ``rate`` messages per second, to stay within the
+  provider's sending limits;
+* each delivery's status is saved as soon as its message is sent or
+  fails. An interrupted run resumes with the deliveries still pending; a
+  message may go out twice only if the process dies between sending it
+  and saving its status. Failed deliveries are retried on request.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Count, Q
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .mail import CONFERENCE_DATE, connect, reopen
+from .models import Announcement, AnnouncementDelivery, Registration
+
+logger = logging.getLogger(__name__)
+
+HTML_TEMPLATE = 'emails/announcement.html'
+TEXT_TEMPLATE = 'emails/announcement.txt'
+CHUNK_SIZE = 500
+DEFAULT_BATCH_SIZE = 100
+# Messages per second; CONFERENCE_ANNOUNCEMENT_RATE overrides it
+DEFAULT_RATE = 2.0
+
+
+def default_rate():
+    return getattr(settings, 'CONFERENCE_ANNOUNCEMENT_RATE', DEFAULT_RATE)
+
+
+def recipients(announcement):
+    """Registrations the announcement is for"""
+    registrations = Registration.objects.order_by('id')
+    if announcement.attendee_type:
+        registrations = registrations.filter(attendee_type=announcement.attendee_type)
+    return registrations
+
+
+def queue(announcement, chunk_size=CHUNK_SIZE):
+    """Create the missing deliveries of ``announcement``; returns how many were added"""
+    before = announcement.deliveries.count()
+    rows = recipients(announcement).values_list('full_name', 'email').iterator(chunk_size=chunk_size)
+    batch = []
+    for full_name, email in rows:
+        batch.append(AnnouncementDelivery(
+            announcement=announcement, full_name=full_name, email=Registration.normalize_email(email),
+        ))
+        if len(batch) >= chunk_size:
+            AnnouncementDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    AnnouncementDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+
+    added = announcement.deliveries.count() - before
+    if added or announcement.status == Announcement.STATUS_DRAFT:
+        announcement.status = Announcement.STATUS_QUEUED
+        announcement.queued_at = timezone.now()
+        announcement.finished_at = None
+        announcement.save(update_fields=['status', 'queued_at', 'finished_at'])
+    return added
+
+
+def delivery_counts(announcement):
+    """``{status: count}`` of the deliveries of ``announcement``"""
+    return announcement.deliveries.aggregate(**{
+        status: Count('id', filter=Q(status=status)) for status, label in AnnouncementDelivery.STATUSES
+    })
+
+
+class Throttle:
+    """Spaces calls to ``wait()`` at least ``1 / rate`` seconds apart; no limit when ``rate`` is 0"""
+
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1 / rate if rate else 0
+        self.clock = clock
+        self.sleep = sleep
+        self.next_at = None
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = self.clock()
+        if self.next_at is not None and now < self.next_at:
+            self.sleep(self.next_at - now)
+            now = self.next_at
+        self.next_at = now + self.interval
+
+
+def build_message(templates, announcement, delivery, connection):
+    html_template, text_template = templates
+    context = {
+        'announcement': announcement,
+        'participant': delivery,
+        'conference_date': CONFERENCE_DATE,
+    }
+    message = EmailMultiAlternatives(
+        announcement.subject, text_template.render(context), settings.DEFAULT_FROM_EMAIL, [delivery.email],
+        connection=connection,
+    )
+    message.attach_alternative(html_template.render(context), 'text/html')
+    return message
+
+
+def send_announcement(announcement, rate=None, batch_size=DEFAULT_BATCH_SIZE, retry_failed=False,
+                      connection=None):
+    """
+    Send the pending deliveries of ``announcement`` over one SMTP connection.
+
+    Returns a ``(sent, failed)`` tuple of counts. With ``retry_failed``,
+    deliveries that failed in an earlier run are tried again.
+    """
+    if retry_failed:
+        announcement.deliveries.filter(status=AnnouncementDelivery.STATUS_FAILED).update(
+            status=AnnouncementDelivery.STATUS_PENDING,
+        )
+    templates = (get_template(HTML_TEMPLATE), get_template(TEXT_TEMPLATE))
+    throttle = Throttle(default_rate() if rate is None else rate)
+    connection = connection or get_connection()
+    pending = announcement.deliveries.filter(status=AnnouncementDelivery.STATUS_PENDING).order_by('id')
+    sent = failed = 0
+    last_id = 0
+
+    connect(connection)
+    try:
+        while True:
+            # Keyset pagination: deliveries that fail stay behind last_id
+            batch = list(pending.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            for delivery in batch:
+                last_id = delivery.id
+                throttle.wait()
+                delivery.attempts += 1
+                try:
+                    build_message(templates, announcement, delivery, connection).send()
+                except Exception as exc:
+                    failed += 1
+                    logger.warning("Sending announcement %s to %s failed: %s", announcement.id, delivery.email, exc)
+                    delivery.status = AnnouncementDelivery.STATUS_FAILED
+                    delivery.last_error = str(exc)
+                    delivery.save(update_fields=['attempts', 'status', 'last_error'])
+                    # Replace a connection the error may have broken. A
+                    # closed one would be opened and closed per message.
+                    reopen(connection)
+                else:
+                    sent += 1
+                    delivery.status = AnnouncementDelivery.STATUS_SENT
+                    delivery.sent_at = timezone.now()
+                    delivery.last_error = ''
+                    delivery.save(update_fields=['attempts', 'status', 'sent_at', 'last_error'])
+    finally:
+        connection.close()
+
+    if not pending.exists():
+        announcement.status = Announcement.STATUS_SENT
+        announcement.finished_at = timezone.now()
+        announcement.save(update_fields=['status', 'finished_at'])
+    return sent, failed
@@ -0,0 +1,158 @@
+"""Read-only JSON API for the program, for the mobile app and signage.
+
+Each endpoint serves a snapshot: the JSON document is serialized once per
+content version together with its gzip-compressed form and a strong ETag,
+and stored in the cache. A request therefore costs one cache read; the ORM
+is only involved when the program has changed since the last snapshot.
+"""
+import gzip
+import hashlib
+import json
+import re
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import require_safe
+
+from .cache import get_or_build
+from .images import DERIVATIVE_FORMATS, DERIVATIVE_WIDTHS, derivative_name, has_derivatives
+from .program import build_schedule, build_speakers
+from .search import DOCUMENT_TYPES, search
+
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+def photo_urls(name):
+    """Original and derivative URLs of a speaker photo"""
+    if not name:
+        return None
+    urls = {'original': default_storage.url(name)}
+    if has_derivatives(name):
+        for fmt in DERIVATIVE_FORMATS:
+            urls[fmt] = {
+                str(width): default_storage.url(derivative_name(name, width, fmt))
+                for width in DERIVATIVE_WIDTHS
+            }
+    return urls
+
+
+def speakers_document():
+    return {
+        'speakers': [
+            {
+                'id': speaker.id,
+                'name': speaker.name,
+                'title': speaker.title,
+                'institution': speaker.institution,
+                'bio': speaker.bio,
+                'order': speaker.order,
+                'photo': photo_urls(speaker.photo.name if speaker.photo else None),
+            }
+            for speaker in build_speakers()
+        ],
+    }
+
+
+def schedule_document():
+    days = []
+    for date_key, day in build_schedule().items():
+        sessions = []
+        for session in day['sessions']:
+            items = []
+            for item in session['items']:
+                speakers = [
+                    {
+                        'id': speaker['id'],
+                        'name': speaker['name'],
+                        'institution': speaker['institution'],
+                        'photo': photo_urls(speaker['photo_name']),
+                    }
+                    for speaker in item['speakers']
+                ]
+                items.append(dict(item, speakers=speakers))
+            sessions.append(dict(session, items=items))
+        days.append({'date': date_key, 'label': day['date_display'], 'sessions': sessions})
+    return {'days': days}
+
+
+def make_snapshot(body):
+    """A response body with its gzip variant and ETags"""
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return {
+        'body': body,
+        'gzip': gzip.compress(body, compresslevel=9, mtime=0),
+        'etag': f'"{digest}"',
+        'gzip_etag': f'"{digest}-gz"',
+    }
+
+
+def build_snapshot(document_builder):
+    """Serialize a document once, with its gzip variant and ETags"""
+    return make_snapshot(
+        json.dumps(document_builder(), cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8')
+    )
+
+
+DOCUMENTS = {
+    'speakers': speakers_document,
+    'schedule': schedule_document,
+}
+
+
+def serve_snapshot(request, snapshot, content_type):
+    """The snapshot, gzipped if accepted, or 304 if the client has it"""
+    use_gzip = bool(ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+    etag = snapshot['gzip_etag'] if use_gzip else snapshot['etag']
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+    if etag in if_none_match or if_none_match.strip() == '*':
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            snapshot['gzip'] if use_gzip else snapshot['body'],
+            content_type=content_type,
+        )
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+    response['ETag'] = etag
+    response['Access-Control-Allow-Origin'] = '*'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def snapshot_response(request, name):
+    snapshot = get_or_build(f'api:{name}', lambda: build_snapshot(DOCUMENTS[name]))
+    return serve_snapshot(request, snapshot, 'application/json; charset=utf-8')
+
+
+@require_safe
+def speakers_json(request):
+    """Visible speakers with their bios and photo URLs"""
+    return snapshot_response(request, 'speakers')
+
+
+@require_safe
+def schedule_json(request):
+    """The full program: days, sessions, items and their speakers"""
+    return snapshot_response(request, 'schedule')
+
+
+MAX_SEARCH_RESULTS = 50
+
+
+@require_safe
+def search_json(request):
+    """Speakers and talks matching ``q``, best first; ``type`` narrows it to one kind"""
+    query = request.GET.get('q', '')[:200]
+    document_type = request.GET.get('type')
+    types = (document_type,) if document_type in DOCUMENT_TYPES else DOCUMENT_TYPES
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), MAX_SEARCH_RESULTS)
+    except ValueError:
+        limit = 10
+    response = JsonResponse({'query': query, 'results': search(query, types, limit)})
+    response['Access-Control-Allow-Origin'] = '*'
+    return response
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ConferenceConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "conference"
+
+    def ready(self):
+        # Connect the cache invalidation, search index and rollup signal handlers
+        from . import rollups, search, signals  # noqa: F401
@@ -0,0 +1,106 @@
+"""Async versions of the public views, used when served over ASGI.
+
+Under uvicorn a request that waits on the database or the journal gives
+its worker back to the event loop instead of blocking it. The program is
+loaded with the async ORM; work that has no async API (transactions, the
+SQLite journal) runs in a thread via ``sync_to_async``. Emails were never
+sent from requests: they are queued in the outbox with the registration
+and delivered by ``send_queued_emails``.
+
+``khcc_conference.asgi`` selects these views; see ``conference.urls``.
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.db import IntegrityError
+from django.shortcuts import redirect, render
+from django.urls import reverse
+
+from . import journal
+from .cache import aget_or_build, cache_public_page, get_cache_timeout, get_content_version
+from .freshness import conditional_public_page
+from .forms import RegistrationForm
+from .models import Registration
+from .program import abuild_home_preview, abuild_schedule, abuild_speakers
+from .views import (
+    DUPLICATE_EMAIL_ERROR, FORM_ERRORS_MESSAGE, REGISTERED_MESSAGE, SAVE_FAILED_MESSAGE,
+    journaled_message, registration_context, save_registration,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@conditional_public_page
+@cache_public_page
+async def home(request):
+    """View for the conference homepage"""
+    context = await aget_or_build('home', abuild_home_preview)
+    return render(request, 'conference/home.html', context)
+
+
+@conditional_public_page
+@cache_public_page
+async def speakers(request):
+    """View for the speakers page"""
+    speakers_list = await aget_or_build('speakers', abuild_speakers)
+    return render(request, 'conference/speakers.html', {'speakers': speakers_list})
+
+
+@conditional_public_page
+@cache_public_page
+async def schedule(request):
+    """View for the conference schedule page"""
+    version = await sync_to_async(get_content_version)()
+    schedule_by_date = await aget_or_build('schedule', abuild_schedule, version=version)
+    context = {
+        'schedule_by_date': schedule_by_date,
+        'content_version': version,
+        'cache_timeout': get_cache_timeout(),
+    }
+    return render(request, 'conference/schedule.html', context)
+
+
+async def registration(request):
+    """View for the registration page"""
+    if request.method != 'POST':
+        return render(request, 'conference/registration.html', registration_context(request, RegistrationForm()))
+
+    use_journal = journal.is_enabled()
+    # The duplicate check runs here on the async ORM instead of in clean()
+    form = RegistrationForm(request.POST, check_existing=False)
+    if form.is_valid() and not use_journal:
+        email = Registration.normalize_email(form.cleaned_data['email'])
+        if await Registration.objects.filter(email_normalized=email).aexists():
+            form.add_error('email', DUPLICATE_EMAIL_ERROR)
+
+    if not form.is_valid():
+        logger.info("Registration form invalid: %s", form.errors.as_json())
+        messages.error(request, FORM_ERRORS_MESSAGE)
+    elif use_journal:
+        try:
+            # Local disk I/O with an fsync; keep it off the event loop
+            token = await sync_to_async(journal.append, thread_sensitive=False)(form.cleaned_data)
+        except journal.DuplicateRegistration:
+            form.add_error('email', DUPLICATE_EMAIL_ERROR)
+            messages.error(request, FORM_ERRORS_MESSAGE)
+        else:
+            logger.info("Registration %s journaled", token)
+            messages.success(request, journaled_message(token))
+            return redirect(reverse('registration_success'))
+    else:
+        try:
+            # The async ORM has no transactions yet
+            registration = await sync_to_async(save_registration)(form)
+            logger.info("Registration %s saved", registration.id)
+            messages.success(request, REGISTERED_MESSAGE)
+            return redirect(reverse('registration_success'))
+        except IntegrityError:
+            # A simultaneous submission with the same email won the race
+            form.add_error('email', DUPLICATE_EMAIL_ERROR)
+            messages.error(request, FORM_ERRORS_MESSAGE)
+        except Exception:
+            logger.exception("Error saving registration")
+            messages.error(request, SAVE_FAILED_MESSAGE)
+
+    return render(request, 'conference/registration.html', registration_context(request, form))
@@ -0,0 +1,333 @@
+"""Latency benchmark of the main pages with the Django test client.
+
+Each scenario is requested repeatedly in-process, so the numbers measure
+the application itself (middleware, views, ORM, templates) without a web
+server or network in between. Cacheable pages are measured twice: ``cold``
+clears the cache before every request, ``warm`` serves from it. Peak memory
+is traced on one extra request per scenario, so the tracing overhead
+doesn't distort the timings.
+
+``compare_concurrency`` measures throughput instead: many clients request
+a page at once while every query is delayed to simulate a remote
+database, once against the sync views behind a fixed number of WSGI
+workers and once against the async views on a single event loop.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import datetime
+import json
+import math
+import platform
+import threading
+import time
+import tracemalloc
+import uuid
+
+from asgiref.sync import ThreadSensitiveContext
+import django
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import include, path, reverse
+
+from . import async_views, views
+from .models import Speaker, Session, ScheduleItem, Registration
+from .urls import build_urlpatterns
+
+
+class Scenario:
+    """One request to measure"""
+
+    def __init__(self, name, url_name, method='get', admin=False, cacheable=False, expected_status=200):
+        self.name = name
+        self.url_name = url_name
+        self.method = method
+        self.admin = admin
+        self.cacheable = cacheable
+        self.expected_status = expected_status
+
+    @property
+    def modes(self):
+        return ('cold', 'warm') if self.cacheable else ('live',)
+
+    def data(self):
+        if self.name != 'registration':
+            return None
+        # A new address each time, or the form rejects it as a duplicate
+        email = f"benchmark-{uuid.uuid4().hex}@example.com"
+        return {
+            'full_name': "Benchmark Attendee",
+            'email': email,
+            'email_confirm': email,
+            'phone': "0790000000",
+            'institution': "KHCC",
+            'country': "Jordan",
+            'attendee_type': "trainee",
+        }
+
+
+SCENARIOS = (
+    Scenario('home', 'home', cacheable=True),
+    Scenario('speakers', 'speakers', cacheable=True),
+    Scenario('schedule', 'schedule', cacheable=True),
+    Scenario('registration', 'registration', method='post', expected_status=302),
+    Scenario('admin_registrations', 'admin:conference_registration_changelist', admin=True),
+    Scenario('admin_speakers', 'admin:conference_speaker_changelist', admin=True),
+    Scenario('admin_sessions', 'admin:conference_session_changelist', admin=True),
+    Scenario('admin_schedule_items', 'admin:conference_scheduleitem_changelist', admin=True),
+)
+SCENARIO_NAMES = tuple(scenario.name for scenario in SCENARIOS)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    # Rounded first: 0.1 * 30 is 3.0000000000000004, which would take rank 4
+    rank = math.ceil(round(fraction * len(ordered), 9))
+    index = max(0, min(len(ordered) - 1, rank - 1))
+    return ordered[index]
+
+
+def request_host():
+    hosts = [host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')]
+    if 'testserver' in settings.ALLOWED_HOSTS or '*' in settings.ALLOWED_HOSTS or not hosts:
+        return 'testserver'
+    return 'localhost' if 'localhost' in hosts else hosts[0]
+
+
+def admin_client(host):
+    User = get_user_model()
+    user, created = User.objects.get_or_create(
+        username='benchmark', defaults={'is_staff': True, 'is_superuser': True},
+    )
+    client = Client(HTTP_HOST=host)
+    client.force_login(user)
+    return client
+
+
+def dataset_size():
+    return {
+        'speakers': Speaker.objects.count(),
+        'sessions': Session.objects.count(),
+        'schedule_items': ScheduleItem.objects.count(),
+        'registrations': Registration.objects.count(),
+    }
+
+
+class Benchmark:
+    def __init__(self, scenarios=SCENARIOS, iterations=50, warmup=5):
+        self.scenarios = scenarios
+        self.iterations = iterations
+        self.warmup = warmup
+        host = request_host()
+        self.clients = {False: Client(HTTP_HOST=host), True: admin_client(host)}
+
+    def request(self, scenario, mode):
+        if mode == 'cold':
+            cache.clear()
+        client = self.clients[scenario.admin]
+        send = getattr(client, scenario.method)
+        return send(reverse(scenario.url_name), scenario.data())
+
+    def measure(self, scenario, mode):
+        for _ in range(self.warmup):
+            self.request(scenario, mode)
+
+        timings, queries, errors = [], [], 0
+        for _ in range(self.iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = self.request(scenario, mode)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+            if response.status_code != scenario.expected_status:
+                errors += 1
+
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            self.request(scenario, mode)
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'scenario': scenario.name,
+            'mode': mode,
+            'requests': self.iterations,
+            'errors': errors,
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'max_ms': round(max(timings), 3),
+            'queries': max(queries),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def run(self, progress=None):
+        results = []
+        for scenario in self.scenarios:
+            for mode in scenario.modes:
+                result = self.measure(scenario, mode)
+                results.append(result)
+                if progress:
+                    progress(result)
+        return {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'iterations': self.iterations,
+            'dataset': dataset_size(),
+            'results': results,
+        }
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        report = json.load(f)
+    return {(result['scenario'], result['mode']): result for result in report['results']}
+
+
+class SyncURLConf:
+    """The site with the sync page views, as served over WSGI"""
+    urlpatterns = [path('admin/', admin.site.urls), path('', include(build_urlpatterns(views)))]
+
+
+class AsyncURLConf:
+    """The site with the async page views, as served over ASGI"""
+    urlpatterns = [path('admin/', admin.site.urls), path('', include(build_urlpatterns(async_views)))]
+
+
+# Pages compared by compare_concurrency; they only read
+CONCURRENCY_PAGES = ('home', 'speakers', 'schedule')
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+@contextmanager
+def simulated_latency(seconds):
+    """Delay every query, like a round trip to a remote database"""
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(connection, **kwargs):
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, delay)
+
+    connection_created.connect(install, weak=False)
+    for conn in connections.all(initialized_only=True):
+        install(conn)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(install)
+        for conn in connections.all(initialized_only=True):
+            if delay in conn.execute_wrappers:
+                conn.execute_wrappers.remove(delay)
+
+
+def throughput_stats(mode, timings, elapsed, errors):
+    return {
+        'mode': mode,
+        'requests': len(timings),
+        'errors': errors,
+        'requests_per_second': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 0.50), 1),
+        'p95_ms': round(percentile(timings, 0.95), 1),
+    }
+
+
+def run_wsgi(url, concurrency, requests, workers):
+    """``concurrency`` clients sharing ``workers`` sync workers"""
+    slots = threading.Semaphore(workers)
+    counts = [requests // concurrency + (1 if n < requests % concurrency else 0) for n in range(concurrency)]
+
+    def client_loop(count):
+        client = Client()
+        timings, errors = [], 0
+        try:
+            for _ in range(count):
+                # Time spent queueing for a free worker counts too
+                started = time.perf_counter()
+                with slots:
+                    response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+                errors += response.status_code != 200
+        finally:
+            connections.close_all()
+        return timings, errors
+
+    started = time.perf_counter()
+    with override_settings(ROOT_URLCONF=SyncURLConf), ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(client_loop, counts))
+    elapsed = time.perf_counter() - started
+    return throughput_stats(
+        f'wsgi ({workers} workers)',
+        [t for timings, errors in results for t in timings],
+        elapsed,
+        sum(errors for timings, errors in results),
+    )
+
+
+def run_asgi(url, concurrency, requests):
+    """``concurrency`` clients on one event loop"""
+    counts = [requests // concurrency + (1 if n < requests % concurrency else 0) for n in range(concurrency)]
+
+    async def client_loop(count):
+        client = AsyncClient()
+        timings, errors = [], 0
+        for _ in range(count):
+            started = time.perf_counter()
+            # As the ASGI handler does: each request gets its own thread
+            # for the sync parts (and database connection)
+            async with ThreadSensitiveContext():
+                response = await client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+            errors += response.status_code != 200
+        return timings, errors
+
+    async def run_all():
+        return await asyncio.gather(*(client_loop(count) for count in counts))
+
+    started = time.perf_counter()
+    with override_settings(ROOT_URLCONF=AsyncURLConf):
+        results = asyncio.run(run_all())
+    elapsed = time.perf_counter() - started
+    return throughput_stats(
+        'asgi',
+        [t for timings, errors in results for t in timings],
+        elapsed,
+        sum(errors for timings, errors in results),
+    )
+
+
+def compare_concurrency(pages=CONCURRENCY_PAGES, concurrency=32, requests=320, workers=4, latency_ms=20):
+    """Throughput of the sync and async views under simulated database latency"""
+    results = []
+    # Every request goes to the database, as on a cache miss. AsyncClient
+    # always sends "Host: testserver".
+    with override_settings(CACHES=NO_CACHE, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']), \
+            simulated_latency(latency_ms / 1000):
+        for page in pages:
+            url = reverse(page, urlconf=SyncURLConf)
+            for result in (run_wsgi(url, concurrency, requests, workers), run_asgi(url, concurrency, requests)):
+                result['scenario'] = page
+                results.append(result)
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'concurrency': concurrency,
+        'wsgi_workers': workers,
+        'latency_ms': latency_ms,
+        'dataset': dataset_size(),
+        'results': results,
+    }
@@ -0,0 +1,204 @@
+"""Content-versioned caching for the public conference pages.
+
+Every cache key written here embeds the current *content version*. Editing a
+``Speaker``, ``Session`` or ``ScheduleItem`` bumps the version (see
+``conference.signals``), which makes every page, fragment and data entry
+cached under the previous version unreachable at once. Nothing has to be
+deleted explicitly and old entries simply expire.
+
+Keys also embed the *build*, the deployed code's identifier, since pages
+rendered by the previous deploy may link other static files or media
+URLs, or come from other templates.
+"""
+from functools import lru_cache, wraps
+import hashlib
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .compression import compressed_variants, minify_response, negotiate
+
+CONTENT_VERSION_KEY = 'conference:content-version'
+
+
+@lru_cache
+def git_commit(directory):
+    """The commit checked out in ``directory``, read from ``.git``, or None"""
+    git = os.path.join(directory, '.git')
+    try:
+        with open(os.path.join(git, 'HEAD')) as f:
+            head = f.read().strip()
+        if not head.startswith('ref: '):
+            return head
+        ref = head[len('ref: '):]
+        try:
+            with open(os.path.join(git, ref)) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            with open(os.path.join(git, 'packed-refs')) as f:
+                return next((line.split()[0] for line in f if line.rstrip().endswith(' ' + ref)), None)
+    except OSError:
+        return None
+
+
+def get_build_id():
+    """``CONFERENCE_BUILD_ID``, or the git commit of the code"""
+    return getattr(settings, 'CONFERENCE_BUILD_ID', None) or git_commit(str(settings.BASE_DIR)) or 'dev'
+
+
+def get_cache_timeout():
+    """How long versioned entries may live, in seconds"""
+    return getattr(settings, 'CONFERENCE_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def get_content_version():
+    """Return the current content version, initializing it if needed"""
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a version lost to eviction can never reuse
+        # a number that older, still cached, pages were stored under
+        cache.add(CONTENT_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CONTENT_VERSION_KEY)
+    return version
+
+
+def bump_content_version():
+    """Invalidate everything cached for the current content version"""
+    try:
+        cache.incr(CONTENT_VERSION_KEY)
+    except ValueError:
+        # The key was never set or has been evicted
+        cache.set(CONTENT_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def versioned_key(*parts, version=None):
+    """Build a cache key bound to the given (or current) content version"""
+    if version is None:
+        version = get_content_version()
+    return ':'.join(['conference', get_build_id()[:12], str(version)] + [str(part) for part in parts])
+
+
+def get_or_build(name, builder, version=None):
+    """Return the cached result of ``builder()`` for the content version"""
+    key = versioned_key('data', name, version=version)
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, get_cache_timeout())
+    return value
+
+
+async def aget_or_build(name, builder, version=None):
+    """``get_or_build`` for an async ``builder``"""
+    if version is None:
+        version = await sync_to_async(get_content_version)()
+    key = versioned_key('data', name, version=version)
+    value = await cache.aget(key)
+    if value is None:
+        value = await builder()
+        await cache.aset(key, value, get_cache_timeout())
+    return value
+
+
+def is_cacheable_request(request):
+    """
+    Only plain anonymous GETs get the shared page.
+
+    Visitors with a session or pending flash messages may see content that
+    differs from the shared copy, so they always get a fresh render.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return False
+    if 'messages' in request.COOKIES:
+        return False
+    return True
+
+
+def page_cache_key(request):
+    # Read the version before the view queries anything, so a page
+    # rendered from data that is being edited is stored under the old
+    # version and never outlives the edit
+    version = get_content_version()
+    path_hash = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return versioned_key('page', path_hash, version=version)
+
+
+def is_storable(response):
+    return response.status_code == 200 and not response.streaming and not response.cookies
+
+
+def variant_key(key, encoding):
+    return f'{key}:{encoding}' if encoding else key
+
+
+def page_entries(key, response):
+    """Cache entries for a rendered page: minified, and in each encoding"""
+    minify_response(response)
+    content, content_type = response.content, response['Content-Type']
+    entries = {key: (content, content_type, None)}
+    for encoding, body in compressed_variants(content).items():
+        # Bodies that don't shrink are stored as they are
+        entries[variant_key(key, encoding)] = (body, content_type, encoding) if body else entries[key]
+    return entries
+
+
+def page_response(entry):
+    content, content_type, encoding = entry
+    response = HttpResponse(content, content_type=content_type)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response.minified = True
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+def cache_public_page(view_func):
+    """
+    Serve the whole rendered page from cache between content edits.
+
+    The page is minified and compressed when it's stored, and each request
+    reads only the variant its ``Accept-Encoding`` asks for.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return await view_func(request, *args, **kwargs)
+            key = await sync_to_async(page_cache_key)(request)
+            variant = variant_key(key, negotiate(request))
+            cached = await cache.aget(variant)
+            if cached is not None:
+                return page_response(cached)
+            response = await view_func(request, *args, **kwargs)
+            if not is_storable(response):
+                return response
+            entries = page_entries(key, response)
+            await cache.aset_many(entries, get_cache_timeout())
+            return page_response(entries[variant])
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            return view_func(request, *args, **kwargs)
+
+        key = page_cache_key(request)
+        variant = variant_key(key, negotiate(request))
+        cached = cache.get(variant)
+        if cached is not None:
+            return page_response(cached)
+
+        response = view_func(request, *args, **kwargs)
+        if not is_storable(response):
+            return response
+        entries = page_entries(key, response)
+        cache.set_many(entries, get_cache_timeout())
+        return page_response(entries[variant])
+    return wrapper
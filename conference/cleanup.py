@@ -0,0 +1,127 @@
+"""Finding duplicate and orphaned speaker photos.
+
+Uploads used to get a fresh random name, so the photo folder collected
+byte-identical copies and files no speaker refers to any more. ``plan()``
+walks the folder once. Files are grouped by size, and only files that
+share a size are read, in chunks, into a hash index, since a file with a
+unique size can't have a duplicate.
+
+* Duplicates: of each set of identical originals one is kept, preferring
+  one that speakers use and that has derivatives, and the speakers using
+  the others are moved to it.
+* Orphans: files that no speaker photo is, or is a derivative of, once
+  the duplicates are merged. Recent files are left alone, since an
+  upload is written before the row referring to it is committed.
+
+``apply()`` makes the changes; without it nothing is touched.
+"""
+from collections import defaultdict, namedtuple
+import os
+import time
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from . import prerender
+from .cache import bump_content_version
+from .images import DERIVATIVE_DIR, derivative_names, generate_derivatives, has_derivatives
+from .media import content_hash
+from .models import Speaker
+
+PHOTO_FOLDER = 'speakers'
+# Files younger than this are never orphans, in seconds
+MIN_AGE = 60 * 60
+CHUNK_SIZE = 64 * 1024
+
+MediaFile = namedtuple('MediaFile', 'name path size mtime')
+Plan = namedtuple('Plan', 'files duplicates moves orphans')
+
+
+def scan(folder=PHOTO_FOLDER):
+    """Every file under ``folder`` of the media root"""
+    root = default_storage.path(folder)
+    for directory, subfolders, filenames in os.walk(root):
+        subfolders.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(directory, filename)
+            stat = os.stat(path)
+            name = os.path.relpath(path, default_storage.location).replace(os.sep, '/')
+            yield MediaFile(name, path, stat.st_size, stat.st_mtime)
+
+
+def read_chunks(path):
+    with open(path, 'rb') as f:
+        yield from iter(lambda: f.read(CHUNK_SIZE), b'')
+
+
+def find_duplicates(files):
+    """Lists of byte-identical files, each with more than one file"""
+    by_size = defaultdict(list)
+    for media_file in files:
+        by_size[media_file.size].append(media_file)
+    index = defaultdict(list)
+    for same_size in by_size.values():
+        if len(same_size) > 1:
+            for media_file in same_size:
+                index[(media_file.size, content_hash(read_chunks(media_file.path)))].append(media_file)
+    return [group for group in index.values() if len(group) > 1]
+
+
+def is_derivative(name):
+    return DERIVATIVE_DIR in name.split('/')[:-1]
+
+
+def photo_names():
+    return set(Speaker.objects.exclude(photo='').exclude(photo__isnull=True).values_list('photo', flat=True))
+
+
+def with_derivatives(names):
+    return set(names) | {derivative for name in names for derivative in derivative_names(name)}
+
+
+def plan(folder=PHOTO_FOLDER, min_age=MIN_AGE):
+    """What ``apply()`` would do, without changing anything"""
+    files = list(scan(folder))
+    referenced = photo_names()
+
+    duplicates, moves = [], {}
+    for group in find_duplicates([media_file for media_file in files if not is_derivative(media_file.name)]):
+        keep = min(group, key=lambda f: (f.name not in referenced, not has_derivatives(f.name), f.name))
+        duplicates.append((keep, [media_file for media_file in group if media_file is not keep]))
+        for media_file in group:
+            if media_file is not keep and media_file.name in referenced:
+                moves[media_file.name] = keep.name
+
+    kept = with_derivatives({moves.get(name, name) for name in referenced})
+    moved_away = set(moves)
+    cutoff = time.time() - min_age
+    orphans = [
+        media_file for media_file in files
+        if media_file.name not in kept and (media_file.mtime < cutoff or media_file.name in moved_away)
+    ]
+    return Plan(files, duplicates, moves, orphans)
+
+
+def apply(cleanup):
+    """Move speakers off duplicates and delete the orphans; returns bytes freed"""
+    if cleanup.moves:
+        with transaction.atomic():
+            for old, new in cleanup.moves.items():
+                # update() skips django-cleanup, which would delete the file
+                Speaker.objects.filter(photo=old).update(photo=new)
+            transaction.on_commit(bump_content_version)
+            if prerender.is_enabled():
+                # Pre-rendered pages link the photos about to be deleted
+                transaction.on_commit(prerender.refresh_prerendered)
+        for name in set(cleanup.moves.values()):
+            if not has_derivatives(name):
+                generate_derivatives(name)
+    # A speaker may have been given one of the files since the plan was made
+    in_use = with_derivatives(photo_names())
+    freed = 0
+    for media_file in cleanup.orphans:
+        if media_file.name in in_use:
+            continue
+        default_storage.delete(media_file.name)
+        freed += media_file.size
+    return freed
@@ -0,0 +1,162 @@
+"""Minified and compressed HTML for the dynamic pages.
+
+The templates are indented for reading, and a large share of the schedule
+page is whitespace. ``minify_html`` collapses every line break and the
+indentation around it to a single newline, outside ``<pre>``,
+``<textarea>`` and ``<script>``. A browser renders the result the same
+way: elsewhere, and in CSS, a line break is just white space.
+
+Pages cached by ``cache_public_page`` are minified and compressed (brotli
+when installed, and gzip) once per content version, at the highest levels,
+and each encoding is stored under its own key. A cache hit reads the
+negotiated variant and serves it as is. ``CompressionMiddleware`` handles
+every other response: it minifies HTML and gzips bodies worth
+compressing, unless they are already encoded (the JSON API, calendar
+feeds, pre-rendered pages and static files carry their own variants).
+Those responses may reflect the visitor's input next to a CSRF token, so
+they are compressed like Django's ``GZipMiddleware`` does, with a random
+length gzip header against BREACH, and never with brotli, which has no
+equivalent.
+
+Settings:
+
+``CONFERENCE_MINIFY_HTML``
+    Whether to minify HTML responses (default True).
+"""
+import gzip
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies shorter than this aren't worth compressing
+MIN_LENGTH = 200
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+)
+# Random bytes added to on-the-fly gzip output, as GZipMiddleware does
+MAX_RANDOM_BYTES = 100
+
+PRESERVED = re.compile(r'<(pre|textarea|script)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+# Not \s, which would also take non-breaking spaces
+LINE_BREAK = re.compile(r'[ \t\r]*\n[ \t\r\n]*')
+ACCEPTS = {encoding: re.compile(rf'\b{encoding}\b') for encoding in ('br', 'gzip')}
+
+
+def is_minify_enabled():
+    return getattr(settings, 'CONFERENCE_MINIFY_HTML', True)
+
+
+def available_encodings():
+    """Encodings the cached variants are made in, preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(request, encodings=None):
+    """The first of ``encodings`` the client accepts, or None"""
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    return next(
+        (encoding for encoding in encodings or available_encodings() if ACCEPTS[encoding].search(accept_encoding)),
+        None,
+    )
+
+
+def compress(content, encoding):
+    """``content`` compressed as small as possible, deterministically"""
+    if encoding == 'br':
+        return brotli.compress(content, mode=brotli.MODE_TEXT)
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def compressed_variants(content):
+    """
+    ``{encoding: body}`` for every available encoding.
+
+    The body is None where compressing doesn't pay off, so the caller
+    serves ``content`` as is.
+    """
+    variants = {}
+    for encoding in available_encodings():
+        body = compress(content, encoding) if len(content) >= MIN_LENGTH else None
+        variants[encoding] = body if body is not None and len(body) < len(content) else None
+    return variants
+
+
+def minify_html(text):
+    """Collapse line breaks and indentation outside whitespace-sensitive elements"""
+    pieces, position = [], 0
+    for match in PRESERVED.finditer(text):
+        pieces.append(LINE_BREAK.sub('\n', text[position:match.start()]))
+        pieces.append(match.group(0))
+        position = match.end()
+    pieces.append(LINE_BREAK.sub('\n', text[position:]))
+    return ''.join(pieces).strip()
+
+
+def is_html(response):
+    return response.get('Content-Type', '').startswith('text/html')
+
+
+def minify_response(response):
+    """Minify an HTML response in place, once"""
+    if getattr(response, 'minified', False) or not is_minify_enabled() or not is_html(response):
+        return
+    response.content = minify_html(response.content.decode(response.charset)).encode(response.charset)
+    response.minified = True
+    if response.has_header('Content-Length'):
+        response['Content-Length'] = str(len(response.content))
+
+
+def is_compressible(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.has_header('Content-Encoding')
+        and response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+    )
+
+
+class CompressionMiddleware:
+    """Minify HTML and gzip responses that aren't compressed yet"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if not is_compressible(response):
+            return response
+        minify_response(response)
+        patch_vary_headers(response, ['Accept-Encoding'])
+        if len(response.content) < MIN_LENGTH or negotiate(request, ('gzip',)) is None:
+            return response
+        compressed = compress_string(response.content, max_random_bytes=MAX_RANDOM_BYTES)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = 'gzip'
+        # The compressed bytes differ from the uncompressed ones
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        return response
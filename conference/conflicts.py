@@ -0,0 +1,161 @@
+"""Overlapping schedule items and double-booked speakers.
+
+Two kinds of conflict are found:
+
+* two items of the same session whose times overlap;
+* a speaker in two items on the same day whose times overlap, in any
+  sessions.
+
+Items are loaded once (``load_slots``) and checked with a sweep: the
+slots are sorted by group (session, or speaker and day) and start time,
+and each slot is compared only with the earlier slots of its group that
+haven't ended yet, kept in a heap by end time. That is O(n log n) plus
+the conflicts found, rather than comparing every pair of items.
+
+The admin checks the items being saved (see ``conference.admin``) and the
+``audit_schedule`` command checks the whole program.
+"""
+from collections import namedtuple
+from heapq import heappop, heappush
+from itertools import count
+
+from django.db.models import Q
+
+from .models import ScheduleItem
+
+SESSION_OVERLAP = 'session'
+SPEAKER_CONFLICT = 'speaker'
+
+
+class Slot(namedtuple('Slot', 'item_id title session_id session_name date start_time end_time speaker_ids')):
+    """One schedule item, as far as conflicts are concerned"""
+
+    @property
+    def start(self):
+        return self.start_time.hour * 60 + self.start_time.minute
+
+    @property
+    def end(self):
+        end = self.end_time.hour * 60 + self.end_time.minute
+        # An item ending "before" it starts runs past midnight
+        return end + 24 * 60 if end < self.start else end
+
+    def describe(self):
+        return f"“{self.title}” ({self.start_time:%H:%M}–{self.end_time:%H:%M}, {self.session_name})"
+
+
+class Conflict(namedtuple('Conflict', 'kind first second speaker')):
+    def involves(self, slots):
+        return any(slot is self.first or slot is self.second for slot in slots)
+
+    @property
+    def message(self):
+        if self.kind == SESSION_OVERLAP:
+            return f"{self.first.describe()} overlaps {self.second.describe()}."
+        return (
+            f"{self.speaker} is booked for both {self.first.describe()} and "
+            f"{self.second.describe()} on {self.first.date:%d %B %Y}."
+        )
+
+
+def overlaps(slots, groups):
+    """
+    ``(group, earlier, later)`` for slots of a group whose times overlap.
+
+    ``groups(slot)`` gives the groups a slot belongs to. Slots that only
+    touch (one ends when the next starts) don't overlap.
+    """
+    entries = sorted(
+        ((group, slot.start, slot.end, number, slot)
+         for number, slot in enumerate(slots) for group in groups(slot)),
+        key=lambda entry: entry[:4],
+    )
+    found = []
+    current, active, tiebreak = None, [], count()
+    for group, start, end, number, slot in entries:
+        if group != current:
+            current, active = group, []
+        # Drop the slots of this group that ended by the time this one starts
+        while active and active[0][0] <= start:
+            heappop(active)
+        for active_end, order, other in active:
+            found.append((group, other, slot))
+        heappush(active, (end, next(tiebreak), slot))
+    return found
+
+
+def find_conflicts(slots, speaker_names=None):
+    """Every session overlap and speaker double-booking among ``slots``"""
+    speaker_names = speaker_names or {}
+    conflicts = [
+        Conflict(SESSION_OVERLAP, first, second, None)
+        # Items of a session that isn't saved yet have no session id
+        for session_id, first, second in overlaps(slots, lambda slot: [slot.session_id or 0])
+    ]
+    conflicts += [
+        Conflict(SPEAKER_CONFLICT, first, second, speaker_names.get(speaker_id, f"Speaker #{speaker_id}"))
+        for (speaker_id, date), first, second in overlaps(
+            slots, lambda slot: [(speaker_id, slot.date) for speaker_id in slot.speaker_ids]
+        )
+    ]
+    return conflicts
+
+
+def load_slots(queryset):
+    """Slots for the items of ``queryset``, in two queries, with the speaker names"""
+    rows = list(queryset.order_by().values(
+        'id', 'title', 'session_id', 'session__name', 'session__date', 'start_time', 'end_time',
+    ))
+    speaker_ids, names = {}, {}
+    links = (
+        ScheduleItem.speakers.through.objects
+        .filter(scheduleitem_id__in=queryset.order_by().values('id'))
+        .values_list('scheduleitem_id', 'speaker_id', 'speaker__name')
+    )
+    for item_id, speaker_id, name in links:
+        speaker_ids.setdefault(item_id, []).append(speaker_id)
+        names[speaker_id] = name
+    slots = [
+        Slot(row['id'], row['title'], row['session_id'], row['session__name'], row['session__date'],
+             row['start_time'], row['end_time'], tuple(speaker_ids.get(row['id'], ())))
+        for row in rows
+    ]
+    return slots, names
+
+
+def neighbours(date, session_id, speaker_ids, exclude_ids=()):
+    """Items that could conflict with new ones in a session on ``date``"""
+    with_speakers = ScheduleItem.speakers.through.objects.filter(
+        speaker_id__in=speaker_ids, scheduleitem__session__date=date,
+    ).values('scheduleitem_id')
+    queryset = ScheduleItem.objects.filter(Q(session_id=session_id) | Q(pk__in=with_speakers))
+    return load_slots(queryset.exclude(pk__in=[pk for pk in exclude_ids if pk]))
+
+
+def check_slots(candidates, speakers, exclude_ids=()):
+    """
+    Messages for the conflicts that involve any of the ``candidates``.
+
+    ``candidates`` are slots of one session as submitted in a form. They
+    are checked against each other and against the saved items they could
+    clash with, except the saved versions of the candidates themselves and
+    ``exclude_ids`` (items being deleted).
+    """
+    if not candidates:
+        return []
+    first = candidates[0]
+    speaker_ids = {speaker_id for slot in candidates for speaker_id in slot.speaker_ids}
+    exclude_ids = [slot.item_id for slot in candidates] + list(exclude_ids)
+    others, names = neighbours(first.date, first.session_id, speaker_ids, exclude_ids)
+    names.update({speaker.id: speaker.name for speaker in speakers})
+    return [
+        conflict.message for conflict in find_conflicts(candidates + others, names)
+        if conflict.involves(candidates)
+    ]
+
+
+def audit():
+    """Every conflict in the program, ordered by day and time"""
+    slots, names = load_slots(ScheduleItem.objects.all())
+    conflicts = find_conflicts(slots, names)
+    return sorted(conflicts, key=lambda c: (c.first.date, c.first.start, c.second.start, c.kind))
@@ -0,0 +1,204 @@
+"""Streaming exports of registrations as CSV or XLSX.
+
+Both formats are produced by generators that read registrations in chunks
+with ``iterator()`` and yield encoded bytes as they go, so memory use stays
+flat however many registrations there are and a ``StreamingHttpResponse``
+can start sending immediately. The XLSX writer emits a minimal workbook
+into a zip stream by hand, so it needs no spreadsheet library.
+"""
+import csv
+from datetime import date, datetime, time
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Registration
+
+CHUNK_SIZE = 2000
+# Leading characters that make spreadsheet apps read a cell as a formula
+FORMULA_PREFIXES = '=@\t\r'
+SIGNS = '+-'
+PHONE_NUMBER = re.compile(r'[\d\s-]*')
+EXPORT_COLUMNS = (
+    ('id', 'ID'),
+    ('full_name', 'Full name'),
+    ('email', 'Email'),
+    ('phone', 'Phone'),
+    ('institution', 'Institution'),
+    ('country', 'Country'),
+    ('attendee_type', 'Attendee type'),
+    ('special_requirements', 'Special requirements'),
+    ('created_at', 'Registered at'),
+)
+ATTENDEE_TYPE_LABELS = dict(Registration.ATTENDEE_TYPES)
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def start_of_day(value):
+    """Midnight in the conference timezone for dates; datetimes unchanged"""
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return timezone.make_aware(datetime.combine(value, time.min))
+    return value
+
+
+def filter_registrations(queryset=None, attendee_type=None, since=None, until=None):
+    """Apply the same filters as the admin changelist's sidebar"""
+    if queryset is None:
+        queryset = Registration.objects.all()
+    if attendee_type:
+        queryset = queryset.filter(attendee_type=attendee_type)
+    if since:
+        queryset = queryset.filter(created_at__gte=start_of_day(since))
+    if until:
+        queryset = queryset.filter(created_at__lt=start_of_day(until))
+    return queryset
+
+
+def export_rows(queryset):
+    """Yield each registration as a list of display strings"""
+    fields = [field for field, label in EXPORT_COLUMNS]
+    rows = queryset.order_by('created_at', 'id').values_list(*fields)
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        values = dict(zip(fields, row))
+        values['attendee_type'] = ATTENDEE_TYPE_LABELS.get(values['attendee_type'], values['attendee_type'])
+        values['created_at'] = timezone.localtime(values['created_at']).strftime('%Y-%m-%d %H:%M')
+        yield ['' if values[field] is None else str(values[field]) for field in fields]
+
+
+class Buffer:
+    """Write target that hands back whatever was written since last time"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(chunk if isinstance(chunk, bytes) else chunk.encode() for chunk in self.chunks)
+        self.chunks = []
+        return data
+
+
+def csv_safe(value):
+    """
+    Keep spreadsheet apps from evaluating user input as a formula.
+
+    Values starting with ``+`` or ``-`` are left alone when the rest is
+    digits, spaces and dashes, so phone numbers like ``+962 6 530 0460``
+    export as written.
+    """
+    if not value:
+        return value
+    if value[0] in FORMULA_PREFIXES or (value[0] in SIGNS and not PHONE_NUMBER.fullmatch(value[1:])):
+        return "'" + value
+    return value
+
+
+def stream_csv(queryset):
+    """Yield the CSV export in chunks of encoded bytes"""
+    buffer = Buffer()
+    writer = csv.writer(buffer)
+    # A BOM lets Excel detect UTF-8 (names with Arabic or accented letters)
+    buffer.write('\ufeff')
+    writer.writerow([label for field, label in EXPORT_COLUMNS])
+    for count, row in enumerate(export_rows(queryset), 1):
+        writer.writerow([csv_safe(value) for value in row])
+        if count % CHUNK_SIZE == 0:
+            yield buffer.take()
+    yield buffer.take()
+
+
+# Characters XML 1.0 doesn't allow, which Excel refuses to open
+ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Registrations" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def xlsx_row(values):
+    cells = ''.join(
+        f'<c t="inlineStr"><is><t xml:space="preserve">{escape(ILLEGAL_XML_CHARS.sub("", value))}</t></is></c>'
+        for value in values
+    )
+    return f'<row>{cells}</row>'
+
+
+def stream_xlsx(queryset):
+    """Yield the XLSX export in chunks of zipped bytes"""
+    buffer = Buffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in XLSX_PARTS.items():
+            workbook.writestr(name, content)
+        yield buffer.take()
+
+        with workbook.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + xlsx_row([label for field, label in EXPORT_COLUMNS])
+            ).encode())
+            for count, row in enumerate(export_rows(queryset), 1):
+                sheet.write(xlsx_row(row).encode())
+                if count % CHUNK_SIZE == 0:
+                    yield buffer.take()
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.take()
+
+
+STREAMS = {'csv': stream_csv, 'xlsx': stream_xlsx}
+
+
+def export_filename(fmt):
+    return f"registrations-{datetime.now():%Y%m%d-%H%M}.{fmt}"
+
+
+def export_response(queryset, fmt):
+    """Stream the export of ``queryset`` as a file download"""
+    response = StreamingHttpResponse(STREAMS[fmt](queryset), content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(fmt)}"'
+    return response
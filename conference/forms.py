@@ -27,6 +27,12 @@ class RegistrationForm(forms.ModelForm):
                                                         'rows': 3}),
         }
     
+    def __init__(self, *args, check_existing=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Off when registrations go to the journal, which checks duplicates
+        # itself without a round trip to the database
+        self.check_existing = check_existing
+    
     def clean(self):
         """Validate that email and email_confirm match"""
         cleaned_data = super().clean()
@@ -36,4 +42,10 @@ class RegistrationForm(forms.ModelForm):
         if email and email_confirm and email != email_confirm:
             self.add_error('email_confirm', "Email addresses do not match")
         
+        # One lookup on the unique normalized-email index
+        if email and self.check_existing and Registration.objects.filter(
+            email_normalized=Registration.normalize_email(email)
+        ).exists():
+            self.add_error('email', "This email address is already registered")
+        
         return cleaned_data 
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""Conditional GET support (ETag / Last-Modified) for the public pages.
+
+The public pages only change when an organizer edits speakers or the
+schedule, or a deploy changes the code. One query reads the latest
+``updated_at`` and the row count of ``Speaker``, ``Session`` and
+``ScheduleItem`` (counts catch deletions, which leave no timestamp
+behind), and the ETag is a hash of those and the build (see
+``conference.cache``). The result is cached per content version, so most
+requests answer ``If-None-Match``/``If-Modified-Since`` with a 304
+without touching the database at all.
+
+``Last-Modified`` is the time the public pages first saw the current
+ETag, kept in the cache: unlike the latest ``updated_at``, it also moves
+when a row is deleted or the site is deployed.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import condition
+
+from .cache import get_build_id, get_or_build, is_cacheable_request
+from .models import Speaker, Session, ScheduleItem
+from .replica import current_read_alias
+
+VALIDATED_MODELS = (Speaker, Session, ScheduleItem)
+
+
+def to_utc(value):
+    """Normalize what the database driver returns for a datetime column"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if value.tzinfo is None:
+        # Django stores UTC when USE_TZ is on
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return value
+
+
+LAST_ETAG_KEY = 'conference:last-etag'
+
+
+def read_content_state(using=DEFAULT_DB_ALIAS):
+    """Latest modification time of the public models, and an ETag of it, their row counts and the build"""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    columns = []
+    for model in VALIDATED_MODELS:
+        table = quote(model._meta.db_table)
+        columns.append(f"(SELECT MAX({quote('updated_at')}) FROM {table})")
+        columns.append(f"(SELECT COUNT(*) FROM {table})")
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(columns)}")
+        row = cursor.fetchone()
+
+    timestamps = [to_utc(value) for value in row[0::2]]
+    counts = row[1::2]
+    known = [value for value in timestamps if value is not None]
+    fingerprint = '|'.join(
+        [get_build_id()]
+        + [f"{timestamp.isoformat() if timestamp else '-'}:{count}" for timestamp, count in zip(timestamps, counts)]
+    )
+    return {
+        'last_modified': max(known) if known else datetime(2025, 1, 1, tzinfo=dt_timezone.utc),
+        'etag': hashlib.md5(fingerprint.encode()).hexdigest(),
+    }
+
+
+def etag_since(etag):
+    """
+    When the public pages got ``etag``, to the second.
+
+    Each new ETag gets a later time than the one before, even within the
+    same second (the resolution of ``If-Modified-Since``) or when going
+    back to an earlier ETag.
+    """
+    last = cache.get(LAST_ETAG_KEY)
+    if last and last[0] == etag:
+        return last[1]
+    since = timezone.now().replace(microsecond=0)
+    if last and since <= last[1]:
+        since = last[1] + timedelta(seconds=1)
+    cache.set(LAST_ETAG_KEY, (etag, since), timeout=None)
+    return since
+
+
+def build_content_state():
+    state = read_content_state(current_read_alias())
+    # The latest updated_at doesn't move when a row is deleted
+    state['last_modified'] = max(state['last_modified'], etag_since(state['etag']))
+    return state
+
+
+def content_state(request):
+    """Validators for the current content, computed once per request"""
+    if not hasattr(request, '_conference_content_state'):
+        request._conference_content_state = get_or_build('content-state', build_content_state)
+    return request._conference_content_state
+
+
+def content_etag(request, *args, **kwargs):
+    # Weak: the page is the same in every encoding, not the bytes
+    return f'W/"{content_state(request)["etag"]}"'
+
+
+def content_last_modified(request, *args, **kwargs):
+    return content_state(request)['last_modified']
+
+
+def conditional_public_page(view_func):
+    """
+    Answer conditional GETs from anonymous visitors with 304.
+
+    Browsers and the CDN may store the page but have to revalidate it on
+    every use, so an edit shows up on the next request.
+    """
+    conditional_view = condition(etag_func=content_etag, last_modified_func=content_last_modified)(view_func)
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return await view_func(request, *args, **kwargs)
+            # condition() calls the validator functions synchronously;
+            # load the state first so they find it on the request
+            await sync_to_async(content_state)(request)
+            response = await conditional_view(request, *args, **kwargs)
+            patch_cache_control(response, no_cache=True)
+            return response
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            return view_func(request, *args, **kwargs)
+        response = conditional_view(request, *args, **kwargs)
+        patch_cache_control(response, no_cache=True)
+        return response
+    return wrapper
@@ -0,0 +1,236 @@
+"""iCalendar feeds of the program, for attendees' calendar apps.
+
+Three kinds of feed: the whole conference, one day, and one speaker's
+talks. Each is built from the cached program data (the same the schedule
+page uses), serialized once per content version with its gzip variant and
+ETag like the JSON API, and stored in the cache. Calendar clients polling
+every few minutes cost a cache read and usually get a 304.
+
+``Session.date`` and the item times are conference local time; events are
+written with ``TZID`` set to the site's time zone (``Asia/Amman``) and a
+``VTIMEZONE`` describing the offsets in force around the conference dates.
+"""
+import datetime
+
+from django.http import Http404
+from django.utils import timezone
+from django.views.decorators.http import require_safe
+
+from .api import make_snapshot, serve_snapshot
+from .cache import get_or_build
+from .program import build_schedule
+
+CALENDAR_NAME = "KHCC Interventional Oncology Conference"
+VENUE = "Four Seasons Hotel, Amman"
+# Event UIDs must stay the same across rebuilds and hosts
+UID_DOMAIN = 'khcc-ioc.org'
+# Hint to clients that polling more often than this is pointless
+REFRESH_INTERVAL = 'PT1H'
+CONTENT_TYPE = 'text/calendar; charset=utf-8'
+
+
+def escape(text):
+    """Escape a TEXT value (RFC 5545 3.3.11)"""
+    return (
+        (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """Split a content line into chunks of at most 75 octets (RFC 5545 3.1)"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    chunks, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Don't cut a multi-byte character in half
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        chunks.append(encoded[start:end].decode('utf-8'))
+        # Continuation lines start with a space, which counts
+        start, limit = end, 74
+    return '\r\n '.join(chunks)
+
+
+def format_offset(offset):
+    seconds = int(offset.total_seconds())
+    sign = '+' if seconds >= 0 else '-'
+    hours, remainder = divmod(abs(seconds), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{sign}{hours:02d}{minutes:02d}" + (f"{seconds:02d}" if seconds else '')
+
+
+def local_time(value):
+    return value.strftime('%Y%m%dT%H%M%S')
+
+
+def utc_time(value):
+    return value.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def transitions(tz, start, end):
+    """UTC instants in [start, end) at which ``tz`` changes its offset"""
+    found = []
+    day = datetime.timedelta(days=1)
+    step = datetime.timedelta(minutes=15)
+    moment = start
+    while moment < end:
+        following = min(moment + day, end)
+        if moment.astimezone(tz).utcoffset() != following.astimezone(tz).utcoffset():
+            # Narrow the change down within the day
+            while moment < following:
+                if moment.astimezone(tz).utcoffset() != (moment + step).astimezone(tz).utcoffset():
+                    found.append(moment + step)
+                    break
+                moment += step
+        moment = following
+    return found
+
+
+def observance(tz, moment, offset_from):
+    """STANDARD or DAYLIGHT component for the offset starting at ``moment``"""
+    local = moment.astimezone(tz)
+    kind = 'DAYLIGHT' if local.dst() else 'STANDARD'
+    return [
+        f"BEGIN:{kind}",
+        # Onset in the wall time that was in force before it
+        f"DTSTART:{local_time((moment + offset_from).replace(tzinfo=None))}",
+        f"TZOFFSETFROM:{format_offset(offset_from)}",
+        f"TZOFFSETTO:{format_offset(local.utcoffset())}",
+        f"TZNAME:{local.tzname()}",
+        f"END:{kind}",
+    ]
+
+
+def vtimezone(tz, first_day, last_day):
+    """VTIMEZONE for ``tz`` covering the years of the given dates"""
+    start = datetime.datetime(first_day.year, 1, 1, tzinfo=datetime.timezone.utc)
+    end = datetime.datetime(last_day.year + 1, 1, 1, tzinfo=datetime.timezone.utc)
+    offset = start.astimezone(tz).utcoffset()
+    lines = ['BEGIN:VTIMEZONE', f"TZID:{tz.key}"]
+    lines += observance(tz, start, offset)
+    for moment in transitions(tz, start, end):
+        lines += observance(tz, moment, offset)
+        offset = moment.astimezone(tz).utcoffset()
+    lines.append('END:VTIMEZONE')
+    return lines
+
+
+def event(tz, date, session, item, stamp):
+    start = datetime.datetime.combine(date, item['start_time'])
+    end = datetime.datetime.combine(date, item['end_time'])
+    if end < start:
+        # Runs past midnight
+        end += datetime.timedelta(days=1)
+    speakers = ', '.join(speaker['name'] for speaker in item['speakers'])
+    description = '\n\n'.join(part for part in (speakers, item['description'], session['name']) if part)
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:scheduleitem-{item['id']}@{UID_DOMAIN}",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART;TZID={tz.key}:{local_time(start)}",
+        f"DTEND;TZID={tz.key}:{local_time(end)}",
+        f"SUMMARY:{escape(item['title'])}",
+        f"LOCATION:{escape(VENUE)}",
+        f"CATEGORIES:{escape(session['name'])}",
+    ]
+    if description:
+        lines.append(f"DESCRIPTION:{escape(description)}")
+    if item['is_break']:
+        # Breaks don't make the attendee look busy
+        lines.append('TRANSP:TRANSPARENT')
+    lines.append('END:VEVENT')
+    return lines
+
+
+def build_calendar(name, entries):
+    """
+    An iCalendar document for ``(date, session, item)`` entries.
+
+    Returns bytes with CRLF line endings, folded to 75 octets.
+    """
+    tz = timezone.get_default_timezone()
+    stamp = utc_time(timezone.now())
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f"PRODID:-//KHCC//{CALENDAR_NAME}//EN",
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f"X-WR-CALNAME:{escape(name)}",
+        f"X-WR-TIMEZONE:{tz.key}",
+        f"REFRESH-INTERVAL;VALUE=DURATION:{REFRESH_INTERVAL}",
+        f"X-PUBLISHED-TTL:{REFRESH_INTERVAL}",
+    ]
+    if entries:
+        dates = [date for date, session, item in entries]
+        lines += vtimezone(tz, min(dates), max(dates))
+    for date, session, item in entries:
+        lines += event(tz, date, session, item, stamp)
+    lines.append('END:VCALENDAR')
+    return ''.join(fold(line) + '\r\n' for line in lines).encode('utf-8')
+
+
+def program_entries(day=None, speaker_id=None):
+    """``(date, session, item)`` for every item, narrowed to a day or speaker"""
+    entries = []
+    for date_key, schedule_day in get_or_build('schedule', build_schedule).items():
+        if day is not None and date_key != day:
+            continue
+        for session in schedule_day['sessions']:
+            for item in session['items']:
+                if speaker_id is None or any(speaker['id'] == speaker_id for speaker in item['speakers']):
+                    entries.append((session['date'], session, item))
+    return entries
+
+
+def build_conference_feed():
+    return make_snapshot(build_calendar(CALENDAR_NAME, program_entries()))
+
+
+def build_day_feed(day):
+    entries = program_entries(day=day)
+    if not entries:
+        return None
+    label = entries[0][0].strftime('%A, %B %d, %Y')
+    return make_snapshot(build_calendar(f"{CALENDAR_NAME} – {label}", entries))
+
+
+def build_speaker_feed(speaker_id):
+    entries = program_entries(speaker_id=speaker_id)
+    if not entries:
+        return None
+    speaker = next(
+        speaker for date, session, item in entries for speaker in item['speakers'] if speaker['id'] == speaker_id
+    )
+    return make_snapshot(build_calendar(f"{CALENDAR_NAME} – {speaker['name']}", entries))
+
+
+def feed_response(request, snapshot):
+    if snapshot is None:
+        raise Http404("No such calendar")
+    return serve_snapshot(request, snapshot, CONTENT_TYPE)
+
+
+@require_safe
+def conference_ics(request):
+    """Every item of the program"""
+    return feed_response(request, get_or_build('ics:conference', build_conference_feed))
+
+
+@require_safe
+def day_ics(request, day):
+    """The items of one day, a ``date`` from the URL"""
+    day = day.isoformat()
+    # A day without items isn't cached (None), but only costs a cache read
+    return feed_response(request, get_or_build(f'ics:day:{day}', lambda: build_day_feed(day)))
+
+
+@require_safe
+def speaker_ics(request, speaker_id):
+    """The items a speaker appears in"""
+    return feed_response(
+        request, get_or_build(f'ics:speaker:{speaker_id}', lambda: build_speaker_feed(speaker_id))
+    )
@@ -0,0 +1,129 @@
+"""Resized derivatives of speaker photos.
+
+Originals uploaded through the admin can be several megabytes, while the
+site shows them as 35px avatars or card images. For every original we store
+a few fixed-width copies in WebP and JPEG next to it, with the EXIF
+orientation applied and all metadata dropped, and the templates pick one
+through ``srcset``/``sizes`` (see ``conference.templatetags.speaker_photos``).
+
+This module only depends on settings and the default storage, not on the
+models, so it can run in worker processes started by the backfill command:
+a spawned worker imports the module of the function it runs, and importing
+the models before ``django.setup()`` fails.
+"""
+import io
+import os
+import time
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Widths in pixels: 1x/2x avatars and 1x/2x speaker cards
+DERIVATIVE_WIDTHS = (80, 160, 400, 800)
+DERIVATIVE_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 6},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+DERIVATIVE_DIR = 'derivatives'
+
+
+def derivative_name(name, width, fmt):
+    """Storage name of one derivative of the original stored at ``name``"""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0] or filename
+    extension = 'jpg' if fmt == 'jpeg' else fmt
+    return os.path.join(directory, DERIVATIVE_DIR, f"{stem}-{width}w.{extension}")
+
+
+def derivative_names(name):
+    """All derivative storage names for the original stored at ``name``"""
+    return [
+        derivative_name(name, width, fmt)
+        for fmt in DERIVATIVE_FORMATS
+        for width in DERIVATIVE_WIDTHS
+    ]
+
+
+def has_derivatives(name, storage=None):
+    """Whether the largest derivative exists, i.e. generation completed"""
+    storage = storage or default_storage
+    return storage.exists(derivative_name(name, DERIVATIVE_WIDTHS[-1], 'jpeg'))
+
+
+def load_normalized(file):
+    """Open an image, apply its EXIF orientation and convert it to RGB"""
+    with Image.open(file) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # Flatten transparency onto white so JPEG output looks right
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            return background
+        return image.convert('RGB')
+
+
+def encode(image, fmt):
+    """Encode an image without carrying over any metadata"""
+    buffer = io.BytesIO()
+    image.save(buffer, **DERIVATIVE_FORMATS[fmt])
+    return buffer.getvalue()
+
+
+def resize_to_width(image, width):
+    """Scale down to ``width`` keeping the aspect ratio; never upscale"""
+    if image.width <= width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def generate_derivatives(name, storage=None, overwrite=True):
+    """
+    Create every derivative for the original stored at ``name``.
+
+    Returns a dict with the number of files written and the elapsed time.
+    Raises ``OSError`` if the original can't be read as an image.
+    """
+    storage = storage or default_storage
+    started = time.perf_counter()
+    with storage.open(name, 'rb') as original:
+        image = load_normalized(original)
+
+    written = 0
+    for width in DERIVATIVE_WIDTHS:
+        resized = resize_to_width(image, width)
+        for fmt in DERIVATIVE_FORMATS:
+            target = derivative_name(name, width, fmt)
+            if storage.exists(target):
+                if not overwrite:
+                    continue
+                storage.delete(target)
+            storage.save(target, ContentFile(encode(resized, fmt)))
+            written += 1
+    return {'name': name, 'written': written, 'seconds': time.perf_counter() - started}
+
+
+def process_photo(name, overwrite):
+    """Worker entry point of ``generate_photo_derivatives``; returns the result or the error message"""
+    try:
+        return generate_derivatives(name, overwrite=overwrite)
+    except OSError as exc:
+        return {'name': name, 'error': str(exc)}
+
+
+def delete_derivatives(name, storage=None):
+    """Remove every derivative of the original stored at ``name``"""
+    storage = storage or default_storage
+    for target in derivative_names(name):
+        if storage.exists(target):
+            storage.delete(target)
+
+
+def srcset(name, fmt):
+    """``srcset`` attribute value for the derivatives of ``name``"""
+    return ', '.join(
+        f"{default_storage.url(derivative_name(name, width, fmt))} {width}w"
+        for width in DERIVATIVE_WIDTHS
+    )
@@ -0,0 +1,229 @@
+"""Local journal that absorbs registration bursts.
+
+With ``settings.CONFERENCE_REGISTRATION_JOURNAL`` set to a file path, the
+registration view validates the form and appends the registration to a
+SQLite journal on local disk (fsynced, so an accepted registration
+survives a crash) instead of writing to the remote database. The
+``flush_registrations`` command moves pending entries to the database in
+batches with one ``bulk_create`` per batch, queueing the emails and
+counting the registrations (``conference.rollups``) in the same
+transaction.
+
+Each entry carries a token that is stored on the ``Registration`` it
+becomes, under a unique constraint. If a flush dies after the database
+commit but before the journal is updated, the next flush finds the
+tokens already in the database and only marks the entries as flushed,
+so every entry is inserted exactly once.
+
+Duplicate emails are rejected in the request against the journal, and
+again during the flush against the rest of the batch and the database.
+"""
+from contextlib import closing
+import json
+import logging
+import sqlite3
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import rollups
+from .mail import registration_emails
+from .models import OutgoingEmail, Registration
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+FLUSHED = 'flushed'
+DUPLICATE = 'duplicate'
+
+DEFAULT_BATCH_SIZE = 500
+# Form fields stored in the journal
+FIELDS = (
+    'full_name', 'email', 'phone', 'institution', 'country', 'attendee_type', 'special_requirements',
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS registrations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    token TEXT NOT NULL UNIQUE,
+    email_normalized TEXT NOT NULL,
+    data TEXT NOT NULL,
+    received_at TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    registration_id INTEGER,
+    processed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS registrations_status ON registrations (status, id);
+CREATE INDEX IF NOT EXISTS registrations_email ON registrations (email_normalized);
+"""
+
+
+class DuplicateRegistration(Exception):
+    """The email address already has a registration in the journal"""
+
+
+def get_journal_path():
+    return getattr(settings, 'CONFERENCE_REGISTRATION_JOURNAL', None)
+
+
+def is_enabled():
+    return bool(get_journal_path())
+
+
+def connect(path=None):
+    db = sqlite3.connect(path or get_journal_path(), timeout=30, isolation_level=None)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA journal_mode=WAL")
+    # Fsync every commit: "accepted" must mean on disk
+    db.execute("PRAGMA synchronous=FULL")
+    db.executescript(SCHEMA)
+    return db
+
+
+def append(cleaned_data, path=None):
+    """Journal a validated registration and return its token"""
+    email = Registration.normalize_email(cleaned_data['email'])
+    data = {field: cleaned_data.get(field) or '' for field in FIELDS}
+    token = str(uuid.uuid4())
+    with closing(connect(path)) as db:
+        # Take the write lock before the duplicate check, so two workers
+        # can't both accept the same address
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            taken = db.execute(
+                "SELECT 1 FROM registrations WHERE email_normalized = ? AND status != ?",
+                (email, DUPLICATE),
+            ).fetchone()
+            if taken:
+                raise DuplicateRegistration(email)
+            db.execute(
+                "INSERT INTO registrations (token, email_normalized, data, received_at) VALUES (?, ?, ?, ?)",
+                (token, email, json.dumps(data), timezone.now().isoformat()),
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+    return token
+
+
+def pending(db, limit):
+    return db.execute(
+        "SELECT id, token, email_normalized, data, received_at FROM registrations "
+        "WHERE status = ? ORDER BY id LIMIT ?",
+        (PENDING, limit),
+    ).fetchall()
+
+
+def mark(db, outcomes):
+    """Record ``{token: (status, registration_id)}`` in one transaction"""
+    now = timezone.now().isoformat()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        db.executemany(
+            "UPDATE registrations SET status = ?, registration_id = ?, processed_at = ? WHERE token = ?",
+            [(status, registration_id, now, token) for token, (status, registration_id) in outcomes.items()],
+        )
+        db.execute("COMMIT")
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+
+
+def build_registration(entry):
+    return Registration(
+        email_normalized=entry['email_normalized'],
+        journal_token=uuid.UUID(entry['token']),
+        created_at=parse_datetime(entry['received_at']),
+        **json.loads(entry['data'])
+    )
+
+
+def insert(registrations):
+    """Insert registrations and queue their emails in one transaction"""
+    with transaction.atomic():
+        Registration.objects.bulk_create(registrations)
+        rollups.record(registrations)
+        OutgoingEmail.objects.bulk_create(
+            [message for registration in registrations for message in registration_emails(registration)]
+        )
+
+
+def insert_one_by_one(registrations):
+    """Fallback for a batch that hit a constraint: isolate the offender"""
+    for registration in registrations:
+        try:
+            insert([registration])
+        except IntegrityError:
+            # Flushed by a concurrent flusher, or the address was taken
+            # through the admin; the outcome is read back from the database
+            pass
+
+
+def flush_batch(db, batch_size=DEFAULT_BATCH_SIZE):
+    """Move one batch of pending entries to the database; returns (flushed, duplicates)"""
+    entries = pending(db, batch_size)
+    if not entries:
+        return 0, 0
+
+    tokens = [uuid.UUID(entry['token']) for entry in entries]
+    # Entries inserted by an earlier flush that died before marking them
+    done = dict(Registration.objects.filter(journal_token__in=tokens).order_by().values_list('journal_token', 'id'))
+    emails = {entry['email_normalized'] for entry in entries}
+    taken = set(
+        Registration.objects.filter(email_normalized__in=emails).order_by()
+        .values_list('email_normalized', flat=True)
+    )
+
+    outcomes, new = {}, []
+    for entry in entries:
+        token = uuid.UUID(entry['token'])
+        if token in done:
+            outcomes[entry['token']] = (FLUSHED, done[token])
+        elif entry['email_normalized'] in taken:
+            outcomes[entry['token']] = (DUPLICATE, None)
+        else:
+            # Later entries in the batch with the same address are duplicates
+            taken.add(entry['email_normalized'])
+            new.append(build_registration(entry))
+
+    if new:
+        try:
+            insert(new)
+        except IntegrityError:
+            insert_one_by_one(new)
+        inserted = dict(
+            Registration.objects.filter(journal_token__in=[r.journal_token for r in new]).order_by()
+            .values_list('journal_token', 'id')
+        )
+        for registration in new:
+            token = registration.journal_token
+            outcomes[str(token)] = (FLUSHED, inserted[token]) if token in inserted else (DUPLICATE, None)
+
+    mark(db, outcomes)
+    flushed = sum(1 for status, registration_id in outcomes.values() if status == FLUSHED)
+    duplicates = len(outcomes) - flushed
+    if duplicates:
+        logger.info("Skipped %d duplicate registrations from the journal", duplicates)
+    return flushed, duplicates
+
+
+def flush(batch_size=DEFAULT_BATCH_SIZE, path=None):
+    """Flush every pending entry; returns (flushed, duplicates)"""
+    total_flushed = total_duplicates = 0
+    with closing(connect(path)) as db:
+        while True:
+            flushed, duplicates = flush_batch(db, batch_size)
+            if not flushed and not duplicates:
+                return total_flushed, total_duplicates
+            total_flushed += flushed
+            total_duplicates += duplicates
+
+
+def counts(path=None):
+    """Number of journal entries per status"""
+    with closing(connect(path)) as db:
+        return dict(db.execute("SELECT status, COUNT(*) FROM registrations GROUP BY status").fetchall())
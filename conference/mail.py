@@ -0,0 +1,222 @@
+"""Transactional email outbox.
+
+Requests never talk to the SMTP server. They call ``queue_email`` inside
+their own transaction, so the outbox row is committed (or rolled back)
+together with the data it describes, and the ``send_queued_emails``
+management command delivers due messages in batches over one SMTP
+connection, retrying failures with exponential backoff.
+
+A sender claims a batch in a short transaction that moves the messages'
+``next_attempt_at`` past ``CLAIM_TIMEOUT``, so other senders skip them
+without a lock being held during the SMTP session. Each message's outcome
+is then saved on its own as soon as it is known. If the sender dies, the
+messages it had not got to yet become due again when the claim runs out.
+"""
+from datetime import timedelta
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+ADMIN_NOTIFICATION_EMAIL = 'khcc.ioc2025@gmail.com'
+REGISTRATION_FROM_EMAIL = 'noreply@example.com'
+CONFERENCE_DATE = 'April 18-19, 2025'
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_ATTEMPTS = 5
+# First retry after a minute, doubling up to six hours
+RETRY_BASE_DELAY = timedelta(minutes=1)
+RETRY_MAX_DELAY = timedelta(hours=6)
+# How long a claimed batch is left to its sender
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def outgoing_email(subject, body, recipients, from_email=None, html_body=''):
+    """An unsaved outbox message, for queueing many with ``bulk_create``"""
+    return OutgoingEmail(
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients='\n'.join(recipients),
+    )
+
+
+def queue_email(subject, body, recipients, from_email=None, html_body=''):
+    """Add a message to the outbox; it is sent once the transaction commits"""
+    message = outgoing_email(subject, body, recipients, from_email, html_body)
+    message.save()
+    return message
+
+
+def registration_emails(registration):
+    """
+    The applicant confirmation and the organizer notification, unsaved.
+
+    The text bodies are built here; the HTML alternatives are rendered from
+    ``templates/emails``.
+    """
+    confirmation = outgoing_email(
+        'KHCC IOC 2025 Conference Registration Confirmation',
+        f'''Dear {registration.full_name},
+
+Thank you for registering for the KHCC International Oncology Conference 2025. Your registration has been successfully processed and we're delighted you'll be joining us.
+
+Registration Details:
+- Name: {registration.full_name}
+- Email: {registration.email}
+- Institution: {registration.institution}
+- Country: {registration.country}
+- Attendee Type: {registration.get_attendee_type_display()}
+
+What's Next:
+- You will receive additional information about the conference schedule closer to the event date
+- If you have any questions, please contact us at khcc.ioc2025@gmail.com
+
+We look forward to seeing you at the conference!
+
+Warm regards,
+The KHCC IOC 2025 Conference Team''',
+        [registration.email],
+        from_email=REGISTRATION_FROM_EMAIL,
+        html_body=render_to_string('emails/registration_confirmation.html', {
+            'participant': registration,
+            'conference_date': CONFERENCE_DATE,
+        }),
+    )
+    notification = outgoing_email(
+        'New KHCC IOC 2025 Conference Registration',
+        f'''A new registration has been submitted for the KHCC IOC 2025 Conference.
+
+Registration Details:
+- Name: {registration.full_name}
+- Email: {registration.email}
+- Phone: {registration.phone or "Not provided"}
+- Institution: {registration.institution}
+- Country: {registration.country}
+- Attendee Type: {registration.get_attendee_type_display()}
+- Special Requirements: {registration.special_requirements or "None"}
+- Submitted on: {registration.created_at.strftime("%Y-%m-%d %H:%M")}
+
+Please review this registration in the admin panel.''',
+        [ADMIN_NOTIFICATION_EMAIL],
+        from_email=REGISTRATION_FROM_EMAIL,
+        html_body=render_to_string('emails/admin_notification.html', {
+            'participant': registration,
+            'registration_time': registration.created_at.strftime("%Y-%m-%d %H:%M"),
+        }),
+    )
+    return [confirmation, notification]
+
+
+def queue_registration_emails(registration):
+    """Queue the applicant confirmation and the organizer notification"""
+    OutgoingEmail.objects.bulk_create(registration_emails(registration))
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt after ``attempts`` failures"""
+    return min(RETRY_BASE_DELAY * (2 ** (attempts - 1)), RETRY_MAX_DELAY)
+
+
+def build_message(email, connection):
+    message = EmailMultiAlternatives(
+        email.subject, email.body, email.from_email, email.recipient_list,
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def claim_batch(batch_size):
+    """Claim the next due pending messages, so concurrent senders skip them"""
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.STATUS_PENDING, next_attempt_at__lte=timezone.now())
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if batch:
+            claimed_until = timezone.now() + CLAIM_TIMEOUT
+            OutgoingEmail.objects.filter(pk__in=[email.pk for email in batch]).update(next_attempt_at=claimed_until)
+    return batch
+
+
+def record_failure(email, error, max_attempts):
+    """Reschedule a message after a failed attempt, or give up on it"""
+    logger.warning("Sending outbox message %s failed: %s", email.id, error)
+    email.last_error = str(error)
+    if email.attempts >= max_attempts:
+        email.status = OutgoingEmail.STATUS_FAILED
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=['attempts', 'status', 'next_attempt_at', 'last_error'])
+
+
+def connect(connection):
+    """Open ``connection``, logging a failure instead of raising; returns whether it opened"""
+    try:
+        connection.open()
+    except Exception as exc:
+        # The next message tries to connect again on its own
+        logger.warning("Connecting to the mail server failed: %s", exc)
+        return False
+    return True
+
+
+def reopen(connection):
+    """Replace a connection an error may have broken"""
+    connection.close()
+    return connect(connection)
+
+
+def send_pending(batch_size=DEFAULT_BATCH_SIZE, max_attempts=DEFAULT_MAX_ATTEMPTS, connection=None):
+    """
+    Deliver one batch of due messages over a single SMTP connection.
+
+    Returns a ``(sent, failed)`` tuple of counts. Messages that fail are
+    rescheduled with exponential backoff and marked as failed for good once
+    they have been tried ``max_attempts`` times. Failing to connect counts
+    as a failed attempt for every message of the batch.
+    """
+    connection = connection or get_connection()
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    try:
+        connection.open()
+    except Exception as exc:
+        for email in batch:
+            email.attempts += 1
+            record_failure(email, exc, max_attempts)
+        return 0, len(batch)
+
+    sent = failed = 0
+    try:
+        for email in batch:
+            email.attempts += 1
+            try:
+                build_message(email, connection).send()
+            except Exception as exc:
+                failed += 1
+                record_failure(email, exc, max_attempts)
+                # A closed connection would be opened and closed per message
+                reopen(connection)
+            else:
+                sent += 1
+                email.status = OutgoingEmail.STATUS_SENT
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                email.save(update_fields=['attempts', 'status', 'sent_at', 'last_error'])
+    finally:
+        connection.close()
+    return sent, failed
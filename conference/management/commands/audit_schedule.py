@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from conference.conflicts import SESSION_OVERLAP, audit
+
+
+class Command(BaseCommand):
+    help = "List overlapping items within sessions and speakers booked twice at the same time"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fail-on-conflicts', action='store_true',
+            help="Exit with an error if anything is found, e.g. in CI or before publishing",
+        )
+
+    def handle(self, *args, **options):
+        conflicts = audit()
+        overlaps = sum(1 for conflict in conflicts if conflict.kind == SESSION_OVERLAP)
+        for conflict in conflicts:
+            self.stdout.write(f"  [{conflict.kind}] {conflict.message}")
+        summary = f"{overlaps} overlapping items, {len(conflicts) - overlaps} speaker conflicts"
+        if not conflicts:
+            self.stdout.write(self.style.SUCCESS("No conflicts in the program"))
+        elif options['fail_on_conflicts']:
+            raise CommandError(summary)
+        else:
+            self.stdout.write(self.style.WARNING(summary))
@@ -0,0 +1,71 @@
+import datetime
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from conference.benchmark import SCENARIO_NAMES, SCENARIOS, Benchmark, load_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure latency, queries and peak memory of the public pages, the "
+        "registration form and the admin changelists, and save them as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--scenario', action='append', choices=SCENARIO_NAMES,
+            help="Only run this scenario (repeatable)",
+        )
+        parser.add_argument(
+            '--output', '-o',
+            help="JSON file for the results; defaults to benchmark-results/<timestamp>.json",
+        )
+        parser.add_argument('--compare', help="Earlier results file to print the change against")
+        parser.add_argument(
+            '--allow-any-database', action='store_true',
+            help="Run even if the database is not SQLite (the registration scenario writes to it)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite' and not options['allow_any_database']:
+            raise CommandError(
+                "The benchmark creates registrations; run it against a SQLite database, e.g. "
+                "with --settings=khcc_conference.settings_benchmark"
+            )
+        if options['iterations'] < 1:
+            raise CommandError("--iterations must be at least 1")
+        previous = load_results(options['compare']) if options['compare'] else {}
+        scenarios = [s for s in SCENARIOS if not options['scenario'] or s.name in options['scenario']]
+
+        self.stdout.write(
+            f"{'scenario':22} {'mode':5} {'p50 ms':>9} {'p95 ms':>9} {'queries':>7} {'peak KB':>9}"
+        )
+
+        def progress(result):
+            line = (
+                f"{result['scenario']:22} {result['mode']:5} {result['p50_ms']:9.2f} "
+                f"{result['p95_ms']:9.2f} {result['queries']:7} {result['peak_memory_kb']:9.1f}"
+            )
+            before = previous.get((result['scenario'], result['mode']))
+            if before and before['p50_ms']:
+                change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+                line += f"  p50 {change:+.0f}%, queries {before['queries']} -> {result['queries']}"
+            if result['errors']:
+                line += self.style.ERROR(f"  {result['errors']} unexpected responses")
+            self.stdout.write(line)
+
+        report = Benchmark(scenarios, options['iterations'], options['warmup']).run(progress)
+
+        output = options['output'] or os.path.join(
+            'benchmark-results', f"{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+        )
+        if os.path.dirname(output):
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {output}"))
@@ -0,0 +1,58 @@
+import datetime
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from conference.benchmark import CONCURRENCY_PAGES, compare_concurrency
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of the sync views behind WSGI workers with the "
+        "async views on one event loop, under simulated database latency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', action='append', choices=CONCURRENCY_PAGES, help="Repeatable")
+        parser.add_argument('--concurrency', type=int, default=32, help="Simultaneous clients")
+        parser.add_argument('--requests', type=int, default=320, help="Requests per page and mode")
+        parser.add_argument('--workers', type=int, default=4, help="Sync WSGI workers to compare against")
+        parser.add_argument('--latency-ms', type=float, default=20, help="Delay added to every query")
+        parser.add_argument(
+            '--output', '-o',
+            help="JSON file for the results; defaults to benchmark-results/concurrency-<timestamp>.json",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError("Clients run in several threads; use a SQLite file, not an in-memory database")
+        if min(options['concurrency'], options['requests'], options['workers']) < 1:
+            raise CommandError("--concurrency, --requests and --workers must be at least 1")
+
+        report = compare_concurrency(
+            pages=options['page'] or CONCURRENCY_PAGES,
+            concurrency=options['concurrency'],
+            requests=options['requests'],
+            workers=options['workers'],
+            latency_ms=options['latency_ms'],
+        )
+        self.stdout.write(f"{'page':10} {'mode':18} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9}")
+        for result in report['results']:
+            line = (
+                f"{result['scenario']:10} {result['mode']:18} {result['requests_per_second']:8.1f} "
+                f"{result['p50_ms']:9.1f} {result['p95_ms']:9.1f}"
+            )
+            if result['errors']:
+                line += self.style.ERROR(f"  {result['errors']} errors")
+            self.stdout.write(line)
+
+        output = options['output'] or os.path.join(
+            'benchmark-results', f"concurrency-{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+        )
+        if os.path.dirname(output):
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {output}"))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from conference import cleanup
+
+
+class Command(BaseCommand):
+    help = (
+        "Find byte-identical copies of speaker photos and files no speaker uses; "
+        "with --delete, merge the copies and delete the unused files"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete', action='store_true', help="Make the changes; by default only report them")
+        parser.add_argument(
+            '--min-age', type=int, default=cleanup.MIN_AGE // 60,
+            help="Leave unused files younger than this many minutes (default %(default)s)",
+        )
+        parser.add_argument('--folder', default=cleanup.PHOTO_FOLDER, help="Folder of the media root to check")
+
+    def handle(self, *args, **options):
+        plan = cleanup.plan(options['folder'], min_age=options['min_age'] * 60)
+        for keep, copies in plan.duplicates:
+            self.stdout.write(f"Same as {keep.name}: {', '.join(copy.name for copy in copies)}")
+        for name, target in sorted(plan.moves.items()):
+            self.stdout.write(f"  speakers using {name} -> {target}")
+        for orphan in plan.orphans:
+            self.stdout.write(f"Unused: {orphan.name} ({filesizeformat(orphan.size)})")
+
+        size = sum(orphan.size for orphan in plan.orphans)
+        summary = (
+            f"{len(plan.files)} files, {sum(len(copies) for keep, copies in plan.duplicates)} duplicates, "
+            f"{len(plan.orphans)} unused files ({filesizeformat(size)})"
+        )
+        if not options['delete']:
+            self.stdout.write(summary + ". Run with --delete to reclaim the space.")
+            return
+        freed = cleanup.apply(plan)
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary}. Moved {len(plan.moves)} photos and freed {filesizeformat(freed)}."
+        ))
@@ -0,0 +1,57 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from conference.exports import STREAMS, filter_registrations
+from conference.models import Registration
+
+
+def date_argument(value):
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = "Export registrations as CSV or XLSX, streaming rows in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(STREAMS), default='csv')
+        parser.add_argument(
+            '--output', '-o',
+            help="File to write; defaults to standard output",
+        )
+        parser.add_argument(
+            '--attendee-type', choices=[value for value, label in Registration.ATTENDEE_TYPES],
+        )
+        parser.add_argument(
+            '--since', type=date_argument,
+            help="Only registrations created on or after this date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            '--until', type=date_argument,
+            help="Only registrations created before this date (YYYY-MM-DD)",
+        )
+
+    def handle(self, *args, **options):
+        if options['format'] == 'xlsx' and not options['output']:
+            raise CommandError("XLSX exports need --output")
+
+        queryset = filter_registrations(
+            attendee_type=options['attendee_type'],
+            since=options['since'],
+            until=options['until'],
+        )
+        stream = STREAMS[options['format']](queryset)
+
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in stream:
+                    output.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            for chunk in stream:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.flush()
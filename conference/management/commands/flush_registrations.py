@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from conference import journal
+
+
+class Command(BaseCommand):
+    help = "Write registrations accepted into the local journal to the database in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=journal.DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep running and poll the journal instead of exiting when it is empty",
+        )
+        parser.add_argument(
+            '--interval', type=float, default=2.0,
+            help="Seconds to wait between polls of an empty journal (with --loop)",
+        )
+
+    def handle(self, *args, **options):
+        if not journal.is_enabled():
+            raise CommandError("settings.CONFERENCE_REGISTRATION_JOURNAL is not set")
+
+        total_flushed = total_duplicates = 0
+        while True:
+            try:
+                flushed, duplicates = journal.flush(options['batch_size'])
+            except Exception as exc:
+                # Typically the database being unreachable; the entries stay
+                # pending in the journal and are retried
+                self.stderr.write(f"Could not flush registrations: {exc}")
+                if not options['loop']:
+                    raise
+                time.sleep(options['interval'])
+                continue
+
+            total_flushed += flushed
+            total_duplicates += duplicates
+            if flushed or duplicates:
+                self.stdout.write(f"Flushed {flushed}, skipped {duplicates} duplicates")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Journal drained: {total_flushed} flushed, {total_duplicates} duplicates"
+        ))
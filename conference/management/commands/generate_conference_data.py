@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from conference.synthetic import generate
+
+SCALES = {
+    'small': {'speakers': 30, 'days': 2, 'sessions_per_day': 4, 'items_per_session': 6,
+              'registrations': 1000, 'photos': 10},
+    'medium': {'speakers': 100, 'days': 3, 'sessions_per_day': 8, 'items_per_session': 10,
+               'registrations': 20000, 'photos': 20},
+    'large': {'speakers': 300, 'days': 4, 'sessions_per_day': 12, 'items_per_session': 60,
+              'registrations': 300000, 'photos': 40},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Replace all speakers, sessions, schedule items and registrations with "
+        "synthetic data, for load testing (see the benchmark command)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='medium')
+        for option in SCALES['medium']:
+            parser.add_argument(
+                f"--{option.replace('_', '-')}", type=int,
+                help=f"Override the scale's number of {option.replace('_', ' ')}",
+            )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--allow-any-database', action='store_true',
+            help="Run even if the database is not SQLite (this deletes its conference data)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite' and not options['allow_any_database']:
+            raise CommandError(
+                "This deletes all conference data; run it against a SQLite database, e.g. "
+                "with --settings=khcc_conference.settings_benchmark"
+            )
+        sizes = dict(SCALES[options['scale']])
+        for option in sizes:
+            if options[option] is not None:
+                sizes[option] = options[option]
+
+        counts = generate(seed=options['seed'], **sizes)
+        self.stdout.write(self.style.SUCCESS(
+            "Created " + ', '.join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items())
+        ))
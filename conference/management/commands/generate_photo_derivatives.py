@@ -0,0 +1,54 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+
+import django
+from django.core.management.base import BaseCommand
+
+from conference.cache import bump_content_version
+from conference.images import has_derivatives, process_photo
+from conference.models import Speaker
+
+
+class Command(BaseCommand):
+    help = "Create resized WebP/JPEG derivatives for existing speaker photos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Number of worker processes (default: number of CPUs)",
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Regenerate derivatives that already exist",
+        )
+
+    def handle(self, *args, **options):
+        names = sorted(set(
+            Speaker.objects.exclude(photo='').exclude(photo__isnull=True)
+            .values_list('photo', flat=True)
+        ))
+        if not options['force']:
+            names = [name for name in names if not has_derivatives(name)]
+        if not names:
+            self.stdout.write("All speaker photos already have derivatives.")
+            return
+
+        self.stdout.write(f"Processing {len(names)} photos with {options['workers']} workers...")
+        failures = 0
+        # Workers started with spawn (Windows, macOS) begin without Django set up
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as executor:
+            futures = [executor.submit(process_photo, name, options['force']) for name in names]
+            for future in as_completed(futures):
+                result = future.result()
+                if 'error' in result:
+                    failures += 1
+                    self.stderr.write(f"  {result['name']}: {result['error']}")
+                else:
+                    self.stdout.write(
+                        f"  {result['name']}: {result['written']} files in {result['seconds']:.2f}s"
+                    )
+
+        # Cached pages still point at the originals
+        bump_content_version()
+        message = f"Done: {len(names) - failures} processed, {failures} failed."
+        self.stdout.write(self.style.SUCCESS(message) if not failures else self.style.WARNING(message))
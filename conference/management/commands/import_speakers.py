@@ -0,0 +1,150 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from conference.cache import bump_content_version
+from conference.models import Speaker
+from conference.speaker_import import (
+    DEFAULT_EXCLUDES, group_files, load_manifest, name_tokens, process_file,
+    scan_folder, significant, tokens_match,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update speakers from a folder of photos and CV/bio files, "
+        "optionally described by a JSON/CSV manifest"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('folder', help="Folder holding the speaker files, e.g. website_material")
+        parser.add_argument(
+            '--manifest',
+            help="JSON or CSV file listing the speakers (name, title, institution, order, photo, bio)",
+        )
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            '--exclude', action='append', default=list(DEFAULT_EXCLUDES),
+            help="Filename pattern to ignore (repeatable)",
+        )
+        parser.add_argument(
+            '--overwrite', action='store_true',
+            help="Replace photos and bios that speakers already have",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Show the matches without importing")
+
+    def handle(self, *args, **options):
+        folder = options['folder']
+        if not os.path.isdir(folder):
+            raise CommandError(f"{folder} is not a folder")
+
+        manifest = load_manifest(options['manifest'], folder) if options['manifest'] else []
+        groups = group_files(scan_folder(folder, options['exclude']), manifest)
+        if manifest:
+            # Only the listed speakers are imported
+            skipped = [f.filename for group in groups[len(manifest):] for f in group.files]
+            groups = groups[:len(manifest)]
+            for filename in skipped:
+                self.stdout.write(f"  skipped (no speaker in manifest): {filename}")
+
+        for group in groups:
+            self.stdout.write(
+                f"{group.name}: photo={group.photo.filename if group.photo else '-'} "
+                f"bio={group.bio.filename if group.bio else '-'}"
+            )
+        if options['dry_run']:
+            return
+
+        results = self.process_files(groups, options['workers'])
+        created, updated = self.upsert(groups, results, options['overwrite'])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} and updated {updated} speakers."))
+
+    def process_files(self, groups, workers):
+        """Normalize photos and read bios in a process pool"""
+        tasks = {}
+        for group in groups:
+            if group.photo:
+                tasks[group.photo.path] = 'photo'
+            if group.bio:
+                tasks[group.bio.path] = 'bio'
+
+        started = time.perf_counter()
+        results = {}
+        # Workers started with spawn (Windows, macOS) begin without Django set up
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+            paths = list(tasks)
+            kinds = [tasks[path] for path in paths]
+            for kind, path, result, error, seconds in executor.map(process_file, kinds, paths):
+                filename = os.path.basename(path)
+                if error:
+                    self.stderr.write(f"  {kind:5} {filename}: failed after {seconds:.2f}s ({error})")
+                else:
+                    self.stdout.write(f"  {kind:5} {filename}: {seconds:.2f}s")
+                    results[path] = result
+        self.stdout.write(f"Processed {len(tasks)} files in {time.perf_counter() - started:.2f}s")
+        return results
+
+    def upsert(self, groups, results, overwrite):
+        """Create and update all speakers in one transaction"""
+        existing = list(Speaker.objects.all())
+        next_order = (Speaker.objects.aggregate(Max('order'))['order__max'] or 0) + 1
+        to_create, to_update = [], {}
+        update_fields = set()
+
+        for group in groups:
+            speaker = self.find_speaker(group, existing)
+            is_new = speaker is None
+            if is_new:
+                speaker = Speaker(name=group.name, bio='', order=next_order)
+                next_order += 1
+
+            changes = dict(group.fields)
+            photo = results.get(group.photo.path) if group.photo else None
+            if photo and (overwrite or not speaker.photo):
+                changes['photo'] = photo
+            bio = results.get(group.bio.path) if group.bio else None
+            if bio and (overwrite or not speaker.bio):
+                changes['bio'] = bio
+
+            for field, value in changes.items():
+                if getattr(speaker, field) != value:
+                    setattr(speaker, field, value)
+                    if not is_new:
+                        update_fields.add(field)
+                        to_update[speaker.pk] = speaker
+
+            if is_new:
+                to_create.append(speaker)
+                existing.append(speaker)
+
+        with transaction.atomic():
+            Speaker.objects.bulk_create(to_create)
+            if to_update:
+                # bulk_update skips auto_now; the validators and the search
+                # index find changed speakers by updated_at
+                now = timezone.now()
+                for speaker in to_update.values():
+                    speaker.updated_at = now
+                Speaker.objects.bulk_update(list(to_update.values()), sorted(update_fields | {'updated_at'}))
+            if to_create or to_update:
+                # Bulk operations send no model signals
+                transaction.on_commit(bump_content_version)
+        return len(to_create), len(to_update)
+
+    def find_speaker(self, group, speakers):
+        """Existing speaker with the same name, or sharing name tokens"""
+        name = group.name.strip().lower()
+        for speaker in speakers:
+            if speaker.name.strip().lower() == name:
+                return speaker
+        tokens = significant(group.tokens)
+        for speaker in speakers:
+            if tokens_match(tokens, significant(name_tokens(speaker.name))):
+                return speaker
+        return None
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from conference.prerender import get_prerender_root, is_enabled, prerender_pages
+
+
+class Command(BaseCommand):
+    help = "Render the public pages to compressed HTML files for pre-render mode"
+
+    def handle(self, *args, **options):
+        manifest = prerender_pages()
+        for path, page in manifest['pages'].items():
+            self.stdout.write(f"  {path} -> {page['file']} ({', '.join(page['encodings'])})")
+        self.stdout.write(self.style.SUCCESS(
+            f"Pre-rendered {len(manifest['pages'])} pages to {get_prerender_root()}"
+        ))
+        if not is_enabled():
+            self.stdout.write("CONFERENCE_PRERENDER is off, so the files are not served yet.")
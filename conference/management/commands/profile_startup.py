@@ -0,0 +1,62 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from conference.benchmark import request_host
+from conference.warmup import profile_startup
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the application in a new interpreter and report the import time "
+        "per module, the warm-up steps and the time to the first response"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/', help="Page requested first (default /)")
+        parser.add_argument('--top', type=int, default=15, help="Number of modules and packages to list")
+        parser.add_argument('--no-warmup', action='store_true', help="Start without the warm-up, to compare")
+        parser.add_argument(
+            '--application',
+            help="Dotted path of the WSGI callable; defaults to settings.WSGI_APPLICATION",
+        )
+        parser.add_argument('--output', '-o', help="Also save the report as JSON")
+
+    def handle(self, *args, **options):
+        try:
+            report = profile_startup(
+                path=options['path'],
+                host=request_host(),
+                warmup=not options['no_warmup'],
+                application=options['application'],
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        top = options['top']
+        self.stdout.write(f"Slowest imports (cumulative) of {report['application']}:")
+        for name, self_us, cumulative_us in sorted(report['modules'], key=lambda m: -m[2])[:top]:
+            self.stdout.write(f"  {cumulative_us / 1000:9.1f}ms  {name}")
+        self.stdout.write("Import time per package:")
+        for package, self_us in sorted(report['packages'].items(), key=lambda p: -p[1])[:top]:
+            self.stdout.write(f"  {self_us / 1000:9.1f}ms  {package}")
+
+        warmup = report['warmup']
+        if warmup:
+            self.stdout.write("Warm-up: " + ', '.join(f"{key[:-3]} {value:.0f}ms" for key, value in warmup.items()))
+        else:
+            self.stdout.write("Warm-up: off")
+        self.stdout.write(f"Interpreter start        {report['interpreter_ms']:9.1f}ms")
+        self.stdout.write(
+            f"Application import       {report['import_ms']:9.1f}ms" + ("  (includes the warm-up)" if warmup else "")
+        )
+        self.stdout.write(f"First request {report['path']:10} {report['first_request_ms']:9.1f}ms  ({report['status']})")
+        self.stdout.write(f"Second request           {report['second_request_ms']:9.1f}ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"Time to first response   {report['time_to_first_response_ms']:9.1f}ms"
+        ))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
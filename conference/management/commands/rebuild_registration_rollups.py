@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from conference.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the registration rollups behind the admin dashboard from the registrations. "
+        "Run once to backfill; saves keep them up to date afterwards."
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} rollup rows"))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from conference.announcements import DEFAULT_BATCH_SIZE, delivery_counts, queue, send_announcement
+from conference.models import Announcement
+
+
+class Command(BaseCommand):
+    help = (
+        "Email announcements to registrants over one SMTP connection, throttled. "
+        "Safe to run again after an interruption: only pending deliveries are sent."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'ids', nargs='*', type=int,
+            help="Announcements to send (default: every queued announcement)",
+        )
+        parser.add_argument(
+            '--queue', action='store_true',
+            help="Queue the announcements first, adding registrants who have no delivery yet",
+        )
+        parser.add_argument(
+            '--rate', type=float, default=None,
+            help="Messages per second (default: CONFERENCE_ANNOUNCEMENT_RATE, or 2); 0 for no limit",
+        )
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '--retry-failed', action='store_true',
+            help="Try deliveries that failed in an earlier run again",
+        )
+
+    def handle(self, *args, **options):
+        if options['ids']:
+            selected = list(Announcement.objects.filter(pk__in=options['ids']))
+            missing = set(options['ids']) - {announcement.pk for announcement in selected}
+            if missing:
+                raise CommandError(f"No announcement with id {', '.join(map(str, sorted(missing)))}")
+        else:
+            selected = list(Announcement.objects.filter(status=Announcement.STATUS_QUEUED))
+        if not selected:
+            self.stdout.write("Nothing to send")
+            return
+
+        for announcement in selected:
+            if options['queue']:
+                added = queue(announcement)
+                self.stdout.write(f"“{announcement}”: queued {added} new recipients")
+            elif announcement.status == Announcement.STATUS_DRAFT:
+                self.stderr.write(f"“{announcement}” is a draft; queue it in the admin or with --queue")
+                continue
+            sent, failed = send_announcement(
+                announcement, rate=options['rate'], batch_size=options['batch_size'],
+                retry_failed=options['retry_failed'],
+            )
+            counts = delivery_counts(announcement)
+            self.stdout.write(self.style.SUCCESS(
+                f"“{announcement}”: sent {sent}, failed {failed} "
+                f"({counts['sent']} sent, {counts['failed']} failed, {counts['pending']} pending in total)"
+            ))
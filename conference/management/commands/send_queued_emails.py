@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from conference.mail import DEFAULT_BATCH_SIZE, DEFAULT_MAX_ATTEMPTS, send_pending
+
+
+class Command(BaseCommand):
+    help = "Send due messages from the email outbox over one SMTP connection per batch"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep running and poll the outbox instead of exiting when it is empty",
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5.0,
+            help="Seconds to wait between polls of an empty outbox (with --loop)",
+        )
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            try:
+                sent, failed = send_pending(options['batch_size'], options['max_attempts'])
+            except Exception as exc:
+                # Typically the database being unavailable; messages
+                # claimed but not sent are due again once the claim expires
+                self.stderr.write(f"Could not send batch: {exc}")
+                if not options['loop']:
+                    raise
+                sent = failed = 0
+                time.sleep(options['interval'])
+                continue
+
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f"Sent {sent}, failed {failed}")
+            elif not options['loop']:
+                break
+            else:
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Outbox drained: {total_sent} sent, {total_failed} failed"
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from conference.replica import get_read_database, sync_replica
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy speakers, sessions and schedule items from the primary database "
+        "into the read database (for a local snapshot such as SQLite)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            help="Alias to copy into; defaults to settings.CONFERENCE_READ_DATABASE",
+        )
+
+    def handle(self, *args, **options):
+        alias = options['database'] or get_read_database()
+        if not alias:
+            raise CommandError("No read database is configured (settings.CONFERENCE_READ_DATABASE)")
+        if alias == 'default':
+            raise CommandError("The read database can't be the primary")
+
+        copied = sync_replica(alias)
+        for table, count in copied.items():
+            self.stdout.write(f"  {table}: {count} rows")
+        self.stdout.write(self.style.SUCCESS(f"Synced the public program into '{alias}'"))
@@ -0,0 +1,280 @@
+"""Serving uploaded media (speaker photos) from the application.
+
+Media URLs carry a hash of the file's content, ``speakers/<uuid>.<hash>.jpg``,
+added by ``HashedMediaStorage.url()``. A URL names one exact version of a
+file, so it's served as ``immutable`` for a year. Replacing a photo or
+regenerating its derivatives changes the hash, and the pages, rebuilt when
+the content version moves, link the new URL. An older hash is redirected to
+the current one, and plain URLs without a hash still work with a short
+lifetime.
+
+Hashes are kept in memory, keyed by path, size and modification time, and
+computed off the request path: when the storage saves a file (uploads and
+photo derivatives) and, for files already there, by ``hash_media()`` in
+the worker's warm-up. A page only hashes a file itself when another
+process wrote or replaced it after this one warmed up.
+
+Speaker photos go through ``ContentAddressedStorage``, which names each
+upload by the SHA-256 of its bytes (like the import and synthetic data
+commands already did): uploading the same picture twice stores one file,
+shared by every speaker using it, and it's only deleted, with its
+derivatives, once no speaker refers to it. ``clean_media`` finds older
+duplicates and orphans.
+
+``serve_media`` answers conditional requests and single byte ranges. Whole
+files are returned as a ``FileResponse``, which WSGI servers such as
+gunicorn send with ``sendfile()``. With ``CONFERENCE_MEDIA_SENDFILE`` set,
+the front server sends the file instead (``X-Accel-Redirect`` for nginx,
+``X-Sendfile`` for Apache and IIS modules) and handles ranges itself.
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified, HttpResponseRedirect, StreamingHttpResponse,
+)
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from .images import delete_derivatives
+
+HASH_LENGTH = 12
+# Length of the SHA-256 prefix naming content-addressed files
+CONTENT_NAME_LENGTH = 32
+# A hashed URL never changes content
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# URLs without a hash, e.g. in old emails, may start showing a new file
+PLAIN_MAX_AGE = 60 * 60
+# Redirects from an older hash to the current one
+STALE_MAX_AGE = 5 * 60
+CHUNK_SIZE = 64 * 1024
+
+HASHED_NAME = re.compile(rf'^(?P<base>.+)\.(?P<hash>[0-9a-f]{{{HASH_LENGTH}}})(?P<extension>\.[^./]+)?$')
+BYTE_RANGE = re.compile(r'^bytes=(?P<start>\d*)-(?P<end>\d*)$')
+
+# path -> (size, mtime_ns, hash)
+_hashes = {}
+
+
+def file_hash(path):
+    """Hash of the content of the file at ``path``, or None if there's no file"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    cached = _hashes.get(path)
+    if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        return cached[2]
+    hasher = hashlib.md5(usedforsecurity=False)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    digest = hasher.hexdigest()[:HASH_LENGTH]
+    _hashes[path] = (stat.st_size, stat.st_mtime_ns, digest)
+    return digest
+
+
+def hashed_name(name, digest):
+    """``speakers/photo.jpg`` -> ``speakers/photo.<digest>.jpg``"""
+    base, extension = posixpath.splitext(name)
+    return f"{base}.{digest}{extension}"
+
+
+def hash_media(storage=None):
+    """Hash every file of the storage into memory; returns how many"""
+    storage = storage or default_storage
+    if not isinstance(storage, HashedMediaStorage) or not os.path.isdir(storage.location):
+        return 0
+    hashed = 0
+    for folder, subfolders, files in os.walk(storage.location):
+        for filename in files:
+            if file_hash(os.path.join(folder, filename)):
+                hashed += 1
+    return hashed
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """File system storage whose URLs include a hash of the file's content"""
+
+    def _save(self, name, content):
+        name = super()._save(name, content)
+        # Hashed now, so pages linking the file don't have to
+        file_hash(self.path(name))
+        return name
+
+    def delete(self, name):
+        super().delete(name)
+        if name:
+            _hashes.pop(self.path(name), None)
+
+    def url(self, name):
+        url = super().url(name)
+        digest = file_hash(self.path(name)) if name else None
+        return hashed_name(url, digest) if digest else url
+
+
+def content_hash(chunks):
+    hasher = hashlib.sha256()
+    for chunk in chunks:
+        hasher.update(chunk)
+    return hasher.hexdigest()[:CONTENT_NAME_LENGTH]
+
+
+def content_name(name, content):
+    """``speakers/<uuid>.JPG`` -> ``speakers/<hash of content>.jpg``"""
+    directory, filename = posixpath.split(name)
+    # rpartition rather than splitext, which sees no extension in ".jpg"
+    extension = filename.rpartition('.')[2].lower() if '.' in filename else ''
+    stem = content_hash(content.chunks())
+    return posixpath.join(directory, f"{stem}.{extension}" if extension else stem)
+
+
+class ContentAddressedStorage(HashedMediaStorage):
+    """
+    Stores each file under a hash of its content, so identical files are stored once.
+
+    Since a file may then belong to several rows, ``delete()`` keeps it
+    while ``reference_field`` of ``reference_model`` still points to it.
+    """
+
+    reference_model = 'conference.Speaker'
+    reference_field = 'photo'
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = content_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+    def in_use(self, name):
+        model = apps.get_model(self.reference_model)
+        return model._default_manager.filter(**{self.reference_field: name}).exists()
+
+    def delete(self, name):
+        # Called by django-cleanup once a row stops using the file
+        if not name or self.in_use(name):
+            return
+        super().delete(name)
+        delete_derivatives(name, default_storage)
+
+
+def local_path(name):
+    try:
+        return default_storage.path(name)
+    except (SuspiciousFileOperation, NotImplementedError):
+        raise Http404("No such file")
+
+
+def byte_range(header, size):
+    """``(start, end)`` of a single range, ``None`` to send everything, or ``False`` if unsatisfiable"""
+    match = BYTE_RANGE.match(header.replace(' ', ''))
+    if not match or not (match['start'] or match['end']):
+        # Malformed and multipart ranges are ignored
+        return None
+    if not match['start']:
+        # The last N bytes
+        length = int(match['end'])
+        return (max(size - length, 0), size - 1) if length else False
+    start = int(match['start'])
+    end = min(int(match['end']), size - 1) if match['end'] else size - 1
+    return (start, end) if start <= end else False
+
+
+def read_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def file_response(request, name, path, digest, max_age, immutable=False):
+    """The file at ``path``, a part of it, or 304, with caching headers"""
+    stat = os.stat(path)
+    etag = f'"{digest}"'
+    last_modified = http_date(stat.st_mtime)
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        not_modified = etag in if_none_match or if_none_match.strip() == '*'
+    else:
+        not_modified = not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime)
+
+    sendfile = getattr(settings, 'CONFERENCE_MEDIA_SENDFILE', None)
+    requested_range = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range not in (etag, last_modified):
+        # The client has a different version; it gets the whole file
+        requested_range = None
+    span = byte_range(requested_range, stat.st_size) if requested_range and not sendfile else None
+
+    if not_modified:
+        response = HttpResponseNotModified()
+    elif sendfile:
+        response = HttpResponse(content_type=content_type)
+        if sendfile == 'x-accel-redirect':
+            prefix = getattr(settings, 'CONFERENCE_MEDIA_ACCEL_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + name.lstrip('/')
+        else:
+            response['X-Sendfile'] = path
+    elif span is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+    elif span:
+        start, end = span
+        response = StreamingHttpResponse(read_range(path, start, end), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+        # FileResponse adds a Content-Disposition with the hashed file name
+        del response['Content-Disposition']
+
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = f'public, max-age={max_age}' + (', immutable' if immutable else '')
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    An uploaded file under ``MEDIA_ROOT``.
+
+    ``path`` is either the file's own name or its name with a content hash
+    (see ``HashedMediaStorage``). Unknown files are a 404.
+    """
+    full_path = local_path(path)
+    if os.path.isfile(full_path):
+        return file_response(request, path, full_path, file_hash(full_path), PLAIN_MAX_AGE)
+
+    match = HASHED_NAME.match(path)
+    if match:
+        name = match['base'] + (match['extension'] or '')
+        full_path = local_path(name)
+        digest = file_hash(full_path) if os.path.isfile(full_path) else None
+        if digest == match['hash']:
+            return file_response(request, name, full_path, digest, IMMUTABLE_MAX_AGE, immutable=True)
+        if digest:
+            # A version that has since been replaced
+            response = HttpResponseRedirect(default_storage.url(name))
+            response['Cache-Control'] = f'public, max-age={STALE_MAX_AGE}'
+            return response
+    raise Http404("No such file")
@@ -0,0 +1,280 @@
+"""Per-request performance instrumentation.
+
+``PerformanceMiddleware`` times every request and breaks it down into view,
+template rendering, SQL and outbound email time. The numbers go out as a
+log record on the ``conference.performance`` logger: a sampled fraction of
+requests is logged at INFO and every request slower than the threshold at
+WARNING. They are also sent as a ``Server-Timing`` header (visible in the
+browser's network panel) when ``PERFORMANCE_SERVER_TIMING`` is on, for
+profiling: query counts and timings are no business of the public.
+
+SQL is timed by an execute wrapper on every connection. Templates and
+email are timed by the ``TimedDjangoTemplates`` template backend and the
+``TimedEmailBackend`` email backend, configured in the settings; Django
+itself is left unpatched.
+
+Settings:
+
+``PERFORMANCE_SAMPLE_RATE``
+    Fraction of requests to log, between 0 and 1 (default 0.1).
+``PERFORMANCE_SLOW_REQUEST_MS``
+    Requests slower than this are always logged (default 500).
+``PERFORMANCE_SERVER_TIMING``
+    Whether to add the ``Server-Timing`` header (default False).
+``PERFORMANCE_EMAIL_BACKEND``
+    The email backend ``TimedEmailBackend`` hands messages to.
+"""
+from contextvars import ContextVar
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template as DjangoTemplate
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+logger = logging.getLogger('conference.performance')
+
+# Metrics of the request being handled in the current thread or task
+current_metrics = ContextVar('conference_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Timings collected for one request, in seconds"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.view = 0.0
+        self.template = 0.0
+        self.sql = 0.0
+        self.queries = 0
+        self.email = 0.0
+        self.emails = 0
+
+    def record_sql(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - started
+            self.queries += 1
+
+    def server_timing(self):
+        """Value for the ``Server-Timing`` header"""
+        return ', '.join([
+            f'total;dur={self.total * 1000:.1f}',
+            f'view;dur={self.view * 1000:.1f}',
+            f'tpl;dur={self.template * 1000:.1f}',
+            f'db;dur={self.sql * 1000:.1f};desc="{self.queries} queries"',
+            f'email;dur={self.email * 1000:.1f};desc="{self.emails} sent"',
+        ])
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total * 1000, 1),
+            'view_ms': round(self.view * 1000, 1),
+            'template_ms': round(self.template * 1000, 1),
+            'sql_ms': round(self.sql * 1000, 1),
+            'queries': self.queries,
+            'email_ms': round(self.email * 1000, 1),
+            'emails': self.emails,
+        }
+
+
+def add_time(attribute, started):
+    """Add the time since ``started`` to ``attribute`` of the current request's metrics"""
+    metrics = current_metrics.get()
+    if metrics is not None:
+        setattr(metrics, attribute, getattr(metrics, attribute) + time.perf_counter() - started)
+    return metrics
+
+
+class TimedTemplate(DjangoTemplate):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            add_time('template', started)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, timing renders for the current request.
+
+    Only the backend's templates are timed, which are rendered once per
+    render()/TemplateResponse, so included templates aren't counted twice.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class TimedEmailBackend(BaseEmailBackend):
+    """Hands messages to ``PERFORMANCE_EMAIL_BACKEND``, timing sends for the current request"""
+
+    def __init__(self, fail_silently=False, **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.backend = get_connection(
+            getattr(settings, 'PERFORMANCE_EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend'),
+            fail_silently=fail_silently, **kwargs
+        )
+
+    def open(self):
+        return self.backend.open()
+
+    def close(self):
+        return self.backend.close()
+
+    def send_messages(self, email_messages):
+        started = time.perf_counter()
+        sent = 0
+        try:
+            sent = self.backend.send_messages(email_messages)
+            return sent
+        finally:
+            metrics = add_time('email', started)
+            if metrics is not None:
+                metrics.emails += sent or 0
+
+
+def record_sql(execute, sql, params, many, context):
+    """Execute wrapper adding the query to the current request, if any"""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_sql(execute, sql, params, many, context)
+
+
+def watch_connection(connection, **kwargs):
+    # Installed on every connection rather than per request, because async
+    # views run their queries on connections of other threads. Inserted
+    # first so execute_wrapper() blocks, which pop the last, keep working.
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_sql)
+
+
+def instrument():
+    """Time SQL on every connection (idempotent)"""
+    connection_created.connect(watch_connection, dispatch_uid='conference.performance')
+    for connection in connections.all(initialized_only=True):
+        watch_connection(connection)
+
+
+class PerformanceMiddleware:
+    """Measure each request and report it via Server-Timing and logging"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PERFORMANCE_SAMPLE_RATE', 0.1)
+        self.slow_request_ms = getattr(settings, 'PERFORMANCE_SLOW_REQUEST_MS', 500)
+        self.server_timing = getattr(settings, 'PERFORMANCE_SERVER_TIMING', False)
+        instrument()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+            # A coroutine, so the handler doesn't run it in a thread
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        finished = time.perf_counter()
+        metrics.total = finished - metrics.started
+        view_started = getattr(request, '_conference_view_started', None)
+        if view_started is not None:
+            metrics.view = finished - view_started
+
+        if self.server_timing:
+            response['Server-Timing'] = metrics.server_timing()
+        self.log(request, response, metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Everything from here on is the view and the response phase of
+        # the inner middleware; URL resolution and the request phase are not
+        request._conference_view_started = time.perf_counter()
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        request._conference_view_started = time.perf_counter()
+
+    def log(self, request, response, metrics):
+        total_ms = metrics.total * 1000
+        slow = total_ms >= self.slow_request_ms
+        if not slow and random.random() >= self.sample_rate:
+            return
+        data = metrics.as_dict()
+        data.update({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'view': getattr(getattr(request, 'resolver_match', None), 'view_name', None),
+        })
+        logger.log(
+            logging.WARNING if slow else logging.INFO,
+            "%s %s %s in %.1fms (%d queries, %.1fms SQL)",
+            request.method, request.path, response.status_code, total_ms,
+            metrics.queries, metrics.sql * 1000,
+            extra={'performance': data},
+        )
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that also runs natively under ASGI.
+
+    WhiteNoise's middleware is sync only, and a single sync middleware
+    makes Django run every async view through a thread, which undoes the
+    point of the async views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
@@ -1,22 +1,76 @@
+# Generated by Django 5.0.14 on 2026-10-17 20:56
+
+import conference.models
+import django.db.models.deletion
 from django.db import migrations, models
 
-def alter_scheduleitem_column(apps, schema_editor):
-    with schema_editor.connection.cursor() as cursor:
-        # Drop constraints or indexes
-        cursor.execute('ALTER TABLE conference_scheduleitem_speakers DROP CONSTRAINT FK_constraint_name;')
-        cursor.execute('DROP INDEX index_name ON conference_scheduleitem_speakers;')
-        # Alter the column
-        cursor.execute('ALTER TABLE conference_scheduleitem_speakers ALTER COLUMN scheduleitem_id INT NOT NULL;')
-        # Recreate constraints or indexes
-        cursor.execute('CREATE UNIQUE INDEX index_name ON conference_scheduleitem_speakers(scheduleitem_id);')
-        cursor.execute('ALTER TABLE conference_scheduleitem_speakers ADD CONSTRAINT FK_constraint_name FOREIGN KEY (scheduleitem_id) REFERENCES other_table(id);')
 
 class Migration(migrations.Migration):
 
+    initial = True
+
     dependencies = [
-        # Add your migration dependencies here
     ]
 
     operations = [
-        migrations.RunPython(alter_scheduleitem_column),
+        migrations.CreateModel(
+            name='Registration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('full_name', models.CharField(max_length=100)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(blank=True, max_length=20, null=True)),
+                ('institution', models.CharField(max_length=200)),
+                ('country', models.CharField(max_length=100)),
+                ('attendee_type', models.CharField(choices=[('specialist', 'Specialist'), ('trainee', 'Trainee/Fellow')], max_length=20)),
+                ('special_requirements', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Session',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+            ],
+            options={
+                'ordering': ['date', 'start_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Speaker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('title', models.CharField(blank=True, max_length=100, null=True)),
+                ('institution', models.CharField(blank=True, max_length=200, null=True)),
+                ('bio', models.TextField()),
+                ('photo', models.ImageField(blank=True, null=True, upload_to=conference.models.get_unique_filename)),
+                ('order', models.IntegerField(default=0, help_text='Display order on the speakers page')),
+                ('is_visible', models.BooleanField(default=True, help_text='Whether to display this speaker on the website')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScheduleItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('is_break', models.BooleanField(default=False, help_text='Whether this is a break, lunch, etc.')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='conference.session')),
+                ('speakers', models.ManyToManyField(blank=True, related_name='schedule_items', to='conference.speaker')),
+            ],
+            options={
+                'ordering': ['session__date', 'start_time'],
+            },
+        ),
     ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:03
+
+from django.db import migrations, models
+
+
+def fill_email_normalized(apps, schema_editor):
+    """Normalize existing emails; later duplicates of an address stay NULL"""
+    Registration = apps.get_model('conference', 'Registration')
+    seen = set()
+    batch = []
+    for registration in Registration.objects.order_by('created_at', 'id').only('id', 'email').iterator():
+        email = (registration.email or '').strip().lower()
+        if email in seen:
+            continue
+        seen.add(email)
+        registration.email_normalized = email
+        batch.append(registration)
+        if len(batch) >= 1000:
+            Registration.objects.bulk_update(batch, ['email_normalized'])
+            batch = []
+    Registration.objects.bulk_update(batch, ['email_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conference', '0003_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registration',
+            name='email_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=254, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='registration',
+            index=models.Index(fields=['-created_at'], name='registration_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registration',
+            index=models.Index(fields=['attendee_type', '-created_at'], name='registration_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduleitem',
+            index=models.Index(fields=['session', 'start_time'], name='item_session_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['date', 'start_time'], name='session_date_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='speaker',
+            index=models.Index(fields=['is_visible', 'order'], name='speaker_visible_order_idx'),
+        ),
+        migrations.RunPython(fill_email_normalized, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='registration',
+            constraint=models.UniqueConstraint(condition=models.Q(('email_normalized__isnull', False)), fields=('email_normalized',), name='registration_unique_email'),
+        ),
+    ]
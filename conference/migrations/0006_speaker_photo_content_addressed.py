@@ -0,0 +1,20 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:38
+
+import conference.media
+import conference.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conference', '0005_registration_journal_token'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='speaker',
+            name='photo',
+            field=models.ImageField(blank=True, null=True, storage=conference.media.ContentAddressedStorage(), upload_to=conference.models.get_unique_filename),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conference', '0006_speaker_photo_content_addressed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Announcement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255)),
+                ('message', models.TextField(help_text='Plain text; leave a blank line between paragraphs')),
+                ('attendee_type', models.CharField(blank=True, choices=[('specialist', 'Specialist'), ('trainee', 'Trainee/Fellow')], help_text='Only email this type of attendee; leave empty for everyone', max_length=20)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('queued', 'Queued'), ('sent', 'Sent')], default='draft', editable=False, max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('queued_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, editable=False, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AnnouncementDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.CharField(max_length=254)),
+                ('full_name', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('announcement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='conference.announcement')),
+            ],
+            options={
+                'verbose_name_plural': 'announcement deliveries',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['announcement', 'status', 'id'], name='delivery_status_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='announcementdelivery',
+            constraint=models.UniqueConstraint(fields=('announcement', 'email'), name='delivery_unique_email'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conference', '0007_announcement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistrationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('country', models.CharField(max_length=100)),
+                ('attendee_type', models.CharField(choices=[('specialist', 'Specialist'), ('trainee', 'Trainee/Fellow')], max_length=20)),
+                ('institution', models.CharField(max_length=200)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-day', 'country', 'attendee_type', 'institution'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='registrationrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'country', 'attendee_type', 'institution'), name='rollup_unique_bucket'),
+        ),
+    ]
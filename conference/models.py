@@ -1,10 +1,18 @@
 from django.db import models
+from django.utils import timezone
 import uuid
 import os
 
+from .media import ContentAddressedStorage
+
 # Function to generate unique filenames for uploaded images
 def get_unique_filename(instance, filename):
-    """Generate a unique filename for uploaded images to prevent collisions"""
+    """
+    Generate a unique filename for uploaded images to prevent collisions.
+
+    Speaker photos keep only the folder and extension: their storage names
+    them by content.
+    """
     ext = filename.split('.')[-1]
     filename = f"{uuid.uuid4()}.{ext}"
     return os.path.join('speakers', filename)
@@ -15,9 +23,16 @@ class Speaker(models.Model):
     title = models.CharField(max_length=100, blank=True, null=True)
     institution = models.CharField(max_length=200, blank=True, null=True)
     bio = models.TextField()
-    photo = models.ImageField(upload_to=get_unique_filename, blank=True, null=True)
+    photo = models.ImageField(upload_to=get_unique_filename, storage=ContentAddressedStorage(), blank=True, null=True)
     order = models.IntegerField(default=0, help_text="Display order on the speakers page")
     is_visible = models.BooleanField(default=True, help_text="Whether to display this speaker on the website")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Public pages list visible speakers in display order
+            models.Index(fields=['is_visible', 'order'], name='speaker_visible_order_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -29,9 +44,13 @@ class Session(models.Model):
     date = models.DateField()
     start_time = models.TimeField()
     end_time = models.TimeField()
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['date', 'start_time']
+        indexes = [
+            models.Index(fields=['date', 'start_time'], name='session_date_start_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.date}"
@@ -45,9 +64,14 @@ class ScheduleItem(models.Model):
     start_time = models.TimeField()
     end_time = models.TimeField()
     is_break = models.BooleanField(default=False, help_text="Whether this is a break, lunch, etc.")
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['session__date', 'start_time']
+        indexes = [
+            # Items are always loaded per session in running order
+            models.Index(fields=['session', 'start_time'], name='item_session_start_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.start_time} - {self.end_time})"
@@ -66,11 +90,178 @@ class Registration(models.Model):
     country = models.CharField(max_length=100)
     attendee_type = models.CharField(max_length=20, choices=ATTENDEE_TYPES)
     special_requirements = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: registrations flushed from the journal and
+    # synthetic data keep the time they were submitted
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Lowercased copy of the email with a unique index, used to reject
+    # duplicate sign-ups. Left empty (NULL) on legacy duplicate rows.
+    email_normalized = models.CharField(max_length=254, null=True, blank=True, editable=False)
+    # Journal entry the registration was flushed from (see conference.journal)
+    journal_token = models.UUIDField(null=True, blank=True, editable=False)
     
     
     def __str__(self):
         return f"{self.full_name} - {self.attendee_type}"
+
+    @staticmethod
+    def normalize_email(email):
+        return (email or '').strip().lower()
+
+    def email_changed(self):
+        """Whether ``email`` differs from the saved row's"""
+        return Registration.objects.filter(pk=self.pk).values_list('email', flat=True).first() != self.email
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            if not self.email_normalized:
+                self.email_normalized = self.normalize_email(self.email)
+        elif self.email_normalized is not None or self.email_changed():
+            # Follow edits of the address, e.g. in the admin. Legacy
+            # duplicates keep NULL until their address changes.
+            self.email_normalized = self.normalize_email(self.email)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'email' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'email_normalized'}
+        super().save(*args, **kwargs)
         
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Admin changelist order and its attendee type / date filters
+            models.Index(fields=['-created_at'], name='registration_created_idx'),
+            models.Index(fields=['attendee_type', '-created_at'], name='registration_type_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['email_normalized'],
+                condition=models.Q(email_normalized__isnull=False),
+                name='registration_unique_email',
+            ),
+            models.UniqueConstraint(
+                fields=['journal_token'],
+                condition=models.Q(journal_token__isnull=False),
+                name='registration_unique_journal_token',
+            ),
+        ]
+
+class OutgoingEmail(models.Model):
+    """An email waiting in the outbox to be sent by the background sender"""
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUSES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True, default='')
+    from_email = models.CharField(max_length=254)
+    recipients = models.TextField(help_text="One address per line")
+    status = models.CharField(max_length=10, choices=STATUSES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            # The sender polls for due pending messages
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipients.replace(chr(10), ', ')} ({self.status})"
+
+    @property
+    def recipient_list(self):
+        return [address for address in self.recipients.splitlines() if address]
+
+class Announcement(models.Model):
+    """A message emailed to every registrant (see conference.announcements)"""
+    STATUS_DRAFT = 'draft'
+    STATUS_QUEUED = 'queued'
+    STATUS_SENT = 'sent'
+    STATUSES = (
+        (STATUS_DRAFT, 'Draft'),
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_SENT, 'Sent'),
+    )
+
+    subject = models.CharField(max_length=255)
+    message = models.TextField(help_text="Plain text; leave a blank line between paragraphs")
+    attendee_type = models.CharField(
+        max_length=20, choices=Registration.ATTENDEE_TYPES, blank=True,
+        help_text="Only email this type of attendee; leave empty for everyone",
+    )
+    status = models.CharField(max_length=10, choices=STATUSES, default=STATUS_DRAFT, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    queued_at = models.DateTimeField(blank=True, null=True, editable=False)
+    finished_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.subject
+
+class AnnouncementDelivery(models.Model):
+    """One recipient of an announcement and whether it reached them"""
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUSES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    announcement = models.ForeignKey(Announcement, on_delete=models.CASCADE, related_name='deliveries')
+    # Copied from the registration when queued, so sending needs no join
+    # and deleted registrations still show who was emailed
+    email = models.CharField(max_length=254)
+    full_name = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=STATUSES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name_plural = 'announcement deliveries'
+        indexes = [
+            # The sender walks the pending deliveries of an announcement in id order
+            models.Index(fields=['announcement', 'status', 'id'], name='delivery_status_idx'),
+        ]
+        constraints = [
+            # Queueing again skips registrants who already have a delivery,
+            # and legacy duplicate registrations get one email
+            models.UniqueConstraint(fields=['announcement', 'email'], name='delivery_unique_email'),
+        ]
+
+    def __str__(self):
+        return f"{self.announcement} -> {self.email} ({self.status})"
+
+class RegistrationRollup(models.Model):
+    """Number of registrations per day, country, attendee type and institution (see conference.rollups)"""
+    # In the site's time zone
+    day = models.DateField()
+    country = models.CharField(max_length=100)
+    attendee_type = models.CharField(max_length=20, choices=Registration.ATTENDEE_TYPES)
+    institution = models.CharField(max_length=200)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day', 'country', 'attendee_type', 'institution']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'country', 'attendee_type', 'institution'], name='rollup_unique_bucket',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.country} {self.attendee_type} {self.institution}: {self.count}"
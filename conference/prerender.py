@@ -0,0 +1,191 @@
+"""Pre-rendered copies of the public pages.
+
+``prerender_pages()`` renders the public pages once and writes them,
+minified and with gzip (and brotli, when installed) variants, to
+``CONFERENCE_PRERENDER_ROOT`` together with a manifest naming the content
+version and build they were rendered for. With ``CONFERENCE_PRERENDER`` on, ``PrerenderMiddleware`` answers
+anonymous GETs for those pages straight from the files, before sessions,
+views or the database are involved. Files are only served while the
+content version and build match, so an edit made outside the admin falls back to
+the normal views until the pages are rendered again.
+
+The registration form is pre-rendered without a CSRF token; the page
+fetches one per visitor from ``registration_csrf``.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .cache import get_build_id, get_content_version, is_cacheable_request
+from .compression import available_encodings, compress, minify_html
+
+logger = logging.getLogger(__name__)
+
+PAGES = ('home', 'speakers', 'schedule', 'registration', 'registration_success')
+MANIFEST = 'manifest.json'
+# Preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def is_enabled():
+    return getattr(settings, 'CONFERENCE_PRERENDER', False)
+
+
+def get_prerender_root():
+    return getattr(settings, 'CONFERENCE_PRERENDER_ROOT', os.path.join(settings.BASE_DIR, 'prerendered'))
+
+
+def page_filename(path):
+    """``/speakers/`` is stored as ``speakers/index.html``"""
+    return os.path.join(path.strip('/'), 'index.html')
+
+
+def write_atomic(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.tmp{os.getpid()}"
+    with open(temporary, 'wb') as f:
+        f.write(content)
+    os.replace(temporary, path)
+
+
+def render_page(path):
+    """Render a page through its view, as an anonymous visitor would get it"""
+    request = RequestFactory().get(path)
+    request.prerendering = True
+    view = resolve(path).func
+    response = async_to_sync(view)(request) if iscoroutinefunction(view) else view(request)
+    if response.status_code != 200:
+        raise ValueError(f"{path} returned {response.status_code}")
+    return response.content
+
+
+def prerender_pages(root=None):
+    """Render every page and its compressed variants; returns the manifest"""
+    root = root or get_prerender_root()
+    # Read before rendering, so pages built from data that is being edited
+    # are labelled with the old version and never served after the edit
+    version = get_content_version()
+    pages = {}
+    for name in PAGES:
+        path = reverse(name)
+        filename = page_filename(path)
+        content = minify_html(render_page(path).decode('utf-8')).encode('utf-8')
+        variants = {'identity': content}
+        variants.update((encoding, compress(content, encoding)) for encoding in available_encodings())
+        suffixes = dict(ENCODINGS, identity='')
+        for encoding, body in variants.items():
+            write_atomic(os.path.join(root, filename + suffixes[encoding]), body)
+        pages[path] = {
+            'file': filename,
+            'etag': hashlib.sha256(content).hexdigest()[:32],
+            'encodings': sorted(variants),
+        }
+    manifest = {'version': version, 'build': get_build_id(), 'pages': pages}
+    # The manifest goes last: until it is replaced the old one still
+    # describes a consistent set of files
+    write_atomic(os.path.join(root, MANIFEST), json.dumps(manifest).encode())
+    return manifest
+
+
+def refresh_prerendered():
+    try:
+        prerender_pages()
+    except Exception:
+        # The views keep serving the pages; the admin save itself succeeded
+        logger.exception("Could not pre-render the public pages")
+
+
+def schedule_prerender(request):
+    """Re-render the pages once the request's changes are committed"""
+    if not is_enabled() or getattr(request, '_conference_prerender_scheduled', False):
+        return
+    request._conference_prerender_scheduled = True
+    transaction.on_commit(refresh_prerendered)
+
+
+class PrerenderMiddleware:
+    """Serve pre-rendered public pages without reaching the views"""
+
+    accepts = {encoding: re.compile(rf'\b{encoding}\b') for encoding, suffix in ENCODINGS}
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not is_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.root = get_prerender_root()
+        self.manifest = None
+        self.manifest_mtime = None
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.serve(request) if is_cacheable_request(request) and not request.GET else None
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        response = self.serve(request) if is_cacheable_request(request) and not request.GET else None
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+    def load_manifest(self):
+        """The manifest, re-read whenever a new one has been written"""
+        try:
+            mtime = os.stat(os.path.join(self.root, MANIFEST)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime != self.manifest_mtime:
+            with open(os.path.join(self.root, MANIFEST), encoding='utf-8') as f:
+                self.manifest = json.load(f)
+            self.manifest_mtime = mtime
+        return self.manifest
+
+    def serve(self, request):
+        manifest = self.load_manifest()
+        page = manifest and manifest['pages'].get(request.path)
+        if not page or (manifest['version'], manifest.get('build')) != (get_content_version(), get_build_id()):
+            return None
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        encoding, suffix = next(
+            ((encoding, suffix) for encoding, suffix in ENCODINGS
+             if encoding in page['encodings'] and self.accepts[encoding].search(accept_encoding)),
+            ('identity', ''),
+        )
+        etag = f'"{page["etag"]}"' if encoding == 'identity' else f'"{page["etag"]}-{encoding}"'
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        if etag in if_none_match or if_none_match.strip() == '*':
+            response = HttpResponseNotModified()
+        else:
+            try:
+                with open(os.path.join(self.root, page['file'] + suffix), 'rb') as f:
+                    content = f.read()
+            except FileNotFoundError:
+                return None
+            response = HttpResponse(content, content_type='text/html; charset=utf-8')
+            if encoding != 'identity':
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        # XFrameOptionsMiddleware runs after this one and is skipped
+        response['X-Frame-Options'] = getattr(settings, 'X_FRAME_OPTIONS', 'DENY')
+        patch_vary_headers(response, ['Accept-Encoding'])
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
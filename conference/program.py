@@ -0,0 +1,188 @@
+"""Builders that turn the conference program into plain template data.
+
+The public pages used to walk ``session.items`` and ``item.speakers`` from
+inside the templates, which costs one query per session and two per item.
+The functions here load the whole program up front with a fixed number of
+queries and hand the templates dictionaries and lists only, so rendering
+never touches the database.
+"""
+from django.db.models import Count, Prefetch
+
+from .models import Speaker, Session, ScheduleItem
+from .replica import apublic_reads, public_reads
+
+# Only the columns the public pages actually display
+SPEAKER_FIELDS = ('id', 'name', 'institution', 'photo')
+FEATURED_SPEAKER_FIELDS = ('id', 'name', 'title', 'institution', 'photo')
+SESSION_FIELDS = ('id', 'name', 'description', 'date', 'start_time', 'end_time')
+ITEM_FIELDS = ('id', 'session_id', 'title', 'description', 'start_time', 'end_time', 'is_break')
+
+
+def speaker_queryset():
+    """Speakers as shown next to schedule items"""
+    return Speaker.objects.only(*SPEAKER_FIELDS).order_by('order', 'name')
+
+
+def item_queryset():
+    """Schedule items in running order"""
+    return ScheduleItem.objects.only(*ITEM_FIELDS).order_by('start_time', 'id')
+
+
+def serialize_speaker(speaker):
+    """Plain representation of a speaker for the templates"""
+    return {
+        'id': speaker.id,
+        'name': speaker.name,
+        'institution': speaker.institution,
+        'photo_url': speaker.photo.url if speaker.photo else None,
+        'photo_name': speaker.photo.name if speaker.photo else None,
+    }
+
+
+def serialize_item(item):
+    """Plain representation of a schedule item for the templates"""
+    return {
+        'id': item.id,
+        'title': item.title,
+        'description': item.description,
+        'start_time': item.start_time,
+        'end_time': item.end_time,
+        'is_break': item.is_break,
+        'speakers': [serialize_speaker(speaker) for speaker in item.speakers.all()],
+    }
+
+
+def serialize_session(session, items):
+    """Plain representation of a session and the given items"""
+    return {
+        'id': session.id,
+        'name': session.name,
+        'description': session.description,
+        'date': session.date,
+        'start_time': session.start_time,
+        'end_time': session.end_time,
+        'items': [serialize_item(item) for item in items],
+    }
+
+
+def visible_speakers():
+    """The speakers page, in display order"""
+    return Speaker.objects.filter(is_visible=True).order_by('order')
+
+
+def schedule_sessions():
+    """Every session with its items and their speakers prefetched"""
+    return (
+        Session.objects.only(*SESSION_FIELDS)
+        .order_by('date', 'start_time')
+        .prefetch_related(
+            Prefetch('items', queryset=item_queryset()),
+            Prefetch('items__speakers', queryset=speaker_queryset()),
+        )
+    )
+
+
+def group_schedule(sessions):
+    """Serialize loaded sessions grouped by day"""
+    schedule_by_date = {}
+    for session in sessions:
+        date_str = session.date.strftime('%Y-%m-%d')
+        if date_str not in schedule_by_date:
+            schedule_by_date[date_str] = {
+                'date_display': session.date.strftime('%A, %B %d, %Y'),
+                'sessions': []
+            }
+        schedule_by_date[date_str]['sessions'].append(
+            serialize_session(session, session.items.all())
+        )
+    return schedule_by_date
+
+
+def featured_speakers(limit):
+    return (
+        Speaker.objects.filter(is_visible=True)
+        .only(*FEATURED_SPEAKER_FIELDS)
+        .order_by('order')[:limit]
+    )
+
+
+def preview_sessions(session_limit, item_limit):
+    """The first sessions with item counts and their first items prefetched"""
+    return (
+        Session.objects.only(*SESSION_FIELDS)
+        .annotate(item_count=Count('items'))
+        .order_by('date', 'start_time')
+        .prefetch_related(
+            # Sliced prefetches are limited per session, not overall
+            Prefetch('items', queryset=item_queryset()[:item_limit], to_attr='preview_items'),
+            Prefetch('preview_items__speakers', queryset=speaker_queryset()),
+        )
+    )[:session_limit]
+
+
+def home_preview(speakers, sessions):
+    """Serialize loaded featured speakers and preview sessions"""
+    upcoming_sessions = []
+    for session in sessions:
+        data = serialize_session(session, session.preview_items)
+        data['item_count'] = session.item_count
+        upcoming_sessions.append(data)
+
+    return {
+        'featured_speakers': speakers,
+        'upcoming_sessions': upcoming_sessions,
+    }
+
+
+@public_reads()
+def build_speakers():
+    """Load the visible speakers in display order"""
+    return list(visible_speakers())
+
+
+@public_reads()
+def build_schedule():
+    """
+    Load the full program grouped by day.
+
+    Returns an ordered dict keyed by ``YYYY-MM-DD`` whose values hold the
+    ``date_display`` label and the list of serialized sessions for that day.
+    Always runs three queries: sessions, schedule items and speakers.
+    """
+    return group_schedule(schedule_sessions())
+
+
+@public_reads()
+def build_home_preview(session_limit=2, item_limit=3, speaker_limit=3):
+    """
+    Load the data shown on the homepage.
+
+    Returns the featured speakers and the first ``session_limit`` sessions,
+    each with its total ``item_count`` and only its first ``item_limit``
+    items. Always runs four queries: featured speakers, sessions annotated
+    with their item counts, the sliced items and their speakers.
+    """
+    return home_preview(
+        list(featured_speakers(speaker_limit)),
+        preview_sessions(session_limit, item_limit),
+    )
+
+
+# The same builders for async views, on the async ORM
+
+async def abuild_speakers():
+    async with apublic_reads():
+        return [speaker async for speaker in visible_speakers()]
+
+
+async def abuild_schedule():
+    async with apublic_reads():
+        return group_schedule([session async for session in schedule_sessions()])
+
+
+async def abuild_home_preview(session_limit=2, item_limit=3, speaker_limit=3):
+    async with apublic_reads():
+        return home_preview(
+            [speaker async for speaker in featured_speakers(speaker_limit)],
+            [session async for session in preview_sessions(session_limit, item_limit)],
+        )
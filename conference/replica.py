@@ -0,0 +1,117 @@
+"""Serving public reads from a read-only copy of the database.
+
+When ``settings.CONFERENCE_READ_DATABASE`` names a configured database
+alias (a replica of the primary, or a local SQLite snapshot kept up to
+date with ``manage.py sync_read_replica``), the program builders read
+``Speaker``/``Session``/``ScheduleItem`` from it inside ``public_reads()``;
+see ``conference.routers``. Everything else, including the registration
+form and the admin, stays on the primary, so editors always read their
+own writes.
+
+A replica that lags behind would leave stale pages in the cache under the
+new content version. So it is only used once its content fingerprint (see
+``conference.freshness``) matches the primary's; that check is made once
+per content version.
+"""
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .cache import bump_content_version, get_cache_timeout, versioned_key
+from .models import Speaker, Session, ScheduleItem
+
+# Alias the public models are read from, while inside public_reads()
+public_read_alias = ContextVar('conference_public_read_alias', default=None)
+
+REPLICATED_MODELS = (Speaker, Session, ScheduleItem, ScheduleItem.speakers.through)
+
+
+def get_read_database():
+    """The configured read alias, or None"""
+    alias = getattr(settings, 'CONFERENCE_READ_DATABASE', None)
+    return alias if alias and alias in settings.DATABASES else None
+
+
+def replica_is_current(alias):
+    from .freshness import read_content_state
+
+    key = versioned_key('replica-current', alias)
+    if cache.get(key):
+        return True
+    current = read_content_state(alias)['etag'] == read_content_state(DEFAULT_DB_ALIAS)['etag']
+    if current:
+        # A lagging replica is checked again on the next request
+        cache.set(key, True, get_cache_timeout())
+    return current
+
+
+def current_read_alias():
+    """Where public reads should go right now"""
+    alias = get_read_database()
+    if alias and replica_is_current(alias):
+        return alias
+    return DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def public_reads():
+    """Route reads of the public models to the read database"""
+    if public_read_alias.get() is not None:
+        yield
+        return
+    token = public_read_alias.set(current_read_alias())
+    try:
+        yield
+    finally:
+        public_read_alias.reset(token)
+
+
+@asynccontextmanager
+async def apublic_reads():
+    """``public_reads()`` for async code"""
+    if public_read_alias.get() is not None:
+        yield
+        return
+    token = public_read_alias.set(await sync_to_async(current_read_alias)())
+    try:
+        yield
+    finally:
+        public_read_alias.reset(token)
+
+
+@contextmanager
+def preserved_timestamps():
+    """Let bulk inserts keep the ``updated_at`` values they were given"""
+    fields = [model._meta.get_field('updated_at') for model in (Speaker, Session, ScheduleItem)]
+    for field in fields:
+        field.auto_now = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now = True
+
+
+def sync_replica(alias, batch_size=1000):
+    """
+    Copy the public tables from the primary into ``alias``.
+
+    For a local snapshot database; a real replica is kept in sync by the
+    database server. Returns the number of rows copied per table.
+    """
+    copied = {}
+    with transaction.atomic(using=alias), preserved_timestamps():
+        with connections[alias].cursor() as cursor:
+            # Children first; raw deletes send no signals
+            for model in reversed(REPLICATED_MODELS):
+                cursor.execute(f"DELETE FROM {connections[alias].ops.quote_name(model._meta.db_table)}")
+        for model in REPLICATED_MODELS:
+            rows = list(model._base_manager.using(DEFAULT_DB_ALIAS).order_by('pk'))
+            model._base_manager.using(alias).bulk_create(rows, batch_size=batch_size)
+            copied[model._meta.db_table] = len(rows)
+    bump_content_version()
+    return copied
@@ -0,0 +1,159 @@
+"""Registration counts, kept up to date as registrations come in.
+
+``RegistrationRollup`` has one row per day (in the site's time zone),
+country, attendee type and institution, with the number of registrations
+in it. The registrations dashboard in the admin filters and sums those
+rows, so "trainees from Saudi Arabia this week" doesn't group the whole
+registration table on every view.
+
+Counts change in the same transaction as the registrations:
+
+* saving a new registration adds one to its row, and editing one moves it
+  to another row if the counted fields changed (the signal handlers
+  below);
+* deleting one takes one away, and rows that reach zero are deleted;
+* bulk inserts send no signals, so the journal flush calls ``record()``
+  itself, and the synthetic data generator rebuilds everything once.
+
+``rebuild_registration_rollups`` recounts everything from the
+registrations: run it once to backfill, and after changing registrations
+around the ORM.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from .models import Registration, RegistrationRollup
+
+# Registration fields a rollup row is keyed by, after the day
+FIELDS = ('country', 'attendee_type', 'institution')
+KEY_FIELDS = ('day',) + FIELDS
+# Rows listed per breakdown on the dashboard
+TOP_ROWS = 10
+
+paused = ContextVar('conference_rollups_paused', default=False)
+
+
+def row_key(registration):
+    """``(day, country, attendee_type, institution)`` of a registration"""
+    day = timezone.localdate(registration.created_at, timezone.get_default_timezone())
+    return (day,) + tuple(getattr(registration, field) for field in FIELDS)
+
+
+def apply(changes):
+    """Add ``{row key: delta}`` to the counts"""
+    for key, delta in changes.items():
+        if not delta:
+            continue
+        rows = RegistrationRollup.objects.filter(**dict(zip(KEY_FIELDS, key)))
+        if rows.update(count=F('count') + delta):
+            if delta < 0:
+                rows.filter(count__lte=0).delete()
+            continue
+        if delta < 0:
+            # Counted before the rollups existed; the next rebuild sorts it out
+            continue
+        try:
+            with transaction.atomic():
+                RegistrationRollup.objects.create(count=delta, **dict(zip(KEY_FIELDS, key)))
+        except IntegrityError:
+            # Another registration for the same row got there first
+            rows.update(count=F('count') + delta)
+
+
+def record(registrations):
+    """Count registrations inserted without signals, e.g. by ``bulk_create``"""
+    if not paused.get():
+        apply(Counter(row_key(registration) for registration in registrations))
+
+
+def rebuild():
+    """Recount every row from the registrations; returns the number of rows"""
+    counts = (
+        Registration.objects.order_by()
+        .annotate(day=TruncDate('created_at', tzinfo=timezone.get_default_timezone()))
+        .values(*KEY_FIELDS)
+        .annotate(total=Count('id'))
+    )
+    with transaction.atomic():
+        RegistrationRollup.objects.all().delete()
+        rows = RegistrationRollup.objects.bulk_create(
+            (RegistrationRollup(count=row.pop('total'), **row) for row in counts.iterator()),
+            batch_size=1000,
+        )
+    return len(rows)
+
+
+@contextmanager
+def paused_updates():
+    """Skip incremental updates inside the block; the caller rebuilds afterwards"""
+    token = paused.set(True)
+    try:
+        yield
+    finally:
+        paused.reset(token)
+
+
+def summary(rollups):
+    """
+    Totals of a queryset of rollup rows for the dashboard.
+
+    ``breakdowns`` are ``(title, [(value, total), ...])``: the largest
+    countries and institutions, and the latest days.
+    """
+    rollups = rollups.order_by()
+    types = dict(Registration.ATTENDEE_TYPES)
+
+    def totals(field, limit=None):
+        rows = rollups.values(field).annotate(total=Sum('count')).order_by('-total', field)
+        return [(row[field], row['total']) for row in (rows[:limit] if limit else rows)]
+
+    return {
+        'total': rollups.aggregate(total=Sum('count'))['total'] or 0,
+        'breakdowns': [
+            ("Attendee type", [(types.get(value, value), total) for value, total in totals('attendee_type')]),
+            ("Country", totals('country', TOP_ROWS)),
+            ("Institution", totals('institution', TOP_ROWS)),
+            ("Day", sorted(totals('day'), reverse=True)[:TOP_ROWS]),
+        ],
+    }
+
+
+# Signal handlers: counts follow saves and deletes in the same transaction
+
+def registration_saving(sender, instance, raw, **kwargs):
+    # The row an edited registration is counted in, before the edit
+    instance._rollup_key = None
+    if raw or paused.get() or instance._state.adding:
+        return
+    old = Registration.objects.filter(pk=instance.pk).values('created_at', *FIELDS).first()
+    if old:
+        instance._rollup_key = row_key(Registration(**old))
+
+
+def registration_saved(sender, instance, created, raw, **kwargs):
+    if raw or paused.get():
+        return
+    changes = Counter()
+    if created:
+        changes[row_key(instance)] += 1
+    elif instance._rollup_key is not None and instance._rollup_key != row_key(instance):
+        changes[instance._rollup_key] -= 1
+        changes[row_key(instance)] += 1
+    apply(changes)
+
+
+def registration_deleted(sender, instance, **kwargs):
+    if not paused.get():
+        apply({row_key(instance): -1})
+
+
+pre_save.connect(registration_saving, sender=Registration, dispatch_uid='rollup_registration_saving')
+post_save.connect(registration_saved, sender=Registration, dispatch_uid='rollup_registration_saved')
+post_delete.connect(registration_deleted, sender=Registration, dispatch_uid='rollup_registration_deleted')
@@ -0,0 +1,28 @@
+from django.db import DEFAULT_DB_ALIAS
+
+from .replica import public_read_alias
+
+# The program shown on the public pages, including the speaker links
+PUBLIC_MODELS = {'speaker', 'session', 'scheduleitem', 'scheduleitem_speakers'}
+
+
+class PublicReadRouter:
+    """
+    Send reads of the public program to the read database.
+
+    Only reads made inside ``conference.replica.public_reads()`` are
+    routed; all writes go to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = public_read_alias.get()
+        if alias and model._meta.app_label == 'conference' and model._meta.model_name in PUBLIC_MODELS:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Also for instances that were loaded from the replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
@@ -0,0 +1,340 @@
+"""In-process search over speakers and schedule items.
+
+Each process keeps an inverted index from terms to documents: speakers by
+name, institution and bio; schedule items by title, description, speaker
+names and session. Text is case- and accent-folded ("Müller" is found by
+"muller") and every query word also matches as a prefix, so results show
+up while the word is being typed. A query costs a few dictionary lookups
+and no database query. A query made only of stop words ("the", "an") is
+matched as prefixes of the words typed, since they usually start a longer
+word ("therapy", "anatomy").
+
+The index follows edits incrementally. When the content version moves
+(see ``conference.cache``), the next search re-reads only the rows
+updated since the last sync, and the ids, to drop deleted rows. In the
+process that made the edit, the signal handlers below have also marked
+the exact rows, which covers changes that leave ``updated_at`` alone. They
+only note primary keys: a saved session's items are looked up by the next
+sync, not on every save. Bulk updates send no signals, so they have to set
+``updated_at`` themselves (see the ``import_speakers`` command).
+
+A full rebuild only happens on first use and after
+``FULL_REBUILD_INTERVAL``, as a safety net.
+"""
+import bisect
+from collections import defaultdict
+import datetime
+import math
+import re
+import threading
+import time
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.utils import timezone
+
+from .cache import get_content_version
+from .models import Speaker, Session, ScheduleItem
+
+SPEAKER = 'speaker'
+ITEM = 'item'
+DOCUMENT_TYPES = (SPEAKER, ITEM)
+# Marked dirty by its id, standing for the items of the session
+SESSION = 'session'
+
+# Weight of a term by the field it appears in
+SPEAKER_FIELDS = (('name', 3.0), ('institution', 1.5), ('title', 1.0), ('bio', 1.0))
+ITEM_FIELDS = (('title', 3.0), ('speakers', 2.0), ('description', 1.0), ('session', 1.0))
+# A query word that only starts a term counts for this much of a full match
+PREFIX_FACTOR = 0.5
+STOP_WORDS = frozenset({'a', 'an', 'and', 'at', 'by', 'for', 'in', 'of', 'on', 'or', 'the', 'to', 'with'})
+
+# Rows updated this long before the last sync are re-read too, for clock
+# skew between servers and transactions that commit late
+SYNC_OVERLAP = 300
+FULL_REBUILD_INTERVAL = 60 * 60
+DEFAULT_LIMIT = 10
+
+WORD = re.compile(r'\w+')
+
+
+def fold(text):
+    """Lower-case and strip accents"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def words(text):
+    return WORD.findall(fold(text))
+
+
+def tokenize(text):
+    return [token for token in words(text) if token not in STOP_WORDS]
+
+
+def speaker_document(speaker):
+    fields = {
+        'name': speaker.name,
+        'institution': speaker.institution,
+        'title': speaker.title,
+        'bio': speaker.bio,
+    }
+    result = {
+        'type': SPEAKER,
+        'id': speaker.id,
+        'name': speaker.name,
+        'title': speaker.title,
+        'institution': speaker.institution,
+    }
+    return fields, result, speaker.is_visible, frozenset()
+
+
+def item_document(item):
+    item_speakers = list(item.speakers.all())
+    speakers = [speaker.name for speaker in item_speakers]
+    fields = {
+        'title': item.title,
+        'description': item.description,
+        'speakers': ' '.join(speakers),
+        'session': item.session.name,
+    }
+    result = {
+        'type': ITEM,
+        'id': item.id,
+        'title': item.title,
+        'session': item.session.name,
+        'date': item.session.date.isoformat(),
+        'start_time': item.start_time.strftime('%H:%M'),
+        'end_time': item.end_time.strftime('%H:%M'),
+        'speakers': speakers,
+    }
+    return fields, result, True, frozenset(speaker.id for speaker in item_speakers)
+
+
+def items_queryset():
+    return ScheduleItem.objects.select_related('session').prefetch_related(
+        Prefetch('speakers', queryset=Speaker.objects.only('id', 'name'))
+    )
+
+
+class SearchIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        # term -> {document key: weight}
+        self.postings = defaultdict(dict)
+        # document key -> (terms, result, visible, speaker ids of an item)
+        self.documents = {}
+        self.sorted_terms = None
+        self.version = None
+        self.synced_at = None
+        self.built_at = None
+        # Rows marked by this process's signal handlers
+        self.dirty = {SPEAKER: set(), ITEM: set(), SESSION: set()}
+
+    # Documents
+
+    def add(self, key, fields, result, visible, speaker_ids):
+        self.remove(key)
+        weights = defaultdict(float)
+        for name, weight in (SPEAKER_FIELDS if key[0] == SPEAKER else ITEM_FIELDS):
+            for term in tokenize(fields[name]):
+                weights[term] += weight
+        for term, weight in weights.items():
+            self.postings[term][key] = weight
+        self.documents[key] = (frozenset(weights), result, visible, speaker_ids)
+        self.sorted_terms = None
+
+    def remove(self, key):
+        document = self.documents.pop(key, None)
+        if document is None:
+            return
+        for term in document[0]:
+            postings = self.postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del self.postings[term]
+        self.sorted_terms = None
+
+    def index_speakers(self, queryset):
+        for speaker in queryset:
+            self.add((SPEAKER, speaker.id), *speaker_document(speaker))
+
+    def index_items(self, queryset):
+        for item in queryset:
+            self.add((ITEM, item.id), *item_document(item))
+
+    # Keeping up with the database
+
+    def rebuild(self):
+        self.clear()
+        self.synced_at = timezone.now()
+        self.built_at = time.monotonic()
+        self.index_speakers(Speaker.objects.all())
+        self.index_items(items_queryset())
+
+    def sync(self):
+        """Re-read what changed since the last sync"""
+        started = timezone.now()
+        since = self.synced_at - datetime.timedelta(seconds=SYNC_OVERLAP)
+        dirty_speakers, dirty_items = set(self.dirty[SPEAKER]), set(self.dirty[ITEM])
+        dirty_sessions = set(self.dirty[SESSION])
+
+        existing_speakers = set(Speaker.objects.values_list('id', flat=True))
+        deleted_speakers = {pk for document_type, pk in self.documents if document_type == SPEAKER} - existing_speakers
+        for pk in deleted_speakers:
+            self.remove((SPEAKER, pk))
+        # Items show their speakers' names, so they change with them
+        dirty_items |= {
+            pk for (document_type, pk), document in self.documents.items()
+            if document_type == ITEM and document[3] & deleted_speakers
+        }
+
+        speakers = list(Speaker.objects.filter(Q(updated_at__gte=since) | Q(pk__in=dirty_speakers)))
+        self.index_speakers(speakers)
+        speaking = ScheduleItem.speakers.through.objects.filter(
+            speaker_id__in=[speaker.id for speaker in speakers]
+        ).values('scheduleitem_id')
+        self.index_items(items_queryset().filter(
+            Q(updated_at__gte=since) | Q(session__updated_at__gte=since) | Q(pk__in=dirty_items)
+            | Q(session_id__in=dirty_sessions) | Q(pk__in=speaking)
+        ))
+
+        existing_items = set(ScheduleItem.objects.values_list('id', flat=True))
+        for key in [key for key in self.documents if key[0] == ITEM and key[1] not in existing_items]:
+            self.remove(key)
+
+        self.synced_at = started
+        self.dirty[SPEAKER] -= dirty_speakers
+        self.dirty[ITEM] -= dirty_items
+        self.dirty[SESSION] -= dirty_sessions
+
+    def refresh(self):
+        """Bring the index up to date if the content has changed"""
+        # Read first, so an edit committed during the sync is seen next time
+        version = get_content_version()
+        if version == self.version:
+            return
+        if self.built_at is None or time.monotonic() - self.built_at > FULL_REBUILD_INTERVAL:
+            self.rebuild()
+        else:
+            self.sync()
+        self.version = version
+
+    def mark_dirty(self, document_type, pk):
+        with self.lock:
+            self.dirty[document_type].add(pk)
+
+    # Querying
+
+    def matching_terms(self, word):
+        """Terms equal to or starting with ``word``"""
+        if self.sorted_terms is None:
+            self.sorted_terms = sorted(self.postings)
+        terms = self.sorted_terms
+        for position in range(bisect.bisect_left(terms, word), len(terms)):
+            if not terms[position].startswith(word):
+                break
+            yield terms[position]
+
+    def scores(self, query, types, include_hidden):
+        query_words = tokenize(query) or words(query)
+        if not query_words:
+            return {}
+        total = max(len(self.documents), 1)
+        scores = None
+        for word in query_words:
+            word_scores = {}
+            for term in self.matching_terms(word):
+                postings = self.postings[term]
+                factor = 1.0 if term == word else PREFIX_FACTOR
+                rarity = math.log(1 + total / len(postings))
+                for key, weight in postings.items():
+                    score = weight * factor * rarity
+                    if score > word_scores.get(key, 0):
+                        word_scores[key] = score
+            # Every word has to match
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {key: score + word_scores[key] for key, score in scores.items() if key in word_scores}
+            if not scores:
+                return {}
+        return {
+            key: score for key, score in scores.items()
+            if key[0] in types and (include_hidden or self.documents[key][2])
+        }
+
+    def search(self, query, types=DOCUMENT_TYPES, limit=DEFAULT_LIMIT, include_hidden=False):
+        """Best matches first, as result dicts with a ``score``"""
+        with self.lock:
+            self.refresh()
+            scores = self.scores(query, types, include_hidden)
+            ranked = sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))
+            return [
+                dict(self.documents[key][1], score=round(score, 3))
+                for key, score in (ranked[:limit] if limit else ranked)
+            ]
+
+    def search_ids(self, query, document_type, include_hidden=True):
+        """Ids of every matching document of one type, best first"""
+        return [result['id'] for result in self.search(query, (document_type,), None, include_hidden)]
+
+
+index = SearchIndex()
+
+
+def search(query, types=DOCUMENT_TYPES, limit=DEFAULT_LIMIT):
+    return index.search(query, types, limit)
+
+
+def build_index():
+    """Build this process's index now, e.g. while warming up"""
+    with index.lock:
+        index.refresh()
+    return len(index.documents)
+
+
+# Signal handlers: this process re-reads exactly the rows it changed
+
+def mark_after_commit(document_type, pk):
+    transaction.on_commit(lambda: index.mark_dirty(document_type, pk))
+
+
+def speaker_changed(sender, instance, **kwargs):
+    mark_after_commit(SPEAKER, instance.pk)
+
+
+def item_changed(sender, instance, **kwargs):
+    mark_after_commit(ITEM, instance.pk)
+
+
+def session_changed(sender, instance, **kwargs):
+    mark_after_commit(SESSION, instance.pk)
+
+
+def speaker_deleted(sender, instance, **kwargs):
+    # The m2m rows go with the speaker without an m2m_changed signal
+    for pk in instance.schedule_items.values_list('id', flat=True):
+        mark_after_commit(ITEM, pk)
+
+
+def item_speakers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        mark_after_commit(ITEM, instance.pk)
+    else:
+        for pk in pk_set or ():
+            mark_after_commit(ITEM, pk)
+
+
+post_save.connect(speaker_changed, sender=Speaker, dispatch_uid='search_speaker_saved')
+post_save.connect(item_changed, sender=ScheduleItem, dispatch_uid='search_item_saved')
+pre_delete.connect(speaker_deleted, sender=Speaker, dispatch_uid='search_speaker_deleted')
+post_save.connect(session_changed, sender=Session, dispatch_uid='search_session_saved')
+m2m_changed.connect(item_speakers_changed, sender=ScheduleItem.speakers.through, dispatch_uid='search_item_speakers')
@@ -0,0 +1,43 @@
+"""Signal handlers that keep cached public content in step with the database"""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_content_version
+from .models import Speaker, Session, ScheduleItem
+
+PUBLIC_CONTENT_MODELS = (Speaker, Session, ScheduleItem)
+
+
+def content_changed(**kwargs):
+    """Bump the content version once the current transaction commits"""
+    # Bumping after commit means no request can cache pre-edit data under
+    # the new version while the admin's transaction is still open
+    transaction.on_commit(bump_content_version)
+
+
+for model in PUBLIC_CONTENT_MODELS:
+    post_save.connect(content_changed, sender=model, dispatch_uid=f'content_changed_save_{model.__name__}')
+    post_delete.connect(content_changed, sender=model, dispatch_uid=f'content_changed_delete_{model.__name__}')
+
+
+@receiver(m2m_changed, sender=ScheduleItem.speakers.through, dispatch_uid='content_changed_item_speakers')
+def item_speakers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Speakers added to or removed from a schedule item"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # Changing the speakers doesn't save the item, but its page content
+    # changed, so its modification time has to move for conditional GETs
+    if not reverse:
+        item_ids = [instance.pk]
+    elif pk_set is not None:
+        item_ids = list(pk_set)
+    else:
+        # post_clear from the speaker side doesn't say which items lost it
+        item_ids = None
+    if item_ids is None:
+        Speaker.objects.filter(pk=instance.pk).update(updated_at=timezone.now())
+    else:
+        ScheduleItem.objects.filter(pk__in=item_ids).update(updated_at=timezone.now())
+    content_changed()
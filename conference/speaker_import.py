@@ -0,0 +1,270 @@
+"""Bulk import of speakers from a folder of photos and CV/bio documents.
+
+The folder is expected to look like ``website_material/``: one or more
+files per speaker (photos in any common format, sometimes a photo inside a
+PDF, and CVs/bios as .docx/.doc/.pdf) whose names mention the speaker.
+Files are grouped by the name tokens they share, or assigned explicitly by
+a manifest. Reading and normalizing the files runs in a process pool; the
+results are then written with one ``bulk_create``/``bulk_update`` in a
+single transaction.
+
+The worker functions are in this module, which doesn't import the models,
+so a worker only needs the settings and the storage; the command still runs
+``django.setup()`` in each worker, which spawned ones start without.
+"""
+import csv
+import difflib
+import fnmatch
+import hashlib
+import io
+import json
+import os
+import re
+import time
+import zipfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .images import encode, generate_derivatives, load_normalized, resize_to_width
+
+PHOTO_EXTENSIONS = {'.jpg', '.jpeg', '.jfif', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff'}
+DOCUMENT_EXTENSIONS = {'.docx', '.doc', '.pdf', '.txt', '.md'}
+DEFAULT_EXCLUDES = ('*agenda*', '*logo*')
+# Longest side of the stored original; the site never shows more
+MAX_PHOTO_WIDTH = 1600
+
+# Filename words that describe the file rather than the speaker
+NOISE_WORDS = {
+    'photo', 'photos', 'picture', 'pic', 'profile', 'cv', 'bio', 'biography', 'short',
+    'dr', 'prof', 'updated', 'curriculum', 'vitae', 'last', 'official', 'format',
+    'revised', 'running', 'engl', 'english', 'copy', 'final', 'new', 'photoar',
+    'jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec',
+}
+BIO_WORDS = {'bio', 'biography'}
+# Token similarity at which two spellings count as the same name
+# (e.g. "arsalan" and "arslan")
+SIMILARITY_THRESHOLD = 0.85
+
+
+def name_tokens(text):
+    """Lowercase name words of a filename, without noise and numbers"""
+    # Split joined names such as "AzzamKhankan" or "NFotiadis"
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+    text = re.sub(r'([A-Z])([A-Z][a-z])', r'\1 \2', text)
+    words = re.split(r'[^A-Za-z]+', text)
+    return [word.lower() for word in words if word and word.lower() not in NOISE_WORDS]
+
+
+def significant(tokens):
+    """Tokens long enough to identify a person (skips initials)"""
+    return {token for token in tokens if len(token) >= 4}
+
+
+def tokens_match(left, right):
+    for a in left:
+        for b in right:
+            if a == b or difflib.SequenceMatcher(None, a, b).ratio() >= SIMILARITY_THRESHOLD:
+                return True
+    return False
+
+
+def display_name(tokens):
+    return ' '.join(token.capitalize() for token in tokens)
+
+
+class SourceFile:
+    """One file in the import folder"""
+
+    def __init__(self, path):
+        self.path = path
+        self.filename = os.path.basename(path)
+        stem, extension = os.path.splitext(self.filename)
+        self.extension = extension.lower()
+        self.tokens = name_tokens(stem)
+        words = set(re.split(r'[^a-z]+', stem.lower()))
+        self.is_photo = (
+            self.extension in PHOTO_EXTENSIONS
+            # A photo that was sent as a PDF
+            or (self.extension == '.pdf' and bool(words & {'photo', 'picture', 'pic'}))
+        )
+        self.is_document = not self.is_photo and self.extension in DOCUMENT_EXTENSIONS
+        self.is_bio = bool(words & BIO_WORDS)
+
+
+class SpeakerSource:
+    """The files that belong to one speaker"""
+
+    def __init__(self, name=None, **fields):
+        self.name = name
+        self.fields = fields
+        self.files = []
+        self.photo = None
+        self.bio = None
+
+    @property
+    def tokens(self):
+        tokens = set(significant(name_tokens(self.name or '')))
+        for source in self.files:
+            tokens |= significant(source.tokens)
+        return tokens
+
+    def choose_files(self):
+        """Pick the photo and the bio document among the grouped files"""
+        photos = [f for f in self.files if f.is_photo]
+        documents = [f for f in self.files if f.is_document]
+        if self.photo is None and photos:
+            # Prefer real image files over a photo inside a PDF
+            self.photo = sorted(photos, key=lambda f: (f.extension == '.pdf', f.filename))[0]
+        if self.bio is None and documents:
+            # A short bio reads better on the site than a full CV, and
+            # .docx/.txt can be read without extra libraries
+            readable = {'.txt': 0, '.md': 0, '.docx': 1, '.pdf': 2, '.doc': 3}
+            self.bio = sorted(
+                documents, key=lambda f: (not f.is_bio, readable.get(f.extension, 9), f.filename)
+            )[0]
+        if not self.name:
+            named = photos or self.files
+            self.name = display_name(min((f.tokens for f in named), key=lambda t: (len(t), t)))
+
+
+def scan_folder(folder, excludes=DEFAULT_EXCLUDES):
+    """List the photo and document files in ``folder``"""
+    files = []
+    for filename in sorted(os.listdir(folder)):
+        path = os.path.join(folder, filename)
+        if not os.path.isfile(path) or filename.startswith('.'):
+            continue
+        if any(fnmatch.fnmatch(filename.lower(), pattern) for pattern in excludes):
+            continue
+        source = SourceFile(path)
+        if (source.is_photo or source.is_document) and source.tokens:
+            files.append(source)
+    return files
+
+
+def group_files(files, speakers=()):
+    """
+    Assign files to speakers by shared name tokens.
+
+    ``speakers`` are pre-defined (e.g. from a manifest) and take the files
+    that match them; the remaining files form new groups among themselves.
+    """
+    groups = list(speakers)
+    for source in files:
+        tokens = significant(source.tokens)
+        match = next((group for group in groups if tokens_match(tokens, group.tokens)), None)
+        if match is None:
+            match = SpeakerSource()
+            groups.append(match)
+        match.files.append(source)
+    for group in groups:
+        group.choose_files()
+    return groups
+
+
+def load_manifest(path, folder):
+    """
+    Read speakers from a JSON list or a CSV file.
+
+    Recognized keys: ``name`` (required), ``title``, ``institution``,
+    ``order``, ``is_visible``, ``photo`` and ``bio`` (file paths relative to
+    the import folder).
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.json'):
+            rows = json.load(f)
+        else:
+            rows = list(csv.DictReader(f))
+
+    speakers = []
+    for row in rows:
+        row = {key: value for key, value in row.items() if value not in (None, '')}
+        source = SpeakerSource(
+            row.pop('name'),
+            **{key: row[key] for key in ('title', 'institution', 'order', 'is_visible') if key in row}
+        )
+        if 'order' in source.fields:
+            source.fields['order'] = int(source.fields['order'])
+        if 'is_visible' in source.fields and isinstance(source.fields['is_visible'], str):
+            source.fields['is_visible'] = source.fields['is_visible'].lower() in ('1', 'true', 'yes')
+        for key in ('photo', 'bio'):
+            if key in row:
+                setattr(source, key, SourceFile(os.path.join(folder, row[key])))
+        speakers.append(source)
+    return speakers
+
+
+def extract_pdf_jpeg(data):
+    """Return the first embedded JPEG of a PDF, or None"""
+    start = data.find(b'\xff\xd8\xff')
+    if start < 0:
+        return None
+    end = data.find(b'endstream', start)
+    return data[start:end].rstrip(b'\r\n') if end > 0 else data[start:]
+
+
+def extract_docx_text(path):
+    with zipfile.ZipFile(path) as document:
+        xml = document.read('word/document.xml').decode('utf-8')
+    paragraphs = re.split(r'</w:p>', xml)
+    text = [re.sub(r'<[^>]+>', '', paragraph) for paragraph in paragraphs]
+    return '\n\n'.join(line.strip() for line in text if line.strip())
+
+
+def extract_pdf_text(path):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ValueError("reading PDF text needs the pypdf package")
+    reader = PdfReader(path)
+    return '\n\n'.join((page.extract_text() or '').strip() for page in reader.pages).strip()
+
+
+def extract_bio(path):
+    """Plain text of a bio/CV document"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.txt', '.md'):
+        with open(path, encoding='utf-8', errors='replace') as f:
+            return f.read().strip()
+    if extension == '.docx':
+        return extract_docx_text(path)
+    if extension == '.pdf':
+        return extract_pdf_text(path)
+    raise ValueError(f"can't read text from {extension} files; convert it to .docx")
+
+
+def process_photo(path):
+    """
+    Normalize a photo and store it under a content-derived name.
+
+    Runs in a worker process. Returns the storage name, which is the same
+    for the same picture on every run, so re-imports are no-ops.
+    """
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        data = f.read()
+    if path.lower().endswith('.pdf'):
+        data = extract_pdf_jpeg(data)
+        if data is None:
+            raise ValueError("no embedded JPEG found in PDF")
+    image = resize_to_width(load_normalized(io.BytesIO(data)), MAX_PHOTO_WIDTH)
+    content = encode(image, 'jpeg')
+    name = f"speakers/{hashlib.sha256(content).hexdigest()[:32]}.jpg"
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+        generate_derivatives(name)
+    return name, time.perf_counter() - started
+
+
+def process_file(kind, path):
+    """Worker entry point returning ``(kind, path, result, error, seconds)``"""
+    started = time.perf_counter()
+    try:
+        if kind == 'photo':
+            result, seconds = process_photo(path)
+        else:
+            result, seconds = extract_bio(path), time.perf_counter() - started
+        return kind, path, result, None, seconds
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as exc:
+        return kind, path, None, str(exc), time.perf_counter() - started
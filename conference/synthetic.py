@@ -0,0 +1,196 @@
+"""Synthetic conference data for load testing and benchmarks.
+
+Generates a program and registrations of any size with bulk inserts, so a
+realistic database (thousands of schedule items, hundreds of thousands of
+registrations) can be built in seconds on SQLite. Values are drawn from a
+seeded random generator, so the same arguments always produce the same data.
+"""
+import datetime
+import hashlib
+import random
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from . import rollups
+from .cache import bump_content_version
+from .images import encode, generate_derivatives
+from .models import Speaker, Session, ScheduleItem, Registration
+
+BATCH_SIZE = 5000
+FIRST_NAMES = (
+    'Ahmad', 'Lina', 'Omar', 'Rania', 'Khaled', 'Sara', 'Yousef', 'Dana', 'Hassan', 'Maya',
+    'John', 'Emma', 'Luca', 'Sofia', 'Kenji', 'Amelie', 'Carlos', 'Ingrid', 'Nikolaos', 'Zeynep',
+)
+LAST_NAMES = (
+    'Haddad', 'Khalil', 'Nasser', 'Saleh', 'Mansour', 'Qasem', 'Darwish', 'Odeh', 'Rahman',
+    'Smith', 'Rossi', 'Müller', 'García', 'Tanaka', 'Dubois', 'Fotiadis', 'Yilmaz', 'Novak',
+)
+INSTITUTIONS = (
+    'KHCC', 'Jordan University Hospital', 'King Abdullah University Hospital', 'Al-Bashir Hospital',
+    'American University of Beirut Medical Center', 'Hamad Medical Corporation', 'Charité Berlin',
+    'Hôpital Européen Georges-Pompidou', 'Mayo Clinic', 'Guy\'s and St Thomas\'', 'Keio University',
+)
+COUNTRIES = (
+    'Jordan', 'Jordan', 'Jordan', 'Saudi Arabia', 'Lebanon', 'Iraq', 'Palestine', 'Egypt',
+    'Qatar', 'United Arab Emirates', 'Germany', 'France', 'United States', 'United Kingdom',
+)
+TOPICS = (
+    'Hepatocellular carcinoma', 'Portal hypertension', 'Uterine fibroid embolization',
+    'Prostate artery embolization', 'Thermal ablation', 'Radioembolization', 'Venous access',
+    'Biliary interventions', 'Peripheral arterial disease', 'Trauma embolization',
+)
+FORMATS = ('Update on', 'Debate:', 'Case review:', 'Techniques in', 'Complications of')
+BREAKS = ('Coffee break', 'Lunch', 'Panel discussion')
+
+
+def person_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def make_photo(rng, size=(600, 800)):
+    """A portrait-sized JPEG with a random gradient, like a real upload"""
+    image = Image.new('RGB', size)
+    draw = ImageDraw.Draw(image)
+    top = [rng.randrange(256) for _ in range(3)]
+    bottom = [rng.randrange(256) for _ in range(3)]
+    for y in range(size[1]):
+        ratio = y / size[1]
+        draw.line([(0, y), (size[0], y)], fill=tuple(int(a + (b - a) * ratio) for a, b in zip(top, bottom)))
+    draw.ellipse([size[0] // 4, size[1] // 6, size[0] * 3 // 4, size[1] // 2], fill=tuple(bottom))
+    return encode(image, 'jpeg')
+
+
+def store_photo(content):
+    """Save under a content-derived name, with derivatives, once"""
+    name = f"speakers/{hashlib.sha256(content).hexdigest()[:32]}.jpg"
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+        generate_derivatives(name)
+    return name
+
+
+def generate_speakers(rng, count, photos=20):
+    """``count`` speakers sharing ``photos`` distinct pictures (0 for none)"""
+    pictures = [store_photo(make_photo(rng)) for _ in range(min(photos, count))]
+    speakers = []
+    for order in range(1, count + 1):
+        photo = pictures[order % len(pictures)] if pictures else None
+        speakers.append(Speaker(
+            name=f"{person_name(rng)} {order}",
+            title=rng.choice(('MD', 'MD, PhD', 'Professor of Radiology', 'Consultant', None)),
+            institution=rng.choice(INSTITUTIONS),
+            bio=' '.join(rng.choice(TOPICS) for _ in range(rng.randint(20, 60))),
+            photo=photo,
+            order=order,
+            is_visible=rng.random() > 0.05,
+        ))
+    return Speaker.objects.bulk_create(speakers, batch_size=BATCH_SIZE)
+
+
+def generate_program(rng, speakers, first_day, days, sessions_per_day, items_per_session):
+    """Sessions of equal length per day, each split into consecutive items"""
+    sessions = []
+    day_start = 8 * 60
+    session_minutes = max(items_per_session * 5, (10 * 60) // max(sessions_per_day, 1))
+    for day in range(days):
+        date = first_day + datetime.timedelta(days=day)
+        for number in range(sessions_per_day):
+            start = day_start + number * session_minutes
+            sessions.append(Session(
+                name=f"Session {number + 1}: {rng.choice(TOPICS)}",
+                description=rng.choice(TOPICS),
+                date=date,
+                start_time=minutes_to_time(start),
+                end_time=minutes_to_time(start + session_minutes),
+            ))
+    sessions = Session.objects.bulk_create(sessions, batch_size=BATCH_SIZE)
+
+    items = []
+    for session in sessions:
+        start = session.start_time.hour * 60 + session.start_time.minute
+        length = session_minutes // max(items_per_session, 1)
+        for number in range(items_per_session):
+            is_break = rng.random() < 0.1
+            items.append(ScheduleItem(
+                session=session,
+                title=rng.choice(BREAKS) if is_break else f"{rng.choice(FORMATS)} {rng.choice(TOPICS).lower()}",
+                start_time=minutes_to_time(start + number * length),
+                end_time=minutes_to_time(start + (number + 1) * length),
+                is_break=is_break,
+            ))
+    items = ScheduleItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+
+    Through = ScheduleItem.speakers.through
+    links = []
+    for item in items:
+        if item.is_break or not speakers:
+            continue
+        for speaker in rng.sample(speakers, min(len(speakers), rng.choice((1, 1, 1, 2, 3)))):
+            links.append(Through(scheduleitem_id=item.id, speaker_id=speaker.id))
+    Through.objects.bulk_create(links, batch_size=BATCH_SIZE)
+    return sessions, items
+
+
+def minutes_to_time(minutes):
+    minutes = min(minutes, 24 * 60 - 1)
+    return datetime.time(minutes // 60, minutes % 60)
+
+
+def generate_registrations(rng, count, until, days=90):
+    """``count`` registrations spread over the ``days`` before ``until``"""
+    types = [value for value, label in Registration.ATTENDEE_TYPES]
+    span = days * 24 * 3600
+    created = 0
+    while created < count:
+        batch = []
+        for number in range(created, min(count, created + BATCH_SIZE)):
+            email = f"attendee{number}@example.com"
+            batch.append(Registration(
+                full_name=person_name(rng),
+                email=email,
+                # bulk_create doesn't call save(), which sets this
+                email_normalized=Registration.normalize_email(email),
+                phone=f"07{rng.randrange(10 ** 8):08d}",
+                institution=rng.choice(INSTITUTIONS),
+                country=rng.choice(COUNTRIES),
+                attendee_type=rng.choice(types),
+                special_requirements=rng.choice(('', '', '', 'Vegetarian', 'Wheelchair access')),
+                created_at=until - datetime.timedelta(seconds=rng.randrange(span)),
+            ))
+        Registration.objects.bulk_create(batch)
+        created += len(batch)
+
+
+def generate(speakers=100, days=3, sessions_per_day=8, items_per_session=10,
+             registrations=10000, photos=20, seed=0, first_day=None):
+    """
+    Replace the program and registrations with synthetic data.
+
+    Returns the number of rows created per model.
+    """
+    rng = random.Random(seed)
+    first_day = first_day or datetime.date(2025, 4, 18)
+    with transaction.atomic():
+        ScheduleItem.objects.all().delete()
+        Session.objects.all().delete()
+        Speaker.objects.all().delete()
+        # Recounted once below rather than one registration at a time
+        with rollups.paused_updates():
+            Registration.objects.all().delete()
+
+        speaker_rows = generate_speakers(rng, speakers, photos)
+        sessions, items = generate_program(rng, speaker_rows, first_day, days, sessions_per_day, items_per_session)
+        generate_registrations(rng, registrations, until=timezone.now())
+        rollups.rebuild()
+        # Bulk operations send no model signals
+        transaction.on_commit(bump_content_version)
+    return {
+        'speakers': len(speaker_rows),
+        'sessions': len(sessions),
+        'schedule_items': len(items),
+        'registrations': registrations,
+    }
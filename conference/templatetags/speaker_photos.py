@@ -0,0 +1,58 @@
+from django import template
+from django.core.files.storage import default_storage
+
+from ..images import derivative_name, has_derivatives, srcset
+
+register = template.Library()
+
+# Rendered widths of the speaker images, for the ``sizes`` attribute
+SIZES_PRESETS = {
+    'avatar': "35px",
+    'card': "(min-width: 992px) 350px, (min-width: 768px) 50vw, 100vw",
+}
+# Derivative used by browsers that ignore ``srcset``
+FALLBACK_WIDTH = 400
+
+
+def photo_name(photo):
+    """Accept an ImageField value or a plain storage name"""
+    return getattr(photo, 'name', photo) or ''
+
+
+@register.simple_tag
+def photo_srcset(photo, fmt='jpeg'):
+    """``srcset`` value listing every derivative of a speaker photo"""
+    return srcset(photo_name(photo), fmt)
+
+
+@register.simple_tag
+def photo_sizes(preset):
+    """``sizes`` value for one of the presets in ``SIZES_PRESETS``"""
+    return SIZES_PRESETS.get(preset, preset)
+
+
+@register.inclusion_tag('conference/includes/speaker_photo.html')
+def speaker_photo(photo, alt, sizes='card', css_class='', style=''):
+    """
+    Render a speaker photo as a responsive ``<picture>``.
+
+    ``sizes`` may be a preset name from ``SIZES_PRESETS`` or any ``sizes``
+    attribute value. Photos without derivatives (not yet backfilled) fall
+    back to the original file.
+    """
+    name = photo_name(photo)
+    context = {
+        'alt': alt,
+        'sizes': SIZES_PRESETS.get(sizes, sizes),
+        'css_class': css_class,
+        'style': style,
+    }
+    if name and has_derivatives(name):
+        context.update({
+            'src': default_storage.url(derivative_name(name, FALLBACK_WIDTH, 'jpeg')),
+            'webp_srcset': srcset(name, 'webp'),
+            'jpeg_srcset': srcset(name, 'jpeg'),
+        })
+    else:
+        context['src'] = default_storage.url(name) if name else ''
+    return context
@@ -1,3 +1,1594 @@
-from django.test import TestCase
+from contextlib import closing
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+import zoneinfo
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.db import IntegrityError, connection, connections, transaction
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from PIL import Image
+
+from . import announcements, compression, conflicts, ics, journal, media, rollups, search
+from .benchmark import AsyncURLConf, percentile
+from .forms import RegistrationForm
+from .images import DERIVATIVE_WIDTHS, derivative_name, generate_derivatives
+from .mail import queue_email, send_pending
+from .middleware import RequestMetrics, current_metrics
+from .prerender import prerender_pages
+from .replica import current_read_alias
+from .warmup import parse_importtime, warm_up
+from .models import (
+    Speaker, Session, ScheduleItem, Registration, OutgoingEmail, Announcement, AnnouncementDelivery,
+    RegistrationRollup,
+)
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+
+class TempMediaMixin:
+    """Points MEDIA_ROOT at a temporary directory for each test"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = self.temporary_directory()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def temporary_directory(self):
+        """A new directory, removed after the test"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        return directory
+
+
+def create_program(days=1, sessions_per_day=1, items_per_session=1, speakers_per_item=1):
+    """Create a synthetic program of the requested size"""
+    speakers = [
+        Speaker.objects.create(name=f"Speaker {i}", institution="KHCC", bio="Bio", order=i)
+        for i in range(speakers_per_item * 2)
+    ]
+    first_day = datetime.date(2025, 4, 18)
+    for day in range(days):
+        for s in range(sessions_per_day):
+            session = Session.objects.create(
+                name=f"Session {day}-{s}",
+                date=first_day + datetime.timedelta(days=day),
+                start_time=datetime.time(8 + s),
+                end_time=datetime.time(9 + s),
+            )
+            for i in range(items_per_session):
+                item = ScheduleItem.objects.create(
+                    session=session,
+                    title=f"Talk {day}-{s}-{i}",
+                    start_time=datetime.time(8 + s, i),
+                    end_time=datetime.time(8 + s, i + 1),
+                )
+                item.speakers.set(speakers[:speakers_per_item])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ScheduleViewTests(TestCase):
+    """The schedule page must load the program with a fixed query budget"""
+
+    def setUp(self):
+        cache.clear()
+
+    def count_queries(self):
+        # Measure a cold render, not a page served from cache
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('schedule'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_renders_program(self):
+        create_program(days=2, sessions_per_day=1, items_per_session=2)
+        response = self.client.get(reverse('schedule'))
+        self.assertContains(response, "Session 1-0")
+        self.assertContains(response, "Talk 0-0-1")
+        self.assertContains(response, "Speaker 0")
+
+    def test_query_count_does_not_grow_with_program(self):
+        create_program(days=1, sessions_per_day=1, items_per_session=1)
+        small = self.count_queries()
+        create_program(days=3, sessions_per_day=4, items_per_session=6, speakers_per_item=2)
+        large = self.count_queries()
+        self.assertEqual(small, large)
+        # Conditional GET validators plus sessions, items and speakers
+        self.assertLessEqual(large, 4)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class HomeViewTests(TestCase):
+    """The homepage preview must load with a fixed query budget"""
+
+    def setUp(self):
+        cache.clear()
+
+    def count_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_preview_shows_first_items_and_remaining_count(self):
+        create_program(days=1, sessions_per_day=2, items_per_session=5)
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, "Talk 0-0-2")
+        self.assertNotContains(response, "Talk 0-0-3")
+        self.assertContains(response, "And 2 more items...")
+        self.assertContains(response, "Speakers: Speaker 0")
+
+    def test_query_count_does_not_grow_with_program(self):
+        create_program(days=1, sessions_per_day=1, items_per_session=1)
+        small = self.count_queries()
+        create_program(days=2, sessions_per_day=3, items_per_session=8, speakers_per_item=2)
+        large = self.count_queries()
+        self.assertEqual(small, large)
+        # Conditional GET validators plus the four preview queries
+        self.assertLessEqual(large, 5)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PublicPageCacheTests(TestCase):
+    """Public pages are served from cache until the program is edited"""
+
+    def setUp(self):
+        cache.clear()
+        create_program(days=2, sessions_per_day=1, items_per_session=2)
+
+    def test_pages_served_from_cache_between_edits(self):
+        for name in ('home', 'speakers', 'schedule'):
+            first = self.client.get(reverse(name))
+            with self.assertNumQueries(0):
+                second = self.client.get(reverse(name))
+            self.assertEqual(first.content, second.content)
+
+    def test_model_edit_invalidates_cached_pages(self):
+        self.client.get(reverse('schedule'))
+        item = ScheduleItem.objects.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            item.title = "Renamed talk"
+            item.save()
+        self.assertContains(self.client.get(reverse('schedule')), "Renamed talk")
+
+    def test_speaker_assignment_invalidates_cached_pages(self):
+        self.client.get(reverse('schedule'))
+        speaker = Speaker.objects.create(name="Late Addition", bio="Bio")
+        with self.captureOnCommitCallbacks(execute=True):
+            ScheduleItem.objects.first().speakers.add(speaker)
+        self.assertContains(self.client.get(reverse('schedule')), "Late Addition")
+
+    def test_delete_invalidates_cached_pages(self):
+        self.client.get(reverse('speakers'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Speaker.objects.filter(name="Speaker 0").delete()
+        self.assertNotContains(self.client.get(reverse('speakers')), "Speaker 0")
+
+    def test_sessions_bypass_page_cache(self):
+        self.client.get(reverse('home'))
+        self.client.cookies['sessionid'] = 'abc'
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('home'))
+        # Program data still comes from cache; only the session is looked up
+        self.assertTrue(all('django_session' in q['sql'] for q in queries))
+
+    def test_admin_inline_edit_invalidates_cached_pages(self):
+        self.client.get(reverse('schedule'))
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        session = Session.objects.first()
+        item = session.items.first()
+        data = {
+            'name': session.name,
+            'date': session.date.isoformat(),
+            'start_time': '08:00',
+            'end_time': '09:00',
+            'items-TOTAL_FORMS': '1',
+            'items-INITIAL_FORMS': '1',
+            'items-MIN_NUM_FORMS': '0',
+            'items-MAX_NUM_FORMS': '1000',
+            'items-0-id': str(item.id),
+            'items-0-session': str(session.id),
+            'items-0-title': "Edited inline",
+            'items-0-start_time': '08:00',
+            'items-0-end_time': '08:01',
+        }
+        editor = Client()
+        editor.force_login(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = editor.post(reverse('admin:conference_session_change', args=[session.id]), data)
+        self.assertEqual(response.status_code, 302)
+        self.assertContains(self.client.get(reverse('schedule')), "Edited inline")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PhotoDerivativeTests(TempMediaMixin, TestCase):
+    """Speaker photos get resized, reoriented and stripped copies"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def make_photo(self, size=(1200, 600), orientation=None):
+        image = Image.new('RGB', size, (200, 30, 30))
+        exif = Image.Exif()
+        exif[0x010F] = "Camera Maker"
+        if orientation:
+            exif[0x0112] = orientation
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', exif=exif.tobytes())
+        return default_storage.save('speakers/photo.jpg', ContentFile(buffer.getvalue()))
+
+    def test_generates_every_width_and_format(self):
+        name = self.make_photo()
+        result = generate_derivatives(name)
+        self.assertEqual(result['written'], len(DERIVATIVE_WIDTHS) * 2)
+        with default_storage.open(derivative_name(name, 400, 'webp')) as f:
+            self.assertEqual(Image.open(f).size, (400, 200))
+
+    def test_applies_orientation_and_strips_metadata(self):
+        # Orientation 6 means the camera stored the image rotated 90 degrees
+        name = self.make_photo(orientation=6)
+        generate_derivatives(name)
+        with default_storage.open(derivative_name(name, 160, 'jpeg')) as f:
+            image = Image.open(f)
+            self.assertEqual(image.size, (160, 320))
+            self.assertEqual(len(image.getexif()), 0)
+
+    def test_pages_use_srcset_once_derivatives_exist(self):
+        name = self.make_photo()
+        Speaker.objects.create(name="Photo Speaker", bio="Bio", photo=name)
+        self.assertNotContains(self.client.get(reverse('speakers')), 'srcset')
+        generate_derivatives(name)
+        cache.clear()
+        response = self.client.get(reverse('speakers'))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, default_storage.url(derivative_name(name, 800, 'jpeg')) + ' 800w')
+
+
+REGISTRATION_DATA = {
+    'full_name': "Test Attendee",
+    'email': "attendee@example.com",
+    'email_confirm': "attendee@example.com",
+    'phone': "0790000000",
+    'institution': "KHCC",
+    'country': "Jordan",
+    'attendee_type': "trainee",
+}
+
+
+class FlakyEmailBackend(LocmemEmailBackend):
+    """Locmem backend that rejects one address and counts connections"""
+    opened = 0
+
+    def open(self):
+        FlakyEmailBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if "bounce@example.com" in message.to:
+                raise ConnectionError("Mailbox unavailable")
+            if "crash@example.com" in message.to:
+                raise KeyboardInterrupt
+        return super().send_messages(messages)
+
+
+class UnreachableEmailBackend(LocmemEmailBackend):
+    def open(self):
+        raise ConnectionRefusedError("Connection refused")
+
+
+class FailingServerEmailBackend(FlakyEmailBackend):
+    """Flaky backend whose server goes down after the first failure"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.down = False
+
+    def open(self):
+        if self.down:
+            raise ConnectionRefusedError("Connection refused")
+        return super().open()
+
+    def send_messages(self, messages):
+        if self.down:
+            raise ConnectionRefusedError("Connection refused")
+        try:
+            return super().send_messages(messages)
+        except ConnectionError:
+            self.down = True
+            raise
+
+
+class EmailOutboxTests(TestCase):
+    """Registration emails go through the outbox instead of SMTP"""
+
+    def test_registration_queues_emails_without_sending(self):
+        response = self.client.post(reverse('registration'), REGISTRATION_DATA)
+        self.assertRedirects(response, reverse('registration_success'))
+        self.assertEqual(Registration.objects.count(), 1)
+        self.assertEqual(OutgoingEmail.objects.filter(status=OutgoingEmail.STATUS_PENDING).count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_sender_delivers_batch_over_one_connection(self):
+        self.client.post(reverse('registration'), REGISTRATION_DATA)
+        FlakyEmailBackend.opened = 0
+        sent, failed = send_pending(connection=FlakyEmailBackend())
+        self.assertEqual((sent, failed), (2, 0))
+        self.assertEqual(FlakyEmailBackend.opened, 1)
+        self.assertEqual(mail.outbox[0].to, ["attendee@example.com"])
+        self.assertFalse(OutgoingEmail.objects.exclude(status=OutgoingEmail.STATUS_SENT).exists())
+
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        email = queue_email("Subject", "Body", ["bounce@example.com"])
+        sent, failed = send_pending(connection=FlakyEmailBackend(), max_attempts=2)
+        self.assertEqual((sent, failed), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.STATUS_PENDING)
+        self.assertGreater(email.next_attempt_at, email.created_at)
+        # Not due yet, so nothing is claimed
+        self.assertEqual(send_pending(connection=FlakyEmailBackend()), (0, 0))
+
+        OutgoingEmail.objects.update(next_attempt_at=email.created_at)
+        send_pending(connection=FlakyEmailBackend(), max_attempts=2)
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.STATUS_FAILED)
+        self.assertEqual(email.attempts, 2)
+        self.assertIn("Mailbox unavailable", email.last_error)
+
+    def test_connection_is_reopened_after_a_failure(self):
+        for address in ("bounce@example.com", "first@example.com", "second@example.com"):
+            queue_email("Subject", "Body", [address])
+        FlakyEmailBackend.opened = 0
+        self.assertEqual(send_pending(connection=FlakyEmailBackend()), (2, 1))
+        self.assertEqual(FlakyEmailBackend.opened, 2)
+
+    def test_unreachable_server_counts_as_an_attempt(self):
+        email = queue_email("Subject", "Body", ["attendee@example.com"])
+        self.assertEqual(send_pending(connection=UnreachableEmailBackend()), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutgoingEmail.STATUS_PENDING, 1))
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertIn("Connection refused", email.last_error)
+
+    def test_delivered_messages_stay_sent_when_the_sender_dies(self):
+        delivered = queue_email("Subject", "Body", ["attendee@example.com"])
+        queue_email("Subject", "Body", ["crash@example.com"])
+        with self.assertRaises(KeyboardInterrupt):
+            send_pending(connection=FlakyEmailBackend())
+        delivered.refresh_from_db()
+        self.assertEqual(delivered.status, OutgoingEmail.STATUS_SENT)
+        # The other message is still claimed, so no sender picks it up yet
+        self.assertEqual(send_pending(connection=FlakyEmailBackend()), (0, 0))
+
+
+class AnnouncementTests(TestCase):
+    """Announcements are queued per registrant and sent over one connection"""
+
+    def setUp(self):
+        for number, (email, attendee_type) in enumerate([
+            ("first@example.com", 'specialist'),
+            ("bounce@example.com", 'trainee'),
+            ("third@example.com", 'trainee'),
+        ]):
+            Registration.objects.create(
+                full_name=f"Attendee {number}", email=email, institution="KHCC", country="Jordan",
+                attendee_type=attendee_type,
+            )
+        self.announcement = Announcement.objects.create(
+            subject="Programme update", message="The keynote moves to Hall A.\n\nSee you there.",
+        )
+
+    def test_registration_emails_render_html_templates(self):
+        self.client.post(reverse('registration'), REGISTRATION_DATA)
+        confirmation, notification = OutgoingEmail.objects.order_by('id')
+        self.assertIn("Dear Test Attendee", confirmation.html_body)
+        self.assertIn(announcements.CONFERENCE_DATE, confirmation.html_body)
+        self.assertIn("attendee@example.com", notification.html_body)
+
+    def test_queue_adds_each_address_once(self):
+        # A legacy duplicate registration, without email_normalized
+        Registration.objects.bulk_create([Registration(
+            full_name="Duplicate", email="First@example.com", institution="KHCC", country="Jordan",
+            attendee_type='specialist',
+        )])
+        self.assertEqual(announcements.queue(self.announcement, chunk_size=2), 3)
+        self.assertEqual(self.announcement.status, Announcement.STATUS_QUEUED)
+        self.assertEqual(announcements.queue(self.announcement), 0)
+
+        Registration.objects.create(
+            full_name="Late", email="late@example.com", institution="KHCC", country="Jordan",
+            attendee_type='trainee',
+        )
+        self.assertEqual(announcements.queue(self.announcement), 1)
+
+    def test_queue_filters_by_attendee_type(self):
+        self.announcement.attendee_type = 'trainee'
+        self.announcement.save()
+        announcements.queue(self.announcement)
+        self.assertEqual(
+            sorted(self.announcement.deliveries.values_list('email', flat=True)),
+            ["bounce@example.com", "third@example.com"],
+        )
+
+    def test_send_records_status_and_resumes(self):
+        announcements.queue(self.announcement)
+        FlakyEmailBackend.opened = 0
+        sent, failed = announcements.send_announcement(self.announcement, rate=0, connection=FlakyEmailBackend())
+        self.assertEqual((sent, failed), (2, 1))
+        # One connection, reopened once after the failure
+        self.assertEqual(FlakyEmailBackend.opened, 2)
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ["first@example.com"])
+        self.assertIn("Dear Attendee 0", message.body)
+        self.assertIn("<p>The keynote moves to Hall A.</p>", message.alternatives[0][0])
+
+        failure = self.announcement.deliveries.get(email="bounce@example.com")
+        self.assertEqual(failure.status, AnnouncementDelivery.STATUS_FAILED)
+        self.assertIn("Mailbox unavailable", failure.last_error)
+        self.announcement.refresh_from_db()
+        self.assertEqual(self.announcement.status, Announcement.STATUS_SENT)
+
+        # Nothing is pending, so running again sends nothing twice
+        self.assertEqual(announcements.send_announcement(self.announcement, rate=0), (0, 0))
+        failure.email = "fixed@example.com"
+        failure.save()
+        self.assertEqual(announcements.send_announcement(self.announcement, rate=0, retry_failed=True), (1, 0))
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_unreachable_server_fails_the_rest_of_the_run(self):
+        announcements.queue(self.announcement)
+        with self.assertLogs('conference.mail', 'WARNING'):
+            result = announcements.send_announcement(
+                self.announcement, rate=0, connection=FailingServerEmailBackend(),
+            )
+        self.assertEqual(result, (1, 2))
+        third = self.announcement.deliveries.get(email="third@example.com")
+        self.assertEqual((third.status, third.attempts), (AnnouncementDelivery.STATUS_FAILED, 1))
+        self.assertIn("Connection refused", third.last_error)
+
+    def test_throttle_spaces_sends(self):
+        now, sleeps = [0.0], []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        throttle = announcements.Throttle(4, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            throttle.wait()
+        self.assertEqual(sleeps, [0.25, 0.25])
+
+    def test_command_sends_queued_announcements(self):
+        out = io.StringIO()
+        call_command('send_announcements', stdout=out, stderr=io.StringIO())
+        self.assertIn("Nothing to send", out.getvalue())
+
+        call_command('send_announcements', str(self.announcement.pk), '--queue', '--rate=0', stdout=out)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn("sent 3, failed 0", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('send_announcements', '999', stdout=out)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PERFORMANCE_SAMPLE_RATE=0, PERFORMANCE_SLOW_REQUEST_MS=10000)
+class PerformanceMiddlewareTests(TestCase):
+    """Requests report their timings via Server-Timing and logging"""
+
+    def setUp(self):
+        cache.clear()
+        create_program()
+
+    @override_settings(PERFORMANCE_SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('schedule'))
+        timing = response['Server-Timing']
+        for metric in ('total;dur=', 'view;dur=', 'tpl;dur=', 'db;dur=', 'email;dur='):
+            self.assertIn(metric, timing)
+        self.assertIn('desc="4 queries"', timing)
+
+    def test_server_timing_is_off_by_default(self):
+        self.assertFalse(self.client.get(reverse('schedule')).has_header('Server-Timing'))
+
+    @override_settings(
+        EMAIL_BACKEND='conference.middleware.TimedEmailBackend',
+        PERFORMANCE_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    def test_email_backend_times_sends(self):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            mail.send_mail("Subject", "Body", "from@example.com", ["to@example.com"])
+        finally:
+            current_metrics.reset(token)
+        self.assertEqual(metrics.emails, 1)
+        self.assertGreater(metrics.email, 0)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_unsampled_fast_requests_are_not_logged(self):
+        with self.assertNoLogs('conference.performance'):
+            self.client.get(reverse('home'))
+
+    @override_settings(PERFORMANCE_SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged_with_metrics(self):
+        with self.assertLogs('conference.performance', 'WARNING') as logs:
+            self.client.get(reverse('speakers'))
+        data = logs.records[0].performance
+        self.assertEqual(data['path'], reverse('speakers'))
+        self.assertEqual(data['status'], 200)
+        self.assertEqual(data['queries'], 2)
+
+
+class RegistrationExportTests(TestCase):
+    """Registrations export as streamed CSV and XLSX"""
+
+    def setUp(self):
+        for i, attendee_type in enumerate(['specialist', 'trainee', 'trainee']):
+            Registration.objects.create(
+                full_name=f"Attendee {i}", email=f"a{i}@example.com", institution="=HYPERLINK()",
+                country="Jordan", attendee_type=attendee_type,
+            )
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+
+    def run_action(self, action, **filters):
+        changelist = reverse('admin:conference_registration_changelist')
+        data = {'action': action, 'select_across': '1', 'index': '0', '_selected_action': ['1']}
+        if filters:
+            changelist += '?' + '&'.join(f'{key}={value}' for key, value in filters.items())
+        return self.client.post(changelist, data)
+
+    def test_csv_action_streams_filtered_changelist(self):
+        response = self.run_action('export_csv', attendee_type__exact='trainee')
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0][:2], ['ID', 'Full name'])
+        self.assertEqual([row[1] for row in rows[1:]], ["Attendee 1", "Attendee 2"])
+        self.assertEqual(rows[1][6], "Trainee/Fellow")
+        # Formulas are neutralized
+        self.assertEqual(rows[1][4], "'=HYPERLINK()")
+
+    def test_csv_keeps_phone_numbers_and_escapes_signed_formulas(self):
+        Registration.objects.filter(full_name="Attendee 1").update(
+            phone="+962 6 530 0460", special_requirements="-2+3+cmd|' /C calc'!A0",
+        )
+        Registration.objects.filter(full_name="Attendee 2").update(
+            phone="-", special_requirements="+SUM(A1:A2)",
+        )
+        response = self.run_action('export_csv', attendee_type__exact='trainee')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(rows[1][3], "+962 6 530 0460")
+        self.assertEqual(rows[1][7], "'-2+3+cmd|' /C calc'!A0")
+        self.assertEqual(rows[2][3], "-")
+        self.assertEqual(rows[2][7], "'+SUM(A1:A2)")
+
+    def test_xlsx_action_produces_valid_workbook(self):
+        response = self.run_action('export_xlsx')
+        data = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(data)) as workbook:
+            self.assertIsNone(workbook.testzip())
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 4)
+        self.assertIn('Attendee 2', sheet)
+
+    def test_command_applies_filters(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'export.csv')
+            call_command('export_registrations', attendee_type='specialist', output=output, stderr=io.StringIO())
+            with open(output, encoding='utf-8-sig') as f:
+                rows = list(csv.reader(f))
+        self.assertEqual([row[1] for row in rows[1:]], ["Attendee 0"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SpeakerImportTests(TempMediaMixin, TestCase):
+    """Speakers are imported from a folder of photos and bios idempotently"""
+
+    def setUp(self):
+        super().setUp()
+        self.folder = self.temporary_directory()
+        Image.new('RGB', (900, 1200), (10, 80, 160)).save(os.path.join(self.folder, 'Jane Doe photo.png'))
+        with open(os.path.join(self.folder, 'Short Bio Dr Jane Doe.txt'), 'w') as f:
+            f.write("Jane is an interventional radiologist.")
+        with open(os.path.join(self.folder, 'Conference Agenda.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4')
+
+    def run_import(self, *args):
+        out = io.StringIO()
+        call_command('import_speakers', self.folder, '--workers', '1', *args, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_imports_matched_photo_and_bio(self):
+        output = self.run_import()
+        speaker = Speaker.objects.get()
+        self.assertEqual(speaker.name, "Jane Doe")
+        self.assertEqual(speaker.bio, "Jane is an interventional radiologist.")
+        self.assertTrue(default_storage.exists(speaker.photo.name))
+        self.assertTrue(default_storage.exists(derivative_name(speaker.photo.name, 80, 'webp')))
+        self.assertIn("Jane Doe photo.png:", output)
+
+    def test_reimport_is_a_no_op(self):
+        self.run_import()
+        photo = Speaker.objects.get().photo.name
+        output = self.run_import()
+        self.assertIn("Created 0 and updated 0 speakers.", output)
+        self.assertEqual(Speaker.objects.get().photo.name, photo)
+
+    def test_updates_existing_speaker_from_manifest(self):
+        Speaker.objects.create(name="Dr. Jane Doe", bio="Existing bio")
+        manifest = os.path.join(self.folder, 'manifest.json')
+        with open(manifest, 'w') as f:
+            f.write('[{"name": "Dr. Jane Doe", "institution": "KHCC", "order": 4}]')
+        self.run_import('--manifest', manifest)
+        speaker = Speaker.objects.get()
+        self.assertEqual((speaker.institution, speaker.order), ("KHCC", 4))
+        # Bios are only filled in, never replaced without --overwrite
+        self.assertEqual(speaker.bio, "Existing bio")
+        self.assertTrue(speaker.photo)
+
+    def existing_speaker(self):
+        """A speaker last edited long ago, before any cache or index was built"""
+        speaker = Speaker.objects.create(name="Jane Doe", bio="Existing bio")
+        Speaker.objects.filter(pk=speaker.pk).update(updated_at=timezone.now() - datetime.timedelta(days=1))
+        return speaker
+
+    def test_updates_change_the_page_validators(self):
+        self.existing_speaker()
+        response = self.client.get(reverse('speakers'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIn("updated 1 speakers", self.run_import('--overwrite'))
+        again = self.client.get(
+            reverse('speakers'),
+            HTTP_IF_NONE_MATCH=response['ETag'], HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(again.status_code, 200)
+        self.assertNotEqual(again['ETag'], response['ETag'])
+        self.assertContains(again, "interventional radiologist")
+
+    def test_updates_reach_the_search_index(self):
+        speaker = self.existing_speaker()
+        search.index.clear()
+        self.assertEqual(search.index.search_ids("radiologist", 'speaker'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_import('--overwrite')
+        self.assertEqual(search.index.search_ids("radiologist", 'speaker'), [speaker.id])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConditionalGetTests(TestCase):
+    """Public pages answer conditional GETs with 304 until content changes"""
+
+    def setUp(self):
+        cache.clear()
+        create_program(days=1, sessions_per_day=1, items_per_session=2)
+
+    def revalidate(self, name, response):
+        return self.client.get(
+            reverse(name),
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+
+    def test_unchanged_pages_return_304_without_queries(self):
+        for name in ('home', 'speakers', 'schedule'):
+            response = self.client.get(reverse(name))
+            self.assertIn('no-cache', response['Cache-Control'])
+            with self.assertNumQueries(0):
+                self.assertEqual(self.revalidate(name, response).status_code, 304)
+
+    def test_validator_is_a_single_query(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('speakers'), HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(len(queries), 2)
+
+    def test_edits_and_deletes_change_the_validators(self):
+        response = self.client.get(reverse('schedule'))
+        with self.captureOnCommitCallbacks(execute=True):
+            ScheduleItem.objects.first().delete()
+        self.assertEqual(self.revalidate('schedule', response).status_code, 200)
+
+        response = self.client.get(reverse('schedule'))
+        speaker = Speaker.objects.create(name="New Speaker", bio="Bio")
+        with self.captureOnCommitCallbacks(execute=True):
+            ScheduleItem.objects.first().speakers.add(speaker)
+        self.assertEqual(self.revalidate('schedule', response).status_code, 200)
+
+    def test_deletes_move_last_modified(self):
+        response = self.client.get(reverse('speakers'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Speaker.objects.first().delete()
+        # Within the same second, without an ETag to compare
+        again = self.client.get(reverse('speakers'), HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(again.status_code, 200)
+        self.assertGreater(parse_http_date(again['Last-Modified']), parse_http_date(response['Last-Modified']))
+
+    def test_deploys_change_the_validators(self):
+        response = self.client.get(reverse('schedule'))
+        with override_settings(CONFERENCE_BUILD_ID='next-release'):
+            self.assertEqual(self.revalidate('schedule', response).status_code, 200)
+            self.assertNotEqual(self.client.get(reverse('schedule'))['ETag'], response['ETag'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class JsonApiTests(TestCase):
+    """The JSON API serves cached snapshots with ETags and gzip"""
+
+    def setUp(self):
+        cache.clear()
+        create_program(days=2, sessions_per_day=1, items_per_session=2)
+
+    def test_schedule_document(self):
+        data = self.client.get(reverse('api_schedule')).json()
+        self.assertEqual([day['date'] for day in data['days']], ['2025-04-18', '2025-04-19'])
+        item = data['days'][0]['sessions'][0]['items'][0]
+        self.assertEqual(item['title'], "Talk 0-0-0")
+        self.assertEqual(item['start_time'], "08:00:00")
+        self.assertEqual(item['speakers'][0]['name'], "Speaker 0")
+
+    def test_snapshot_is_served_from_cache_with_etag(self):
+        response = self.client.get(reverse('api_speakers'))
+        self.assertEqual(len(response.json()['speakers']), 2)
+        with self.assertNumQueries(0):
+            again = self.client.get(reverse('api_speakers'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_gzip_variant(self):
+        plain = self.client.get(reverse('api_schedule'))
+        compressed = self.client.get(reverse('api_schedule'), HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertNotEqual(compressed['ETag'], plain['ETag'])
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+
+    def test_snapshot_rebuilt_after_edit(self):
+        response = self.client.get(reverse('api_schedule'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Session.objects.update(name="Renamed")
+            Session.objects.first().save()
+        again = self.client.get(reverse('api_schedule'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.json()['days'][0]['sessions'][0]['name'], "Renamed")
+
+
+class RegistrationEmailUniquenessTests(TestCase):
+    """An email address can only register once, whatever its case"""
+
+    def test_duplicate_email_is_rejected_case_insensitively(self):
+        self.client.post(reverse('registration'), REGISTRATION_DATA)
+        data = dict(REGISTRATION_DATA, email="Attendee@Example.com ", email_confirm="Attendee@Example.com ")
+        with self.assertNumQueries(1):
+            form = RegistrationForm(data)
+            self.assertFalse(form.is_valid())
+        self.assertIn('email', form.errors)
+        self.assertEqual(Registration.objects.count(), 1)
+
+    def test_database_enforces_uniqueness(self):
+        Registration.objects.create(email="a@example.com", full_name="A", institution="X", country="Y",
+                                    attendee_type='trainee')
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Registration.objects.create(email="A@example.com", full_name="B", institution="X",
+                                            country="Y", attendee_type='trainee')
+
+    def test_edited_email_is_normalized_and_checked(self):
+        registration = Registration.objects.create(
+            email="old@example.com", full_name="A", institution="X", country="Y", attendee_type='trainee',
+        )
+        Registration.objects.create(email="taken@example.com", full_name="B", institution="X", country="Y",
+                                    attendee_type='trainee')
+        registration.email = "New@Example.com"
+        registration.save()
+        registration.refresh_from_db()
+        self.assertEqual(registration.email_normalized, "new@example.com")
+        # The old address is free again
+        self.assertFalse(RegistrationForm(dict(
+            REGISTRATION_DATA, email="old@example.com", email_confirm="old@example.com",
+        )).errors)
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        data = {
+            'full_name': "A", 'email': "Taken@example.com", 'institution': "X", 'country': "Y",
+            'attendee_type': 'trainee',
+        }
+        response = self.client.post(reverse('admin:conference_registration_change', args=[registration.pk]), data)
+        self.assertContains(response, "already registered")
+        registration.refresh_from_db()
+        self.assertEqual(registration.email_normalized, "new@example.com")
+
+    def test_legacy_duplicate_keeps_null_until_its_email_changes(self):
+        Registration.objects.create(email="a@example.com", full_name="A", institution="X", country="Y",
+                                    attendee_type='trainee')
+        legacy, = Registration.objects.bulk_create([Registration(
+            email="A@example.com", full_name="B", institution="X", country="Y", attendee_type='trainee',
+        )])
+        legacy = Registration.objects.get(pk=legacy.pk)
+        legacy.institution = "Z"
+        legacy.save()
+        self.assertIsNone(Registration.objects.get(pk=legacy.pk).email_normalized)
+        legacy.email = "b@example.com"
+        legacy.save()
+        self.assertEqual(Registration.objects.get(pk=legacy.pk).email_normalized, "b@example.com")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BenchmarkTests(TempMediaMixin, TestCase):
+    """Synthetic data generation and the benchmark harness"""
+
+    def test_nearest_rank_percentiles(self):
+        values = list(range(1, 31))
+        # p * n is an odd integer: rank 3, not 4
+        self.assertEqual(percentile(values, 0.1), 3)
+        self.assertEqual(percentile(values, 0.5), 15)
+        self.assertEqual(percentile(values, 0.95), 29)
+        self.assertEqual(percentile(values, 0), 1)
+        self.assertEqual(percentile(values, 1), 30)
+        self.assertEqual(percentile([7], 0.99), 7)
+
+    def test_generates_requested_scale(self):
+        call_command(
+            'generate_conference_data', scale='small', speakers=5, days=2, sessions_per_day=2,
+            items_per_session=3, registrations=120, photos=2, stdout=io.StringIO(),
+        )
+        self.assertEqual(Speaker.objects.count(), 5)
+        self.assertEqual(Session.objects.count(), 4)
+        self.assertEqual(ScheduleItem.objects.count(), 12)
+        self.assertEqual(Registration.objects.count(), 120)
+        self.assertFalse(Registration.objects.filter(email_normalized=None).exists())
+        # Spread over past days, not all stamped with the insert time
+        self.assertGreater(Registration.objects.dates('created_at', 'day').count(), 1)
+
+    def test_benchmark_writes_json_report(self):
+        call_command(
+            'generate_conference_data', speakers=3, days=1, sessions_per_day=1,
+            items_per_session=2, registrations=10, photos=0, stdout=io.StringIO(),
+        )
+        output = os.path.join(self.temporary_directory(), 'results.json')
+        call_command('benchmark', iterations=2, warmup=0, output=output, stdout=io.StringIO())
+        with open(output) as f:
+            report = json.load(f)
+        results = {(r['scenario'], r['mode']): r for r in report['results']}
+        # Two timed registration POSTs and one traced for memory
+        self.assertEqual(report['dataset']['registrations'], 13)
+        self.assertEqual(results[('schedule', 'warm')]['queries'], 0)
+        self.assertGreater(results[('schedule', 'cold')]['queries'], 0)
+        self.assertTrue(all(r['errors'] == 0 for r in report['results']))
+        self.assertIn(('admin_registrations', 'live'), results)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CONFERENCE_PRERENDER=True)
+class PrerenderTests(TempMediaMixin, TestCase):
+    """Pre-rendered pages are served without views or queries"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.root = self.temporary_directory()
+        settings_override = override_settings(CONFERENCE_PRERENDER_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        create_program()
+
+    def test_pages_served_from_files_without_queries(self):
+        prerender_pages()
+        for name in ('home', 'speakers', 'schedule', 'registration', 'registration_success'):
+            with self.assertNumQueries(0):
+                response = self.client.get(reverse(name), HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b"Talk 0-0-0", gzip.decompress(self.client.get(
+            reverse('schedule'), HTTP_ACCEPT_ENCODING='gzip').content))
+
+        response = self.client.get(reverse('speakers'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        with self.assertNumQueries(0):
+            revalidated = self.client.get(reverse('speakers'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_stale_files_fall_back_to_views(self):
+        prerender_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            Speaker.objects.filter(name="Speaker 0").get().save()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('speakers'))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(queries), 0)
+
+    def test_admin_save_renders_pages_again(self):
+        prerender_pages()
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        speaker = Speaker.objects.get(name="Speaker 0")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin:conference_speaker_change', args=[speaker.pk]), {
+                'name': "Renamed Speaker", 'bio': "Bio", 'order': 0, 'is_visible': 'on',
+            })
+        self.client.logout()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('speakers'))
+        self.assertContains(response, "Renamed Speaker")
+
+    def test_registration_form_fetches_csrf_token(self):
+        self.check_prerendered_registration()
+
+    @override_settings(ROOT_URLCONF=AsyncURLConf)
+    def test_async_registration_form_fetches_csrf_token(self):
+        self.check_prerendered_registration()
+
+    def check_prerendered_registration(self):
+        prerender_pages()
+        client = Client(enforce_csrf_checks=True)
+        page = client.get(reverse('registration'))
+        self.assertContains(page, 'name="csrfmiddlewaretoken" value="" data-token-url=')
+        token = client.get(reverse('registration_csrf')).json()['token']
+        response = client.post(reverse('registration'), dict(REGISTRATION_DATA, csrfmiddlewaretoken=token))
+        self.assertRedirects(response, reverse('registration_success'), fetch_redirect_response=False)
+        # Without a token the form is still protected
+        rejected = Client(enforce_csrf_checks=True).post(reverse('registration'), REGISTRATION_DATA)
+        self.assertEqual(rejected.status_code, 403)
+
+
+REPLICA = 'test_replica'
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CONFERENCE_READ_DATABASE=REPLICA)
+class ReadReplicaTests(TestCase):
+    """Public reads go to the replica once it has caught up"""
+
+    @classmethod
+    def setUpClass(cls):
+        # A SQLite replica of this class's own, so the rest of the suite
+        # needs no second database and reads from the primary
+        cls.replica_directory = tempfile.mkdtemp()
+        connections.settings[REPLICA] = connections.configure_settings({**connections.settings, REPLICA: {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.replica_directory, 'replica.sqlite3'),
+        }})[REPLICA]
+        call_command('migrate', database=REPLICA, verbosity=0)
+        cls.databases = {'default', REPLICA}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        shutil.rmtree(cls.replica_directory)
+
+    def setUp(self):
+        cache.clear()
+        create_program(sessions_per_day=2, items_per_session=2)
+
+    def test_lagging_replica_is_not_used(self):
+        self.assertEqual(current_read_alias(), 'default')
+        response = self.client.get(reverse('schedule'))
+        self.assertContains(response, "Talk 0-1-1")
+
+    def test_public_pages_read_from_synced_replica(self):
+        call_command('sync_read_replica', stdout=io.StringIO())
+        self.assertEqual(ScheduleItem.objects.using(REPLICA).count(), 4)
+        self.assertEqual(current_read_alias(), REPLICA)
+
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.client.get(reverse('schedule'))
+            self.client.get(reverse('api_speakers'))
+        self.assertContains(response, "Talk 0-1-1")
+        self.assertEqual(len(primary), 0)
+        self.assertGreater(len(replica), 0)
+
+    def test_writes_and_admin_stay_on_primary(self):
+        call_command('sync_read_replica', stdout=io.StringIO())
+        self.client.post(reverse('registration'), REGISTRATION_DATA)
+        self.assertEqual(Registration.objects.using('default').count(), 1)
+        self.assertEqual(Registration.objects.using(REPLICA).count(), 0)
+
+        # An edit the replica hasn't seen yet shows up in the admin
+        Speaker.objects.filter(name="Speaker 0").update(name="Edited Speaker")
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        self.assertContains(self.client.get(reverse('admin:conference_speaker_changelist')), "Edited Speaker")
+
+
+class RegistrationJournalTests(TempMediaMixin, TestCase):
+    """Registrations accepted into the journal reach the database once"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = self.temporary_directory()
+        settings_override = override_settings(
+            CONFERENCE_REGISTRATION_JOURNAL=os.path.join(self.directory, 'journal.sqlite3'),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def register(self, email):
+        return self.client.post(reverse('registration'), dict(REGISTRATION_DATA, email=email, email_confirm=email))
+
+    def test_registration_is_journaled_without_queries(self):
+        with self.assertNumQueries(0):
+            response = self.register("attendee@example.com")
+        self.assertRedirects(response, reverse('registration_success'), fetch_redirect_response=False)
+        self.assertContains(self.client.get(reverse('registration_success')), "has been received")
+        self.assertEqual(Registration.objects.count(), 0)
+        self.assertEqual(journal.counts(), {'pending': 1})
+
+        # The same address is rejected straight from the journal
+        self.assertContains(self.register("Attendee@Example.com"), "already registered")
+
+    def test_flush_inserts_in_one_batch_with_emails(self):
+        for number in range(5):
+            self.register(f"attendee{number}@example.com")
+        # Registered directly while its journal entry was pending
+        Registration.objects.create(
+            full_name="Direct", email="Attendee4@example.com", institution="KHCC",
+            country="Jordan", attendee_type="trainee",
+        )
+
+        with self.assertNumQueries(8):
+            # tokens, emails, savepoint, two bulk inserts, rollup count, release, ids
+            flushed, duplicates = journal.flush()
+        self.assertEqual((flushed, duplicates), (4, 1))
+        self.assertEqual(Registration.objects.count(), 5)
+        self.assertEqual(OutgoingEmail.objects.count(), 8)
+        registration = Registration.objects.get(email="attendee0@example.com")
+        self.assertEqual(registration.email_normalized, "attendee0@example.com")
+        self.assertEqual(journal.counts(), {'flushed': 4, 'duplicate': 1})
+
+    def test_flush_after_crash_does_not_insert_twice(self):
+        self.register("attendee@example.com")
+        with closing(journal.connect()) as db:
+            entry = journal.pending(db, 1)[0]
+            # The database commit happened, marking the journal did not
+            journal.insert([journal.build_registration(entry)])
+        self.assertEqual(journal.flush(), (1, 0))
+        self.assertEqual(Registration.objects.count(), 1)
+        self.assertEqual(OutgoingEmail.objects.count(), 2)
+        self.assertEqual(journal.flush(), (0, 0))
+
+
+@override_settings(CACHES=LOCMEM_CACHES, ROOT_URLCONF=AsyncURLConf)
+class AsyncViewTests(TestCase):
+    """The async views serve the same pages as the sync ones"""
+
+    def setUp(self):
+        cache.clear()
+        create_program(days=1, sessions_per_day=2, items_per_session=5)
+
+    async def test_public_pages_render(self):
+        home = await self.async_client.get(reverse('home'))
+        self.assertContains(home, "Talk 0-0-2")
+        self.assertContains(home, "And 2 more items...")
+        self.assertContains(await self.async_client.get(reverse('speakers')), "Speaker 0")
+        schedule = await self.async_client.get(reverse('schedule'))
+        self.assertContains(schedule, "Talk 0-1-4")
+
+        cached = await self.async_client.get(reverse('schedule'), headers={'if-none-match': schedule['ETag']})
+        self.assertEqual(cached.status_code, 304)
+
+    async def test_registration_saves_and_queues_emails(self):
+        response = await self.async_client.post(reverse('registration'), REGISTRATION_DATA)
+        self.assertRedirects(response, reverse('registration_success'), fetch_redirect_response=False)
+        self.assertEqual(await Registration.objects.acount(), 1)
+        self.assertEqual(await OutgoingEmail.objects.acount(), 2)
+
+        data = dict(REGISTRATION_DATA, email="ATTENDEE@example.com", email_confirm="ATTENDEE@example.com")
+        self.assertContains(await self.async_client.post(reverse('registration'), data), "already registered")
+        self.assertEqual(await Registration.objects.acount(), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class WarmupTests(TestCase):
+    """A warmed-up worker serves the first visitor from cache"""
+
+    def setUp(self):
+        cache.clear()
+        create_program(days=1, sessions_per_day=1, items_per_session=2)
+
+    def test_warm_up_fills_page_caches(self):
+        report = warm_up()
+        self.assertEqual(set(report), {'database_ms', 'templates_ms', 'media_ms', 'caches_ms', 'search_ms', 'total_ms'})
+        with self.assertNumQueries(0):
+            # The conditional GET check is cached with the pages
+            for name in ('home', 'speakers', 'schedule'):
+                self.assertEqual(self.client.get(reverse(name)).status_code, 200)
+
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   django.utils\n"
+            "import time:      3000 |       3120 | django\n"
+        )
+        self.assertEqual(parse_importtime(output), [('django.utils', 120, 120), ('django', 3000, 3120)])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SearchTests(TestCase):
+    """The in-process index finds speakers and talks as they are typed"""
+
+    def setUp(self):
+        cache.clear()
+        search.index.clear()
+        self.speaker = Speaker.objects.create(
+            name="Jürgen Müller", institution="Charité Berlin", bio="Works on TACE and radioembolization",
+        )
+        session = Session.objects.create(
+            name="Liver", date=datetime.date(2025, 4, 18),
+            start_time=datetime.time(9), end_time=datetime.time(10),
+        )
+        self.item = ScheduleItem.objects.create(
+            session=session, title="TACE for hepatocellular carcinoma",
+            start_time=datetime.time(9), end_time=datetime.time(9, 30),
+        )
+        self.item.speakers.add(self.speaker)
+
+    def found(self, query, **kwargs):
+        return [(result['type'], result['id']) for result in search.search(query, **kwargs)]
+
+    def test_ranked_accent_folded_prefix_matches(self):
+        speaker, item = ('speaker', self.speaker.id), ('item', self.item.id)
+        self.assertEqual(self.found("muller"), [speaker, item])
+        self.assertEqual(self.found("TACE"), [item, speaker])
+        self.assertEqual(self.found("hepato carc"), [item])
+        self.assertEqual(self.found("charite"), [speaker])
+        self.assertEqual(self.found("tace nothing"), [])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.found("jurg", types=('speaker',)), [speaker])
+
+    def test_index_follows_edits(self):
+        self.found("tace")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.speaker.name = "Lina Haddad"
+            self.speaker.save()
+        self.assertEqual(self.found("muller"), [])
+        self.assertEqual(search.search("haddad", types=('item',))[0]['speakers'], ["Lina Haddad"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.delete()
+            Speaker.objects.filter(pk=self.speaker.pk).update(is_visible=False)
+            Speaker.objects.get(pk=self.speaker.pk).save()
+        self.assertEqual(self.found("tace"), [])
+        self.assertEqual(search.index.search_ids("haddad", 'speaker'), [self.speaker.id])
+
+    def test_stop_words_alone_match_as_prefixes(self):
+        anders = Speaker.objects.create(name="Anders Thérond", bio="Bio")
+        self.assertEqual(self.found("the"), [('speaker', anders.id)])
+        self.assertEqual(self.found("an the"), [('speaker', anders.id)])
+        # Next to other words they are still ignored
+        self.assertEqual(self.found("the muller"), self.found("muller"))
+
+    def test_saving_a_session_costs_no_extra_query(self):
+        self.found("tace")
+        session = self.item.session
+        session.name = "Hepatobiliary"
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(1):
+            session.save()
+        self.assertEqual(self.found("hepatobiliary"), [('item', self.item.id)])
+
+    def test_search_endpoint_and_admin_autocomplete(self):
+        response = self.client.get(reverse('api_search'), {'q': "tace", 'type': 'item'})
+        self.assertEqual(response.json()['results'][0]['title'], "TACE for hepatocellular carcinoma")
+
+        Speaker.objects.create(name="Omar Nasser", bio="Bio")
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'conference', 'model_name': 'scheduleitem', 'field_name': 'speakers', 'term': "mull",
+        })
+        self.assertEqual([result['id'] for result in response.json()['results']], [str(self.speaker.id)])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CalendarFeedTests(TestCase):
+    """iCalendar feeds in conference time, served from one snapshot per version"""
+
+    def setUp(self):
+        cache.clear()
+        create_program(days=2, sessions_per_day=1, items_per_session=2)
+
+    def test_conference_feed(self):
+        response = self.client.get(reverse('ics_conference'))
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = response.content.decode()
+        self.assertTrue(body.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertEqual(body.count("BEGIN:VEVENT"), 4)
+        self.assertIn("DTSTART;TZID=Asia/Amman:20250418T080000\r\n", body)
+        self.assertIn("DTEND;TZID=Asia/Amman:20250419T080100\r\n", body)
+        self.assertIn("TZOFFSETTO:+0300\r\n", body)
+
+        with self.assertNumQueries(0):
+            compressed = self.client.get(reverse('ics_conference'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(gzip.decompress(compressed.content), response.content)
+        again = self.client.get(reverse('ics_conference'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_day_and_speaker_feeds(self):
+        day = self.client.get(reverse('ics_day', args=['2025-04-19'])).content.decode()
+        self.assertEqual(day.count("BEGIN:VEVENT"), 2)
+        self.assertIn("SUMMARY:Talk 1-0-0", day)
+        self.assertNotIn("Talk 0-0-0", day)
+        self.assertEqual(self.client.get(reverse('ics_day', args=['2025-05-01'])).status_code, 404)
+        # Not a day: the resolver answers without reaching the view
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/calendar/day/2025-02-30.ics').status_code, 404)
+            self.assertEqual(self.client.get('/calendar/day/tomorrow.ics').status_code, 404)
+        with self.assertRaises(NoReverseMatch):
+            reverse('ics_day', args=['19 April'])
+
+        speaker, other = Speaker.objects.order_by('order')[:2]
+        feed = self.client.get(reverse('ics_speaker', args=[speaker.id])).content.decode()
+        self.assertEqual(feed.count("BEGIN:VEVENT"), 4)
+        self.assertIn("X-WR-CALNAME:KHCC Interventional Oncology Conference – Speaker 0", feed)
+        self.assertEqual(self.client.get(reverse('ics_speaker', args=[other.id])).status_code, 404)
+
+    def test_long_lines_are_folded_between_characters(self):
+        line = "SUMMARY:" + "Ablation thermique – état de l'art " * 4
+        folded = ics.fold(line)
+        self.assertTrue(all(len(part.encode()) <= 75 for part in folded.split("\r\n")))
+        self.assertEqual(folded.replace("\r\n ", ""), line)
+
+    def test_time_zone_with_daylight_saving(self):
+        lines = ics.vtimezone(zoneinfo.ZoneInfo('Europe/Berlin'), datetime.date(2025, 4, 18), datetime.date(2025, 4, 19))
+        text = "\n".join(lines)
+        self.assertIn("BEGIN:DAYLIGHT\nDTSTART:20250330T020000\nTZOFFSETFROM:+0100\nTZOFFSETTO:+0200", text)
+        self.assertIn("BEGIN:STANDARD\nDTSTART:20251026T030000\nTZOFFSETFROM:+0200\nTZOFFSETTO:+0100", text)
+
+
+class ScheduleConflictTests(TestCase):
+    def setUp(self):
+        self.speaker = Speaker.objects.create(name="Dr. Busy", institution="KHCC", bio="Bio")
+        self.morning = Session.objects.create(
+            name="Morning", date=datetime.date(2025, 4, 18),
+            start_time=datetime.time(8), end_time=datetime.time(10),
+        )
+        self.parallel = Session.objects.create(
+            name="Parallel", date=datetime.date(2025, 4, 18),
+            start_time=datetime.time(8), end_time=datetime.time(10),
+        )
+
+    def add_item(self, session, title, start, end, speakers=()):
+        item = ScheduleItem.objects.create(
+            session=session, title=title, start_time=datetime.time(*start), end_time=datetime.time(*end),
+        )
+        item.speakers.set(speakers)
+        return item
+
+    def test_audit_finds_overlaps_and_double_bookings(self):
+        self.add_item(self.morning, "Opening", (8, 0), (8, 30), [self.speaker])
+        self.add_item(self.morning, "Keynote", (8, 20), (9, 0))
+        # Touching items don't overlap
+        self.add_item(self.morning, "Panel", (9, 0), (9, 30))
+        self.add_item(self.parallel, "Workshop", (8, 15), (8, 45), [self.speaker])
+        # Same time, another day
+        other_day = Session.objects.create(
+            name="Day two", date=datetime.date(2025, 4, 19),
+            start_time=datetime.time(8), end_time=datetime.time(9),
+        )
+        self.add_item(other_day, "Repeat", (8, 0), (8, 30), [self.speaker])
+
+        with self.assertNumQueries(2):
+            found = conflicts.audit()
+        self.assertEqual(
+            [(c.kind, c.first.title, c.second.title) for c in found],
+            [(conflicts.SPEAKER_CONFLICT, "Opening", "Workshop"), (conflicts.SESSION_OVERLAP, "Opening", "Keynote")],
+        )
+        self.assertIn("Dr. Busy is booked for both", found[0].message)
+
+        out = io.StringIO()
+        call_command('audit_schedule', stdout=out)
+        self.assertIn("1 overlapping items, 1 speaker conflicts", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('audit_schedule', '--fail-on-conflicts', stdout=io.StringIO())
+
+    def test_item_past_midnight(self):
+        late = self.add_item(self.morning, "Gala", (23, 0), (1, 0))
+        slot = conflicts.load_slots(ScheduleItem.objects.filter(pk=late.pk))[0][0]
+        self.assertEqual(slot.end - slot.start, 120)
+        self.add_item(self.morning, "Late talk", (23, 30), (23, 45))
+        self.assertEqual(len(conflicts.audit()), 1)
+
+    def test_admin_rejects_double_booking(self):
+        self.add_item(self.parallel, "Workshop", (8, 15), (8, 45), [self.speaker])
+        editor = Client()
+        editor.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        data = {
+            'session': str(self.morning.id),
+            'title': "Opening",
+            'start_time': '08:00',
+            'end_time': '08:30',
+            'speakers': [str(self.speaker.id)],
+            'order': '0',
+        }
+        response = editor.post(reverse('admin:conference_scheduleitem_add'), data)
+        self.assertContains(response, "Dr. Busy is booked for both")
+        data['start_time'], data['end_time'] = '08:45', '09:15'
+        response = editor.post(reverse('admin:conference_scheduleitem_add'), data)
+        self.assertEqual(response.status_code, 302)
+
+    def test_admin_inline_rejects_overlapping_items(self):
+        editor = Client()
+        editor.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        data = {
+            'name': self.morning.name,
+            'date': self.morning.date.isoformat(),
+            'start_time': '08:00',
+            'end_time': '10:00',
+            'items-TOTAL_FORMS': '2',
+            'items-INITIAL_FORMS': '0',
+            'items-MIN_NUM_FORMS': '0',
+            'items-MAX_NUM_FORMS': '1000',
+            'items-0-title': "Opening",
+            'items-0-start_time': '08:00',
+            'items-0-end_time': '08:30',
+            'items-1-title': "Keynote",
+            'items-1-start_time': '08:15',
+            'items-1-end_time': '09:00',
+        }
+        url = reverse('admin:conference_session_change', args=[self.morning.id])
+        response = editor.post(url, data)
+        self.assertContains(response, "overlaps")
+        self.assertFalse(self.morning.items.exists())
+        data['items-1-start_time'] = '08:30'
+        self.assertEqual(editor.post(url, data).status_code, 302)
+        self.assertEqual(self.morning.items.count(), 2)
+
+
+class MediaServingTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.name = default_storage.save('speakers/photo.jpg', ContentFile(b"0123456789" * 100))
+
+    def test_hashed_url_is_immutable(self):
+        url = default_storage.url(self.name)
+        self.assertRegex(url, r'^/media/speakers/photo\.[0-9a-f]{12}\.jpg$')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b"0123456789" * 100)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+        plain = self.client.get('/media/speakers/photo.jpg')
+        self.assertEqual(plain['Cache-Control'], 'public, max-age=3600')
+
+    def test_files_are_hashed_when_saved_and_warmed(self):
+        path = default_storage.path(self.name)
+        self.assertIn(path, media._hashes)
+        media._hashes.clear()
+        self.assertEqual(media.hash_media(), 1)
+        self.assertIn(media._hashes[path][2], default_storage.url(self.name))
+        default_storage.delete(self.name)
+        self.assertNotIn(path, media._hashes)
+
+    def test_replacing_the_file_changes_the_url(self):
+        old_url = default_storage.url(self.name)
+        with open(default_storage.path(self.name), 'wb') as f:
+            f.write(b"a new photo")
+        new_url = default_storage.url(self.name)
+        self.assertNotEqual(new_url, old_url)
+        self.assertRedirects(self.client.get(old_url), new_url, fetch_redirect_response=False)
+        self.assertEqual(b''.join(self.client.get(new_url).streaming_content), b"a new photo")
+
+    def test_byte_ranges(self):
+        url = default_storage.url(self.name)
+        response = self.client.get(url, HTTP_RANGE='bytes=10-14')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-14/1000')
+        self.assertEqual(b''.join(response.streaming_content), b"01234")
+        self.assertEqual(b''.join(self.client.get(url, HTTP_RANGE='bytes=-3').streaming_content), b"789")
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=2000-').status_code, 416)
+        # A range for another version of the file is ignored
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"other"').status_code, 200)
+
+    def test_unknown_and_outside_files(self):
+        self.assertEqual(self.client.get('/media/speakers/missing.0123456789ab.jpg').status_code, 404)
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/speakers/').status_code, 404)
+
+    @override_settings(CONFERENCE_MEDIA_SENDFILE='x-accel-redirect')
+    def test_front_server_sends_the_file(self):
+        response = self.client.get(default_storage.url(self.name), HTTP_RANGE='bytes=0-1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/speakers/photo.jpg')
+        self.assertEqual(response.content, b'')
+
+
+class ContentAddressedPhotoTests(TempMediaMixin, TestCase):
+    def jpeg(self, color=(10, 120, 200)):
+        buffer = io.BytesIO()
+        Image.new('RGB', (100, 100), color).save(buffer, format='JPEG')
+        return buffer.getvalue()
+
+    def test_identical_uploads_share_a_file(self):
+        first = Speaker.objects.create(name="First", bio="Bio")
+        second = Speaker.objects.create(name="Second", bio="Bio")
+        first.photo.save('Portrait.JPG', ContentFile(self.jpeg()))
+        second.photo.save('copy.jpg', ContentFile(self.jpeg()))
+        self.assertEqual(first.photo.name, second.photo.name)
+        self.assertRegex(first.photo.name, r'^speakers/[0-9a-f]{32}\.jpg$')
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'speakers')), [os.path.basename(first.photo.name)])
+
+        name = first.photo.name
+        generate_derivatives(name)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(default_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(derivative_name(name, 80, 'jpeg')))
+
+    def test_clean_media_merges_duplicates_and_removes_orphans(self):
+        photo = self.jpeg()
+        names = [default_storage.save(f'speakers/{name}', ContentFile(data)) for name, data in (
+            ('a.jpg', photo), ('b.jpg', photo), ('.jpg', self.jpeg((0, 0, 0))), ('recent.jpg', b"uploading"),
+        )]
+        week_ago = time.time() - 7 * 24 * 60 * 60
+        for name in names[:3]:
+            os.utime(default_storage.path(name), (week_ago, week_ago))
+        Speaker.objects.create(name="A", bio="Bio", photo='speakers/a.jpg')
+        moved = Speaker.objects.create(name="B", bio="Bio", photo='speakers/b.jpg')
+
+        out = io.StringIO()
+        call_command('clean_media', stdout=out)
+        self.assertIn("4 files, 1 duplicates, 2 unused files", out.getvalue())
+        self.assertTrue(all(default_storage.exists(name) for name in names))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('clean_media', '--delete', stdout=io.StringIO())
+        moved.refresh_from_db()
+        self.assertEqual(moved.photo.name, 'speakers/a.jpg')
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.media_root, 'speakers'))), ['a.jpg', 'derivatives', 'recent.jpg'],
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_program(days=2, sessions_per_day=2, items_per_session=3)
+
+    def test_minify_keeps_whitespace_sensitive_elements(self):
+        html = (
+            "<ul>\n    <li>A B</li>\n\n    <li>C</li>\n</ul>\n"
+            "<pre>  keep\n    this</pre>\n  <script>\n  // comment\n  run();\n</script>\n"
+        )
+        self.assertEqual(
+            compression.minify_html(html),
+            "<ul>\n<li>A B</li>\n<li>C</li>\n</ul>\n<pre>  keep\n    this</pre>\n"
+            "<script>\n  // comment\n  run();\n</script>",
+        )
+
+    def test_cached_pages_are_compressed_once(self):
+        plain = self.client.get(reverse('schedule'))
+        self.assertNotIn(b"\n    ", plain.content)
+        self.assertIn(b"Talk 1-1-2", plain.content)
+        compressed = self.client.get(reverse('schedule'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertLess(len(compressed.content), len(plain.content) // 3)
+
+        def fail(content, encoding):
+            raise AssertionError("compressed again")
+        original, compression.compress = compression.compress, fail
+        try:
+            with self.assertNumQueries(0):
+                again = self.client.get(reverse('schedule'), HTTP_ACCEPT_ENCODING='gzip')
+        finally:
+            compression.compress = original
+        self.assertEqual(again.content, compressed.content)
+
+    def test_revalidation_across_encodings(self):
+        response = self.client.get(reverse('speakers'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        revalidated = self.client.get(reverse('speakers'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_middleware_compresses_other_responses(self):
+        response = self.client.get(reverse('registration'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b'csrfmiddlewaretoken', gzip.decompress(response.content))
+        # Too small to bother
+        self.assertFalse(self.client.get(reverse('registration_csrf'), HTTP_ACCEPT_ENCODING='gzip').has_header('Content-Encoding'))
+        # Already compressed by the API itself
+        api = self.client.get(reverse('api_schedule'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(json.loads(gzip.decompress(api.content))['days'][0]['date'], '2025-04-18')
+
+
+class RegistrationRollupTests(TestCase):
+    """Registration counts follow saves and back the admin dashboard"""
+
+    def register(self, email, country="Jordan", attendee_type='trainee', **fields):
+        return Registration.objects.create(
+            full_name="Attendee", email=email, institution="KHCC", country=country,
+            attendee_type=attendee_type, **fields
+        )
+
+    def counts(self):
+        return sorted(RegistrationRollup.objects.values_list('country', 'attendee_type', 'count'))
+
+    def test_counts_follow_saves_edits_and_deletes(self):
+        first = self.register("first@example.com")
+        self.register("second@example.com")
+        self.register("third@example.com", country="Saudi Arabia")
+        self.assertEqual(self.counts(), [("Jordan", 'trainee', 2), ("Saudi Arabia", 'trainee', 1)])
+
+        first.country = "Saudi Arabia"
+        first.save()
+        self.assertEqual(self.counts(), [("Jordan", 'trainee', 1), ("Saudi Arabia", 'trainee', 2)])
+
+        Registration.objects.filter(country="Jordan").delete()
+        self.assertEqual(self.counts(), [("Saudi Arabia", 'trainee', 2)])
+
+    def test_days_are_in_the_site_time_zone(self):
+        # 22:30 UTC is already the next day in Amman
+        created_at = datetime.datetime(2025, 4, 17, 22, 30, tzinfo=datetime.timezone.utc)
+        self.register("late@example.com", created_at=created_at)
+        self.assertEqual(RegistrationRollup.objects.get().day, datetime.date(2025, 4, 18))
+        rollups.rebuild()
+        self.assertEqual(RegistrationRollup.objects.get().day, datetime.date(2025, 4, 18))
+
+    def test_bulk_inserts_are_recorded_and_rebuild_matches(self):
+        registrations = [
+            Registration(full_name="Bulk", email=f"bulk{number}@example.com", institution="KHCC",
+                         country="Jordan", attendee_type='specialist')
+            for number in range(3)
+        ]
+        journal.insert(registrations)
+        self.register("direct@example.com")
+        incremental = self.counts()
+        self.assertEqual(incremental, [("Jordan", 'specialist', 3), ("Jordan", 'trainee', 1)])
+
+        RegistrationRollup.objects.all().delete()
+        out = io.StringIO()
+        call_command('rebuild_registration_rollups', stdout=out)
+        self.assertIn("Rebuilt 2 rollup rows", out.getvalue())
+        self.assertEqual(self.counts(), incremental)
+
+    def test_dashboard_sums_filtered_rollups(self):
+        for number in range(3):
+            self.register(f"jordan{number}@example.com")
+        self.register("saudi@example.com", country="Saudi Arabia")
+        self.register("specialist@example.com", country="Saudi Arabia", attendee_type='specialist')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+        url = reverse('admin:conference_registrationrollup_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'attendee_type__exact': 'trainee', 'country': "Saudi Arabia"})
+        self.assertEqual(response.context['summary']['total'], 1)
+        self.assertFalse(any('"conference_registration"' in query['sql'] for query in queries))
+
+        response = self.client.get(url)
+        summary = response.context['summary']
+        self.assertEqual(summary['total'], 5)
+        self.assertIn(("Trainee/Fellow", 4), dict(summary['breakdowns'])["Attendee type"])
+        self.assertContains(response, "5 registrations matching the filters")
 
-# Create your tests here.
@@ -1,10 +1,47 @@
-from django.urls import path
-from . import views
-
-urlpatterns = [
-    path('', views.home, name='home'),
-    path('speakers/', views.speakers, name='speakers'),
-    path('schedule/', views.schedule, name='schedule'),
-    path('registration/', views.registration, name='registration'),
-    path('registration/success/', views.registration_success, name='registration_success'),
-] 
\ No newline at end of file
+from django.conf import settings
+from datetime import date
+
+from django.urls import path, register_converter
+from . import api, ics, views
+
+
+class DateConverter:
+    """``YYYY-MM-DD`` as a ``date``; impossible dates don't match"""
+    regex = r'[0-9]{4}-[0-9]{2}-[0-9]{2}'
+
+    def to_python(self, value):
+        # A ValueError makes the resolver try the next pattern
+        return date.fromisoformat(value)
+
+    def to_url(self, value):
+        return value.isoformat() if isinstance(value, date) else value
+
+
+register_converter(DateConverter, 'date')
+
+
+def build_urlpatterns(page_views):
+    """The app's URLs with the public pages from ``page_views``"""
+    return [
+        path('', page_views.home, name='home'),
+        path('speakers/', page_views.speakers, name='speakers'),
+        path('schedule/', page_views.schedule, name='schedule'),
+        path('registration/', page_views.registration, name='registration'),
+        path('registration/csrf/', views.registration_csrf, name='registration_csrf'),
+        path('registration/success/', views.registration_success, name='registration_success'),
+        path('api/speakers.json', api.speakers_json, name='api_speakers'),
+        path('api/schedule.json', api.schedule_json, name='api_schedule'),
+        path('api/search.json', api.search_json, name='api_search'),
+        path('calendar/conference.ics', ics.conference_ics, name='ics_conference'),
+        path('calendar/day/<date:day>.ics', ics.day_ics, name='ics_day'),
+        path('calendar/speaker/<int:speaker_id>.ics', ics.speaker_ics, name='ics_speaker'),
+    ]
+
+
+# Served over ASGI (see khcc_conference/asgi.py), the public pages and the
+# registration form use their async versions
+if getattr(settings, 'CONFERENCE_ASYNC_VIEWS', False):
+    from . import async_views
+    urlpatterns = build_urlpatterns(async_views)
+else:
+    urlpatterns = build_urlpatterns(views)
@@ -0,0 +1,222 @@
+"""Warming a worker up before it takes traffic, and measuring its start-up.
+
+A fresh worker pays for several things on its first requests: loading the
+database driver and connecting, compiling templates, hashing the media
+files the pages link to, building the program data and pages for the
+cache, and building the search index. ``warm_up()`` does all of that when
+the application is imported (see ``khcc_conference/wsgi.py``), so the
+first visitor gets a warm worker. Each step is timed and a failure is
+logged without stopping start-up: a database that is down when the worker
+starts shouldn't keep the site from coming up once it's back.
+
+With gunicorn's ``preload_app`` the import, and so the warm-up, happens
+once in the master and the workers are forked from it with the compiled
+templates in memory. A database connection can't be shared by two
+processes, so ``gunicorn.conf.py`` closes them before each fork and
+reopens them in the worker with ``connect_databases()``.
+
+``profile_startup()`` starts the application in a new interpreter and
+reports the import time per module and the time to the first response.
+"""
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.template import engines
+from django.urls import reverse
+
+from .media import hash_media
+from .prerender import render_page
+from .replica import get_read_database
+from .search import build_index
+
+logger = logging.getLogger(__name__)
+
+# Template folder compiled by the warm-up, in every template directory
+TEMPLATE_FOLDER = 'conference'
+# Rendered to fill the page and data caches (and compile form widgets)
+WARM_PAGES = ('home', 'speakers', 'schedule', 'registration', 'api_speakers', 'api_schedule')
+
+# Timings of the last warm-up in this process, in milliseconds
+last_report = None
+
+
+def is_enabled():
+    return getattr(settings, 'CONFERENCE_WARMUP', False)
+
+
+def compile_templates():
+    """Load every template of the app, so the cached loaders keep them compiled"""
+    compiled = 0
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            root = os.path.join(directory, TEMPLATE_FOLDER)
+            for folder, subfolders, files in os.walk(root):
+                for filename in sorted(files):
+                    if filename.endswith('.html'):
+                        name = os.path.relpath(os.path.join(folder, filename), directory)
+                        engine.get_template(name.replace(os.sep, '/'))
+                        compiled += 1
+    return compiled
+
+
+def connect_databases():
+    """Open the connections the public pages and registration use"""
+    aliases = {DEFAULT_DB_ALIAS, get_read_database() or DEFAULT_DB_ALIAS}
+    for alias in sorted(aliases):
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+    return len(aliases)
+
+
+def close_connections():
+    """Close this process's connections, e.g. before forking workers"""
+    connections.close_all()
+
+
+def prime_caches():
+    """Render the public pages once, which builds and caches their content"""
+    for name in WARM_PAGES:
+        render_page(reverse(name))
+    return len(WARM_PAGES)
+
+
+STEPS = (
+    ('database', connect_databases),
+    ('templates', compile_templates),
+    ('media', hash_media),
+    ('caches', prime_caches),
+    ('search', build_index),
+)
+
+
+def run_steps():
+    global last_report
+    report = {}
+    started = time.perf_counter()
+    for name, step in STEPS:
+        step_started = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception("Warm-up step %s failed", name)
+        report[f'{name}_ms'] = round((time.perf_counter() - step_started) * 1000, 1)
+    report['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    last_report = report
+    logger.info(
+        "Warm-up finished in %.0fms (%s)", report['total_ms'],
+        ', '.join(f"{name} {report[f'{name}_ms']:.0f}ms" for name, step in STEPS),
+    )
+    return report
+
+
+def warm_up():
+    """Prepare this process for traffic; returns the step timings"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return run_steps()
+    # Imported from inside an event loop (plain uvicorn), where the sync ORM
+    # refuses to run. The connection opened in the thread isn't reused, but
+    # the driver is loaded and everything else is shared.
+    thread = threading.Thread(target=run_steps, name='conference-warmup')
+    thread.start()
+    thread.join()
+    return last_report
+
+
+def warm_up_on_startup():
+    """Called by the WSGI/ASGI modules once the application is loaded"""
+    if is_enabled():
+        warm_up()
+
+
+# Runs in a new interpreter: imports the application, then times requests
+PROBE = """
+import json, sys, time
+started = time.time()
+from wsgiref.util import setup_testing_defaults
+module, attribute = sys.argv[1].rsplit('.', 1)
+application = getattr(__import__(module, fromlist=[attribute]), attribute)
+imported = time.time()
+
+def get(path):
+    environ = {'PATH_INFO': path, 'HTTP_HOST': sys.argv[3]}
+    setup_testing_defaults(environ)
+    statuses = []
+    result = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        b''.join(result)
+    finally:
+        getattr(result, 'close', lambda: None)()
+    return statuses[0]
+
+status = get(sys.argv[2])
+first = time.time()
+get(sys.argv[2])
+second = time.time()
+from conference import warmup
+print(json.dumps({
+    'started': started, 'imported': imported, 'first': first, 'second': second,
+    'status': status, 'warmup': warmup.last_report,
+}))
+"""
+
+
+def parse_importtime(output):
+    """``(module, self_us, cumulative_us)`` from ``python -X importtime`` output"""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def by_package(modules):
+    """Import time per top-level package, in microseconds"""
+    totals = {}
+    for name, self_us, cumulative_us in modules:
+        package = name.split('.')[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return totals
+
+
+def profile_startup(path='/', host='localhost', warmup=True, application=None):
+    """Start the application in a new interpreter and time it"""
+    application = application or settings.WSGI_APPLICATION
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE,
+        CONFERENCE_WARMUP='1' if warmup else '0',
+    )
+    spawned = time.time()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE, application, path, host],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if process.returncode:
+        raise RuntimeError(f"Application failed to start:\n{process.stderr[-2000:]}")
+    probe = json.loads(process.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(process.stderr)
+    return {
+        'application': application,
+        'path': path,
+        'warmup': probe['warmup'],
+        'status': probe['status'],
+        'interpreter_ms': round((probe['started'] - spawned) * 1000, 1),
+        'import_ms': round((probe['imported'] - probe['started']) * 1000, 1),
+        'first_request_ms': round((probe['first'] - probe['imported']) * 1000, 1),
+        'second_request_ms': round((probe['second'] - probe['first']) * 1000, 1),
+        'time_to_first_response_ms': round((probe['first'] - spawned) * 1000, 1),
+        'modules': modules,
+        'packages': by_package(modules),
+    }
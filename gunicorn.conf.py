@@ -0,0 +1,34 @@
+"""
+Gunicorn settings, read from the working directory when gunicorn starts
+(as App Service runs it: ``gunicorn khcc_conference.wsgi``).
+
+The application is loaded, and warmed up (conference/warmup.py), once in
+the master before the workers are forked, so they start with the
+templates compiled and the caches filled. Database connections can't be
+shared by forked processes: the master closes its own before forking and
+each worker opens new ones before it accepts requests.
+"""
+
+preload_app = True
+
+
+def django_ready():
+    # False in a master that didn't preload the application
+    from django.apps import apps
+    return apps.ready
+
+
+def pre_fork(server, worker):
+    if django_ready():
+        from conference.warmup import close_connections
+        close_connections()
+
+
+def post_fork(server, worker):
+    if django_ready():
+        from conference.warmup import connect_databases
+        try:
+            connect_databases()
+        except Exception:
+            # The first request connects instead
+            server.log.exception("Worker %s could not connect to the database", worker.pid)
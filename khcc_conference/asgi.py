@@ -2,6 +2,12 @@
 ASGI config for khcc_conference project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Served this way the public pages and the registration form use the async
+views in ``conference.async_views``. Run it with uvicorn workers, e.g.:
+
+    gunicorn khcc_conference.asgi:application -k uvicorn.workers.UvicornWorker -w 4
+
+or, without gunicorn, ``uvicorn khcc_conference.asgi:application --workers 4``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -12,5 +18,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "khcc_conference.settings")
+os.environ.setdefault("CONFERENCE_ASYNC_VIEWS", "1")
 
 application = get_asgi_application()
+
+# Connect to the database, compile templates and fill the caches before the
+# first request (CONFERENCE_WARMUP); see conference/warmup.py
+from conference.warmup import warm_up_on_startup  # noqa: E402
+
+warm_up_on_startup()
@@ -46,24 +46,31 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "conference",
+    # Deletes replaced and orphaned uploads; keep it last
+    "django_cleanup.apps.CleanupConfig",
 ]
 
 MIDDLEWARE = [
+    "conference.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "conference.prerender.PrerenderMiddleware",
+    # Outside everything else that reads or writes the body
+    "conference.compression.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "conference.middleware.StaticFilesMiddleware",
 ]
 
 ROOT_URLCONF = "khcc_conference.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # Django's backend, timing renders for conference/middleware.py
+        "BACKEND": "conference.middleware.TimedDjangoTemplates",
         "DIRS": [os.path.join(BASE_DIR, 'templates')],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -92,6 +99,78 @@ DATABASES = {
         "HOST": "aidi-db-server.database.windows.net",
         "OPTIONS": {"driver": "ODBC Driver 18 for SQL Server", 
         },
+        # Keep the connection the warm-up opens, instead of reconnecting to
+        # Azure SQL on every request. Not under ASGI, where each request runs
+        # in a thread of its own and would leave its connection behind.
+        "CONN_MAX_AGE": 0 if os.environ.get("CONFERENCE_ASYNC_VIEWS") == "1" else 600,
+        "CONN_HEALTH_CHECKS": True,
+    },
+}
+
+# Public pages can read the program from a read-only copy of the database:
+# add it as DATABASES["replica"], e.g. the same Azure SQL database with
+# "extra_params": "ApplicationIntent=ReadOnly" in its OPTIONS (read scale-out),
+# or a local SQLite file kept in sync with `manage.py sync_read_replica`,
+# and set CONFERENCE_READ_DATABASE=replica in the environment. Off by default.
+# Registration and the admin always use "default". See conference/replica.py.
+CONFERENCE_READ_DATABASE = os.environ.get("CONFERENCE_READ_DATABASE") or None
+DATABASE_ROUTERS = ["conference.routers.PublicReadRouter"]
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# The file backend is shared by all worker processes on the host, so a
+# content version bumped by an admin edit is seen by every worker at once.
+# A local-memory cache is per process and only suitable for a single worker.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(BASE_DIR, 'cache'),
+    },
+}
+
+# Lifetime of cached pages, fragments and program data. Entries are keyed on
+# the content version, so this only bounds how long unreachable entries linger.
+CONFERENCE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Identifies the deployed code in cache keys, page ETags and the pre-render
+# manifest, so a deploy never serves pages rendered by the previous one.
+# Defaults to the git commit; set it where the deploy has no .git folder.
+CONFERENCE_BUILD_ID = os.environ.get("CONFERENCE_BUILD_ID") or None
+
+# Serve the public pages from files pre-rendered by `manage.py prerender_pages`
+# (refreshed automatically after admin saves); see conference/prerender.py
+CONFERENCE_PRERENDER = False
+CONFERENCE_PRERENDER_ROOT = os.path.join(BASE_DIR, 'prerendered')
+
+# Accept registrations into a local SQLite journal and write them to the
+# database in batches with `manage.py flush_registrations --loop`, e.g.
+# os.path.join(BASE_DIR, 'registration-journal.sqlite3'). See conference/journal.py
+CONFERENCE_REGISTRATION_JOURNAL = None
+
+# Async versions of the public views; khcc_conference/asgi.py turns them on
+CONFERENCE_ASYNC_VIEWS = os.environ.get("CONFERENCE_ASYNC_VIEWS") == "1"
+
+# Warm each worker up when the application is loaded, before it takes
+# traffic; see conference/warmup.py and gunicorn.conf.py
+CONFERENCE_WARMUP = os.environ.get("CONFERENCE_WARMUP", "1") == "1"
+
+
+# Request performance instrumentation (see conference/middleware.py)
+PERFORMANCE_SAMPLE_RATE = 0.1
+PERFORMANCE_SLOW_REQUEST_MS = 500
+# Exposes query counts and timings to every visitor; for local profiling
+PERFORMANCE_SERVER_TIMING = os.environ.get("PERFORMANCE_SERVER_TIMING") == "1"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "conference": {"handlers": ["console"], "level": "INFO"},
     },
 }
 
@@ -133,10 +212,19 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STORAGES = {
+    # Media URLs include a hash of the file (see conference/media.py)
+    "default": {"BACKEND": "conference.media.HashedMediaStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+}
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Let the front server send media files: None (the app streams them),
+# 'x-accel-redirect' (nginx, with an internal location at the prefix below)
+# or 'x-sendfile' (Apache mod_xsendfile and similar)
+CONFERENCE_MEDIA_SENDFILE = os.environ.get("CONFERENCE_MEDIA_SENDFILE") or None
+CONFERENCE_MEDIA_ACCEL_PREFIX = '/protected-media/'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -144,7 +232,9 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Email Configuration
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Sends through PERFORMANCE_EMAIL_BACKEND, timing it for conference/middleware.py
+EMAIL_BACKEND = 'conference.middleware.TimedEmailBackend'
+PERFORMANCE_EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
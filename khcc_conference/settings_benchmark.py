@@ -0,0 +1,43 @@
+"""
+Settings for load testing with local synthetic data.
+
+Uses a SQLite file instead of the production database, a local-memory
+cache and a separate media folder, so the generate_conference_data and
+benchmark commands never touch production data:
+
+    python manage.py migrate --settings=khcc_conference.settings_benchmark
+    python manage.py generate_conference_data --settings=khcc_conference.settings_benchmark
+    python manage.py benchmark --settings=khcc_conference.settings_benchmark
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get("BENCHMARK_DATABASE", os.path.join(BASE_DIR, "benchmark.sqlite3")),
+    },
+}
+
+# Set to a second SQLite file to benchmark public reads from a replica
+# (`migrate --database replica`, then `sync_read_replica`), together with
+# CONFERENCE_READ_DATABASE=replica to route the public reads there
+if os.environ.get("BENCHMARK_REPLICA_DATABASE"):
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ["BENCHMARK_REPLICA_DATABASE"],
+    }
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
+MEDIA_ROOT = os.path.join(BASE_DIR, "benchmark_media")
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+# Templates reference static files by name; no collectstatic manifest needed
+STORAGES = dict(STORAGES, staticfiles={"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"})
+PERFORMANCE_SAMPLE_RATE = 0
+# Keep per-request info logs out of the results table
+LOGGING["loggers"]["conference"]["level"] = "WARNING"
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "khcc_conference.settings")
 
 application = get_wsgi_application()
+
+# Connect to the database, compile templates and fill the caches before the
+# first request (CONFERENCE_WARMUP); see conference/warmup.py
+from conference.warmup import warm_up_on_startup  # noqa: E402
+
+warm_up_on_startup()